@@ -0,0 +1,385 @@
+"""
+Generador de corpus sintéticos y deterministas para los benchmarks.
+
+La misma `CorpusSpec` (incluida la semilla) produce siempre los mismos
+bytes, así que los resultados de distintos commits son comparables: el
+Merkle root del corpus se guarda en `corpus.json` y en cada resultado.
+
+Uso:
+    python benchmarks/corpus.py --out benchmarks/corpus --pdfs 50 --pdf-pages 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import zipfile
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from metahunter import integrity
+
+# ---------------------------------------------------------------------------
+# Opcional: JPEG con EXIF/GPS (Pillow + piexif)
+# ---------------------------------------------------------------------------
+
+try:
+    import piexif
+    from PIL import Image
+    _HAS_IMAGING = True
+except ImportError:
+    piexif = None  # type: ignore[assignment]
+    Image = None  # type: ignore[assignment]
+    _HAS_IMAGING = False
+
+# <out>/corpus.json describe el corpus; los archivos van en <out>/files
+CORPUS_MANIFEST = "corpus.json"
+CORPUS_FILES = "files"
+
+# Fecha fija en los ZIP (DOCX): el contenido no depende de cuándo se genera
+_ZIP_DATE = (2024, 1, 1, 0, 0, 0)
+
+_WORDS = (
+    "metadatos autor documento informe confidencial proyecto revisión "
+    "cliente contrato borrador versión firma anexo sección resumen datos"
+).split()
+
+
+@dataclass
+class CorpusSpec:
+    """Composición del corpus; cualquier cambio genera un corpus distinto."""
+    seed: int = 42
+    pdfs: int = 20
+    pdf_pages: int = 5
+    docx: int = 20
+    jpegs: int = 20
+    jpeg_size: int = 1024
+    blobs: int = 2
+    blob_mb: int = 16
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ---------------------------------------------------------------------------
+# Generadores por tipo
+# ---------------------------------------------------------------------------
+
+def _text(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(words))
+
+
+def _person(rnd: random.Random) -> str:
+    first = rnd.choice(["Ana", "Luis", "Marta", "Jorge", "Sofía", "Pablo"])
+    last = rnd.choice(["García", "López", "Martínez", "Pérez", "Ruiz", "Díaz"])
+    return f"{first} {last}"
+
+
+def _xmp_packet(author: str, title: str, tool: str) -> bytes:
+    return (
+        '<?xpacket begin="﻿" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+        '<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        '<rdf:Description rdf:about="" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:xmp="http://ns.adobe.com/xap/1.0/">'
+        f"<dc:creator><rdf:Seq><rdf:li>{author}</rdf:li></rdf:Seq></dc:creator>"
+        f'<dc:title><rdf:Alt><rdf:li xml:lang="x-default">{title}</rdf:li></rdf:Alt></dc:title>'
+        f"<xmp:CreatorTool>{tool}</xmp:CreatorTool>"
+        "<xmp:CreateDate>2024-01-01T00:00:00Z</xmp:CreateDate>"
+        "</rdf:Description></rdf:RDF></x:xmpmeta>"
+        '<?xpacket end="w"?>'
+    ).encode("utf-8")
+
+
+def make_pdf(path: Path, rnd: random.Random, pages: int) -> None:
+    """PDF con `pages` páginas de texto, diccionario Info y paquete XMP."""
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    resources = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)}),
+    })
+
+    for _ in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        lines = [
+            f"BT /F1 11 Tf 50 {740 - 14 * i} Td ({_text(rnd, 12)}) Tj ET"
+            for i in range(48)
+        ]
+        content = DecodedStreamObject()
+        content.set_data("\n".join(lines).encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = resources
+
+    author = _person(rnd)
+    title = _text(rnd, 4).title()
+    tool = f"Generador {rnd.randint(1, 9)}.{rnd.randint(0, 9)}"
+    writer.add_metadata({
+        "/Author": author,
+        "/Title": title,
+        "/Subject": _text(rnd, 6),
+        "/Keywords": _text(rnd, 3),
+        "/Creator": tool,
+        "/Producer": "MetaHunter benchmarks",
+        "/CreationDate": "D:20240101000000Z",
+        "/ModDate": "D:20240101000000Z",
+    })
+
+    xmp = DecodedStreamObject()
+    xmp.set_data(_xmp_packet(author, title, tool))
+    xmp[NameObject("/Type")] = NameObject("/Metadata")
+    xmp[NameObject("/Subtype")] = NameObject("/XML")
+    writer._root_object[NameObject("/Metadata")] = writer._add_object(xmp)
+
+    with path.open("wb") as f:
+        writer.write(f)
+
+
+def make_docx(path: Path, rnd: random.Random) -> None:
+    """DOCX mínimo válido con docProps core/app/custom rellenos."""
+    paragraphs = "".join(
+        f"<w:p><w:r><w:t>{_text(rnd, 20)}</w:t></w:r></w:p>" for _ in range(rnd.randint(20, 80))
+    )
+    author = _person(rnd)
+    parts = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '<Override PartName="/docProps/core.xml" '
+            'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+            '<Override PartName="/docProps/app.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+            '<Override PartName="/docProps/custom.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.custom-properties+xml"/>'
+            "</Types>"
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="word/document.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '<Relationship Id="rId2" Target="docProps/core.xml" '
+            'Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"/>'
+            '<Relationship Id="rId3" Target="docProps/app.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties"/>'
+            '<Relationship Id="rId4" Target="docProps/custom.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/custom-properties"/>'
+            "</Relationships>"
+        ),
+        "word/document.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{paragraphs}</w:body></w:document>"
+        ),
+        "docProps/core.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<cp:coreProperties '
+            'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" '
+            'xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            f"<dc:title>{_text(rnd, 4)}</dc:title>"
+            f"<dc:creator>{author}</dc:creator>"
+            f"<cp:lastModifiedBy>{_person(rnd)}</cp:lastModifiedBy>"
+            f"<cp:keywords>{_text(rnd, 3)}</cp:keywords>"
+            '<dcterms:created xsi:type="dcterms:W3CDTF">2024-01-01T00:00:00Z</dcterms:created>'
+            '<dcterms:modified xsi:type="dcterms:W3CDTF">2024-01-02T00:00:00Z</dcterms:modified>'
+            "</cp:coreProperties>"
+        ),
+        "docProps/app.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+            "<Application>Microsoft Office Word</Application>"
+            f"<Company>{_text(rnd, 2).title()} S.A.</Company>"
+            f"<TotalTime>{rnd.randint(1, 500)}</TotalTime>"
+            "</Properties>"
+        ),
+        "docProps/custom.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/custom-properties" '
+            'xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">'
+            '<property fmtid="{D5CDD505-2E9C-101B-9397-08002B2CF9AE}" pid="2" name="Cliente">'
+            f"<vt:lpwstr>{_person(rnd)}</vt:lpwstr></property>"
+            "</Properties>"
+        ),
+    }
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in parts.items():
+            info = zipfile.ZipInfo(name, date_time=_ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, xml.encode("utf-8"))
+
+
+def _gps_rational(value: float):
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round(((value - degrees) * 60 - minutes) * 60 * 100)
+    return ((degrees, 1), (minutes, 1), (seconds, 100))
+
+
+def make_jpeg(path: Path, rnd: random.Random, size: int) -> None:
+    """JPEG de `size`x`size` con EXIF de cámara y coordenadas GPS."""
+    # Ruido de baja resolución escalado: la imagen no es trivial de comprimir
+    small = 32
+    noise = bytes(rnd.getrandbits(8) for _ in range(small * small * 3))
+    image = Image.frombytes("RGB", (small, small), noise).resize((size, size), Image.BILINEAR)
+
+    lat = rnd.uniform(-80, 80)
+    lon = rnd.uniform(-179, 179)
+    exif = piexif.dump({
+        "0th": {
+            piexif.ImageIFD.Make: rnd.choice(["Canon", "Nikon", "Apple", "Samsung"]).encode(),
+            piexif.ImageIFD.Model: f"Modelo {rnd.randint(1, 99)}".encode(),
+            piexif.ImageIFD.Software: b"MetaHunter benchmarks",
+            piexif.ImageIFD.Artist: _person(rnd).encode("utf-8"),
+            piexif.ImageIFD.DateTime: b"2024:01:01 00:00:00",
+        },
+        "Exif": {
+            piexif.ExifIFD.DateTimeOriginal: b"2024:01:01 00:00:00",
+            piexif.ExifIFD.BodySerialNumber: str(rnd.randint(10**8, 10**9)).encode(),
+        },
+        "GPS": {
+            piexif.GPSIFD.GPSLatitudeRef: b"N" if lat >= 0 else b"S",
+            piexif.GPSIFD.GPSLatitude: _gps_rational(lat),
+            piexif.GPSIFD.GPSLongitudeRef: b"E" if lon >= 0 else b"W",
+            piexif.GPSIFD.GPSLongitude: _gps_rational(lon),
+        },
+        "1st": {},
+        "thumbnail": None,
+    })
+    image.save(path, "JPEG", quality=85, exif=exif)
+
+
+def make_blob(path: Path, rnd: random.Random, size: int) -> None:
+    """Binario pseudoaleatorio sin formato reconocible (se copia tal cual)."""
+    chunk = 1 << 20
+    with path.open("wb") as f:
+        remaining = size
+        while remaining > 0:
+            n = min(chunk, remaining)
+            f.write(rnd.getrandbits(8 * n).to_bytes(n, "little"))
+            remaining -= n
+
+
+# ---------------------------------------------------------------------------
+# Corpus completo
+# ---------------------------------------------------------------------------
+
+def generate_corpus(out_dir: Path, spec: CorpusSpec) -> Dict[str, Any]:
+    """
+    Genera el corpus en `out_dir`/files (borra antes los archivos de un
+    corpus previo) y escribe `corpus.json` con la especificación, el tamaño
+    y el hash de cada archivo y su Merkle root.
+    """
+    files_dir = out_dir / CORPUS_FILES
+    files_dir.mkdir(parents=True, exist_ok=True)
+    for old in files_dir.iterdir():
+        if old.is_file():
+            old.unlink()
+
+    # Un generador por archivo: añadir PDFs no cambia las imágenes, etc.
+    def rnd_for(kind: str, i: int) -> random.Random:
+        return random.Random(f"{spec.seed}:{kind}:{i}")
+
+    for i in range(spec.pdfs):
+        make_pdf(files_dir / f"doc_{i:05d}.pdf", rnd_for("pdf", i), spec.pdf_pages)
+    for i in range(spec.docx):
+        make_docx(files_dir / f"doc_{i:05d}.docx", rnd_for("docx", i))
+    if spec.jpegs and not _HAS_IMAGING:
+        print("[corpus] Pillow/piexif no disponibles: se omiten los JPEG")
+    elif spec.jpegs:
+        for i in range(spec.jpegs):
+            make_jpeg(files_dir / f"img_{i:05d}.jpg", rnd_for("jpeg", i), spec.jpeg_size)
+    for i in range(spec.blobs):
+        make_blob(files_dir / f"blob_{i:05d}.bin", rnd_for("blob", i), spec.blob_mb << 20)
+
+    manifest = describe_corpus(out_dir, spec)
+    (out_dir / CORPUS_MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def describe_corpus(out_dir: Path, spec: CorpusSpec) -> Dict[str, Any]:
+    files: List[Dict[str, Any]] = []
+    for path in sorted((out_dir / CORPUS_FILES).iterdir(), key=lambda p: integrity.path_sort_key(p.name)):
+        if not path.is_file():
+            continue
+        files.append({
+            "path": path.name,
+            "size": path.stat().st_size,
+            "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+        })
+    return {
+        "spec": spec.to_dict(),
+        "files": files,
+        "total_bytes": sum(f["size"] for f in files),
+        "merkle_root": integrity.compute_merkle_root([f["sha256"] for f in files]) if files else None,
+    }
+
+
+def ensure_corpus(out_dir: Path, spec: CorpusSpec) -> Dict[str, Any]:
+    """Reutiliza el corpus de `out_dir` si se generó con la misma spec."""
+    manifest_path = out_dir / CORPUS_MANIFEST
+    if manifest_path.is_file():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("spec") == spec.to_dict():
+            return manifest
+    return generate_corpus(out_dir, spec)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Una opción --campo por cada campo de CorpusSpec."""
+    defaults = CorpusSpec()
+    for f in fields(CorpusSpec):
+        parser.add_argument(
+            "--" + f.name.replace("_", "-"),
+            type=int,
+            default=getattr(defaults, f.name),
+            help=f"(corpus) por defecto: {getattr(defaults, f.name)}",
+        )
+
+
+def spec_from_args(args: argparse.Namespace) -> CorpusSpec:
+    return CorpusSpec(**{f.name: getattr(args, f.name) for f in fields(CorpusSpec)})
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Genera un corpus sintético determinista.")
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=Path(__file__).resolve().parent / "corpus",
+        help="Carpeta del corpus (por defecto: benchmarks/corpus).",
+    )
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+
+    manifest = generate_corpus(args.out, spec_from_args(args))
+    print(f"[corpus] {len(manifest['files'])} archivos, "
+          f"{manifest['total_bytes'] / (1 << 20):.1f} MiB en {args.out}")
+    print(f"[corpus] Merkle root: {manifest['merkle_root']}")
+
+
+if __name__ == "__main__":
+    main()
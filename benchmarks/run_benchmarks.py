@@ -0,0 +1,435 @@
+"""
+Benchmarks de MetaHunter sobre un corpus sintético determinista.
+
+Mide rendimiento (archivos/s, MB/s), latencia por archivo (p50/p95/p99) y
+memoria pico de:
+  - analyze:     analyzer.analyze_files, un archivo por llamada
+  - clean:       cleaner.clean_file
+  - integrity:   integrity.build_integrity_report (v1 y v2) con N hashes
+  - pipeline:    cli.run_pipeline completo (sin IA ni caché)
+
+Cada benchmark corre en un proceso nuevo, así la memoria pico de uno no
+contamina la del siguiente. El resultado es un JSON con el commit, la
+versión de Python, los parámetros y el Merkle root del corpus; con
+--compare se muestran las diferencias contra un resultado anterior.
+
+Uso:
+    python benchmarks/run_benchmarks.py --repeat 3
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<anterior>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import aio, analyzer, cleaner, cli, integrity, stages
+from metahunter.timing import peak_rss_kb
+
+from corpus import CORPUS_FILES, add_spec_arguments, ensure_corpus, spec_from_args
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_SCHEMA = 1
+BENCHMARKS = ("analyze", "clean", "integrity", "pipeline")
+
+
+# ---------------------------------------------------------------------------
+# Métricas
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: Sequence[float], q: float) -> float | None:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-int(q * 100) * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(
+    runs_s: List[float],
+    latencies_ms: List[float],
+    items: int,
+    total_bytes: int | None,
+) -> Dict[str, Any]:
+    """
+    Resumen de un benchmark. `runs_s` son los segundos de cada repetición
+    (se usa la mediana para el rendimiento) y `latencies_ms` la latencia de
+    cada elemento en todas las repeticiones.
+    """
+    runs = sorted(runs_s)
+    seconds = runs[len(runs) // 2]
+    latencies = sorted(latencies_ms)
+    return {
+        "items": items,
+        "bytes": total_bytes,
+        "repeat": len(runs),
+        "seconds": round(seconds, 6),
+        "seconds_min": round(runs[0], 6),
+        "items_per_s": round(items / seconds, 3) if seconds else None,
+        "mb_per_s": round(total_bytes / seconds / 1e6, 3) if seconds and total_bytes else None,
+        "latency_ms": {
+            "p50": _ms(percentile(latencies, 0.50)),
+            "p95": _ms(percentile(latencies, 0.95)),
+            "p99": _ms(percentile(latencies, 0.99)),
+            "max": _ms(latencies[-1] if latencies else None),
+        },
+    }
+
+
+def _ms(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
+
+
+def _timed_per_item(fn: Callable[[Path], Any], paths: List[Path], repeat: int):
+    runs: List[float] = []
+    latencies: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            t0 = time.perf_counter()
+            fn(path)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        runs.append(time.perf_counter() - started)
+    return runs, latencies
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks (se ejecutan en un proceso hijo)
+# ---------------------------------------------------------------------------
+
+def bench_analyze(params: Dict[str, Any]) -> Dict[str, Any]:
+    paths = _corpus_paths(params)
+    runs, latencies = _timed_per_item(lambda p: analyzer.analyze_files([p]), paths, params["repeat"])
+    return summarize(runs, latencies, len(paths), _total_bytes(paths))
+
+
+def bench_clean(params: Dict[str, Any]) -> Dict[str, Any]:
+    paths = _corpus_paths(params)
+    with tempfile.TemporaryDirectory(prefix="metahunter-bench-") as tmp:
+        out_dir = Path(tmp)
+        runs, latencies = _timed_per_item(
+            lambda p: cleaner.clean_file(p, out_dir / p.name, pdf_mode=params["pdf_mode"]),
+            paths,
+            params["repeat"],
+        )
+    return summarize(runs, latencies, len(paths), _total_bytes(paths))
+
+
+def bench_integrity(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Reporte de integridad con N hashes sintéticos; la latencia es por reporte."""
+    leaves = params["integrity_leaves"]
+    file_hashes = {
+        f"dir_{i % 100:02d}/file_{i:08d}.bin": hashlib.sha256(str(i).encode()).hexdigest()
+        for i in range(leaves)
+    }
+    results: Dict[str, Any] = {}
+    for version in integrity.MERKLE_VERSIONS:
+        runs: List[float] = []
+        for _ in range(params["repeat"]):
+            started = time.perf_counter()
+            integrity.build_integrity_report(file_hashes, version=version, workers=params["workers"])
+            runs.append(time.perf_counter() - started)
+        results[f"v{version}"] = summarize(runs, [s * 1000 for s in runs], leaves, None)
+    return results
+
+
+def bench_pipeline(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pipeline completo sobre el corpus. La latencia por archivo sale de los
+    eventos `file_cleaned` del log JSONL de cada ejecución.
+    """
+    paths = _corpus_paths(params)
+    runs: List[float] = []
+    latencies: List[float] = []
+
+    for _ in range(params["repeat"]):
+        with tempfile.TemporaryDirectory(prefix="metahunter-bench-") as tmp:
+            tmp_dir = Path(tmp)
+            log_path = tmp_dir / "log.jsonl"
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.run_pipeline(
+                    input_dir=Path(params["corpus_dir"]) / CORPUS_FILES,
+                    output_dir=tmp_dir / "out",
+                    log_path=log_path,
+                    use_ai=False,
+                    stats_path=tmp_dir / "stats.json",
+                    ai_summary_path=tmp_dir / "ai_summary.json",
+                    ai_report_path=tmp_dir / "ai_report.md",
+                    integrity_report_path=tmp_dir / "integrity.json",
+                    workers=params["workers"],
+                    io_mode=params["io_mode"],
+                    max_inflight=params["max_inflight"],
+                    queue_depth=params["queue_depth"],
+                    pdf_mode=params["pdf_mode"],
+                    use_cache=False,
+                )
+            runs.append(time.perf_counter() - started)
+            latencies.extend(_cleaned_latencies(log_path))
+
+    return summarize(runs, latencies, len(paths), _total_bytes(paths))
+
+
+def _cleaned_latencies(log_path: Path) -> List[float]:
+    latencies: List[float] = []
+    with log_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("event") == "file_cleaned":
+                duration = (record.get("details") or {}).get("duration_ms")
+                if duration is not None:
+                    latencies.append(float(duration))
+    return latencies
+
+
+def _corpus_paths(params: Dict[str, Any]) -> List[Path]:
+    files_dir = Path(params["corpus_dir"]) / CORPUS_FILES
+    return sorted(p for p in files_dir.iterdir() if p.is_file())
+
+
+def _total_bytes(paths: List[Path]) -> int:
+    return sum(p.stat().st_size for p in paths)
+
+
+_BENCH_FUNCS = {
+    "analyze": bench_analyze,
+    "clean": bench_clean,
+    "integrity": bench_integrity,
+    "pipeline": bench_pipeline,
+}
+
+
+def _run_isolated(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Punto de entrada del proceso hijo: ejecuta un benchmark y mide su RSS."""
+    baseline = peak_rss_kb()
+    result = _BENCH_FUNCS[name](params)
+    peak = peak_rss_kb()
+    return {
+        "result": result,
+        "peak_rss_kb": peak,
+        "baseline_rss_kb": baseline["self"] if baseline else None,
+    }
+
+
+def run_benchmark(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(_run_isolated, name, params).result()
+
+
+# ---------------------------------------------------------------------------
+# Resultados
+# ---------------------------------------------------------------------------
+
+def git_info() -> Dict[str, Any]:
+    def git(*args: str) -> str | None:
+        try:
+            out = subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return out.stdout.strip()
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Líneas de texto con el cambio de rendimiento y latencia p95 por benchmark."""
+    lines: List[str] = []
+    if old.get("corpus", {}).get("merkle_root") != new.get("corpus", {}).get("merkle_root"):
+        lines.append("[bench] AVISO: los corpus son distintos, la comparación no es directa")
+
+    for name, old_result, new_result in _pairs(old.get("benchmarks", {}), new.get("benchmarks", {})):
+        a, b = old_result.get("items_per_s"), new_result.get("items_per_s")
+        pa, pb = old_result["latency_ms"].get("p95"), new_result["latency_ms"].get("p95")
+        speed = f"{(b / a - 1) * 100:+.1f}%" if a and b else "n/d"
+        p95 = f"{(pb / pa - 1) * 100:+.1f}%" if pa and pb else "n/d"
+        lines.append(f"[bench] {name:<14} items/s {a} -> {b} ({speed}); p95 {pa} -> {pb} ms ({p95})")
+    return lines
+
+
+def _pairs(old: Dict[str, Any], new: Dict[str, Any]):
+    for name, entry in new.items():
+        if name not in old:
+            continue
+        old_result, new_result = old[name]["result"], entry["result"]
+        if "items" in new_result:
+            yield name, old_result, new_result
+        else:
+            for sub, result in new_result.items():
+                if sub in old_result:
+                    yield f"{name}.{sub}", old_result[sub], result
+
+
+def _print_result(name: str, entry: Dict[str, Any]) -> None:
+    result = entry["result"]
+    rows = [(name, result)] if "items" in result else [(f"{name}.{k}", v) for k, v in result.items()]
+    peak = (entry.get("peak_rss_kb") or {}).get("self")
+    for label, r in rows:
+        lat = r["latency_ms"]
+        mb = f", {r['mb_per_s']} MB/s" if r.get("mb_per_s") is not None else ""
+        print(f"[bench] {label:<14} {r['items_per_s']} items/s{mb}; "
+              f"p50 {lat['p50']} / p95 {lat['p95']} / p99 {lat['p99']} ms; "
+              f"RSS pico {peak} KiB")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de MetaHunter.")
+    parser.add_argument(
+        "--corpus-dir",
+        type=Path,
+        default=BENCH_DIR / "corpus",
+        help="Carpeta del corpus (se genera si falta o si cambia la spec).",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=BENCHMARKS,
+        default=list(BENCHMARKS),
+        help="Benchmarks a ejecutar (por defecto: todos).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones de cada benchmark (por defecto: 3).")
+    parser.add_argument("--workers", type=int, default=1, help="Workers del pipeline y del Merkle (por defecto: 1).")
+    parser.add_argument(
+        "--io-mode",
+        choices=aio.IO_MODES,
+        default="sync",
+        help="Modo de E/S del pipeline (por defecto: sync).",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=aio.DEFAULT_MAX_INFLIGHT,
+        help=f"Archivos en vuelo con --io-mode async o staged (por defecto: {aio.DEFAULT_MAX_INFLIGHT}).",
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=stages.DEFAULT_QUEUE_DEPTH,
+        help=f"Cola entre etapas con --io-mode staged (por defecto: {stages.DEFAULT_QUEUE_DEPTH}).",
+    )
+    parser.add_argument(
+        "--pdf-mode",
+        choices=cleaner.PDF_MODES,
+        default="fast",
+        help="Modo de limpieza de PDF (por defecto: fast).",
+    )
+    parser.add_argument(
+        "--integrity-leaves",
+        type=int,
+        default=100_000,
+        help="Hashes sintéticos del benchmark de integridad (por defecto: 100000).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="JSON de resultados (por defecto: benchmarks/results/<fecha>_<commit>.json).",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        default=None,
+        help="Resultado anterior contra el que comparar.",
+    )
+    add_spec_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    spec = spec_from_args(args)
+    corpus_dir = args.corpus_dir.resolve()
+
+    corpus = ensure_corpus(corpus_dir, spec)
+    print(f"[bench] corpus: {len(corpus['files'])} archivos, "
+          f"{corpus['total_bytes'] / (1 << 20):.1f} MiB ({corpus['merkle_root']})")
+
+    params = {
+        "corpus_dir": str(corpus_dir),
+        "repeat": args.repeat,
+        "workers": args.workers,
+        "io_mode": args.io_mode,
+        "max_inflight": args.max_inflight,
+        "queue_depth": args.queue_depth,
+        "pdf_mode": args.pdf_mode,
+        "integrity_leaves": args.integrity_leaves,
+    }
+
+    results: Dict[str, Any] = {}
+    for name in args.only:
+        results[name] = run_benchmark(name, params)
+        _print_result(name, results[name])
+
+    git = git_info()
+    created = datetime.now(timezone.utc)
+    document = {
+        "schema_version": RESULTS_SCHEMA,
+        "created_at": created.isoformat(),
+        "git": git,
+        "environment": environment(),
+        "params": {**params, "only": args.only},
+        "corpus": {
+            "spec": corpus["spec"],
+            "files": len(corpus["files"]),
+            "total_bytes": corpus["total_bytes"],
+            "merkle_root": corpus["merkle_root"],
+        },
+        "benchmarks": results,
+    }
+
+    output = args.output
+    if output is None:
+        commit = (git["commit"] or "nogit")[:10]
+        output = BENCH_DIR / "results" / f"{created.strftime('%Y%m%dT%H%M%SZ')}_{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    print(f"[bench] resultados en {output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        for line in compare(baseline, document):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
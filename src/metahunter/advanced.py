@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+import os
+from dataclasses import dataclass, asdict, field
 from typing import Any, Dict, List, Tuple
 
+from .signatures import SIGNATURES_ENV, SignatureMatcher, load_signatures
+
 
 @dataclass
 class AdvancedAnalysisResult:
@@ -18,6 +21,7 @@ class AdvancedAnalysisResult:
     forensic_timeline: List[str]
     ai_generated: bool
     ai_evidence: List[str]
+    ai_matches: List[Dict[str, str]] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -32,7 +36,7 @@ def analyze_file_advanced(metadata: Dict[str, Any]) -> AdvancedAnalysisResult:
     """
     risk_score, risk_level, reasons = _compute_risk(metadata)
     timeline = _build_forensic_timeline(metadata)
-    ai_flag, ai_evidence = _detect_ai_generation(metadata)
+    ai_flag, ai_evidence, ai_matches = _detect_ai_generation(metadata)
 
     return AdvancedAnalysisResult(
         risk_score=risk_score,
@@ -41,6 +45,7 @@ def analyze_file_advanced(metadata: Dict[str, Any]) -> AdvancedAnalysisResult:
         forensic_timeline=timeline,
         ai_generated=ai_flag,
         ai_evidence=ai_evidence,
+        ai_matches=ai_matches,
     )
 
 
@@ -96,6 +101,14 @@ def _compute_risk(metadata: Dict[str, Any]) -> Tuple[int, str, List[str]]:
         score += 5
         reasons.append("Formato proclive a contener metadatos sensibles (PDF/Word/imagen).")
 
+    # 7) Extensión que no corresponde con el contenido real
+    if metadata.get("mime_mismatch"):
+        score += 10
+        reasons.append(
+            f"La extensión declara '{metadata.get('declared_mime_type')}' pero el contenido es "
+            f"'{metadata.get('detected_mime_type')}' (archivo renombrado o disfrazado)."
+        )
+
     # Normalizar y asignar nivel
     if score > 100:
         score = 100
@@ -161,6 +174,9 @@ def _build_forensic_timeline(metadata: Dict[str, Any]) -> List[str]:
 # Detector de archivos generados por IA
 # ---------------------------------------------------------------------------
 
+# Firmas mínimas de respaldo si no se puede leer el archivo de firmas
+# versionado (data/ai_signatures.json). Un archivo configurado a mano con
+# METAHUNTER_AI_SIGNATURES nunca se sustituye por estas: si falla, es error.
 AI_HINT_KEYWORDS = [
     "midjourney",
     "stable diffusion",
@@ -170,32 +186,59 @@ AI_HINT_KEYWORDS = [
     "openai",
     "firefly",
     "adobe firefly",
-    "canva",
     "ai generated",
     "generated with ai",
     "artificial intelligence",
     "leonardo.ai",
 ]
 
+# Nombres de producto que también son palabras o carpetas corrientes: solo
+# como palabra completa y en los campos de la herramienta de creación.
+AI_HINT_TOOLS = ["canva"]
+_TOOL_FIELDS = ("software", "creator_tool")
+
+_matcher: SignatureMatcher | None = None
+
 
-def _detect_ai_generation(metadata: Dict[str, Any]) -> Tuple[bool, List[str]]:
+def get_signature_matcher() -> SignatureMatcher:
+    """
+    Matcher compilado una sola vez por proceso. Lanza ValueError si el
+    archivo indicado en METAHUNTER_AI_SIGNATURES no existe o no es válido.
+    """
+    global _matcher
+    if _matcher is None:
+        configured = os.getenv(SIGNATURES_ENV)
+        try:
+            _matcher = load_signatures()
+        except (OSError, ValueError, KeyError) as e:
+            if configured:
+                raise ValueError(
+                    f"No se pudo cargar el archivo de firmas IA {configured!r} "
+                    f"({SIGNATURES_ENV}): {e}"
+                ) from e
+            _matcher = SignatureMatcher(
+                [(k, k) for k in AI_HINT_KEYWORDS] + [(k, k, True, _TOOL_FIELDS) for k in AI_HINT_TOOLS],
+                version="builtin",
+            )
+    return _matcher
+
+
+def _detect_ai_generation(metadata: Dict[str, Any]) -> Tuple[bool, List[str], List[Dict[str, str]]]:
     """
     Heurística simple: busca cadenas típicas de generadores de IA
     en los metadatos (EXIF, XMP, productor de PDF, etc.).
+
+    Todas las firmas se buscan en una sola pasada por campo, y cada
+    coincidencia indica qué clave de metadatos la provocó.
     """
     evidence: List[str] = []
-    meta_strings: List[str] = []
+    matches = get_signature_matcher().match_metadata(metadata)
 
-    for key, value in metadata.items():
-        if value is None:
+    seen = set()
+    for m in matches:
+        if m.signature in seen:
             continue
-        meta_strings.append(str(value).lower())
-        meta_strings.append(str(key).lower())
-
-    joined = " ".join(meta_strings)
-
-    for hint in AI_HINT_KEYWORDS:
-        if hint in joined:
-            evidence.append(f"Coincidencia de '{hint}' en metadatos.")
+        seen.add(m.signature)
+        evidence.append(f"Coincidencia de '{m.signature}' en metadatos (campo '{m.field}').")
 
-    return (len(evidence) > 0), evidence
+    return (len(evidence) > 0), evidence, [m.to_dict() for m in matches]
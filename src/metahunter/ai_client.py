@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import heapq
 import json
 import os
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
 from datetime import datetime, timezone
 
+from .jsonlog import JsonlLogger, append_event
+
 # ---------------------------------------------------------------------------
 # Opcional: integración con OpenAI (no es obligatoria)
 # ---------------------------------------------------------------------------
@@ -53,20 +56,125 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+def _is_jsonl_stats(stats_path: Path) -> bool:
+    """
+    Stats en streaming (JSON Lines): cada línea es la entrada completa de un
+    archivo. El JSON clásico empieza con "{" solo en la primera línea.
+    """
+    if stats_path.suffix.lower() == ".jsonl":
+        return True
+    with stats_path.open("r", encoding="utf-8") as f:
+        first = f.readline().strip()
+    try:
+        entry = json.loads(first)
+    except ValueError:
+        return False
+    return isinstance(entry, dict) and "sha256" in entry and "path" in entry
+
+
+def _iter_stats(stats_path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Recorre las stats (JSON de dict o JSON Lines) devolviendo pares
+    (ruta, info) de uno en uno, sin cargar el archivo completo en memoria.
+    """
+    with stats_path.open("r", encoding="utf-8") as f:
+        if _is_jsonl_stats(stats_path):
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    yield str(entry.get("path", "")), entry
+        else:
+            yield from _iter_json_object(f)
+
+
+def _iter_json_object(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Parser incremental de un objeto JSON de nivel raíz: lee el archivo por
+    bloques y va devolviendo cada (clave, valor) en cuanto está completo.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def _fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def _peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not _fill():
+                return ""
+
+    def _decode() -> Any:
+        nonlocal pos
+        _peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if _fill():
+                    continue
+                raise
+            # Un número al final del bloque podría continuar en el siguiente
+            if end < len(buf) or not _fill():
+                pos = end
+                return value
+
+    def _expect(chars: str) -> str:
+        nonlocal pos
+        c = _peek()
+        if not c or c not in chars:
+            raise ValueError("El archivo de estadísticas no contiene un objeto JSON de nivel raíz.")
+        pos += 1
+        return c
+
+    _expect("{")
+    if _peek() == "}":
+        return
+
+    while True:
+        key = _decode()
+        _expect(":")
+        yield str(key), _decode()
+        if _expect(",}") == "}":
+            return
+
+
 def _load_stats(stats_path: Path) -> Dict[str, Any]:
-    data = json.loads(stats_path.read_text(encoding="utf-8"))
-    if not isinstance(data, dict):
-        raise ValueError("El archivo de estadísticas no contiene un objeto JSON de nivel raíz.")
-    return data
+    return dict(_iter_stats(stats_path))
 
 
-def _compute_risk_summary(stats: Dict[str, Any]) -> RiskSummary:
+def _summarize_stats(
+    items: Iterable[Tuple[str, Dict[str, Any]]],
+    top_n: int = 5,
+) -> Tuple[RiskSummary, List[Tuple[str, int, str]]]:
+    """
+    Una sola pasada sobre las stats: calcula los contadores de RiskSummary
+    y, con un heap de tamaño `top_n`, los archivos de mayor riesgo
+    (a igual score se conserva el orden original, como un sort estable).
+    """
     total = 0
     low = medium = high = 0
     ai_count = 0
     by_ext: Dict[str, int] = {}
+    heap: List[Tuple[int, int, str, str]] = []
 
-    for file_path, info in stats.items():
+    for seq, (file_path, info) in enumerate(items):
         total += 1
         ext = str(info.get("extension", "")).lower()
         by_ext[ext] = by_ext.get(ext, 0) + 1
@@ -83,7 +191,15 @@ def _compute_risk_summary(stats: Dict[str, Any]) -> RiskSummary:
         if advanced.get("ai_generated"):
             ai_count += 1
 
-    return RiskSummary(
+        if top_n > 0:
+            score = int(advanced.get("risk_score", 0))
+            item = (score, -seq, file_path, str(advanced.get("risk_level", "BAJO")))
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    summary = RiskSummary(
         total_files=total,
         risk_low=low,
         risk_medium=medium,
@@ -91,6 +207,12 @@ def _compute_risk_summary(stats: Dict[str, Any]) -> RiskSummary:
         ai_generated_count=ai_count,
         by_extension=by_ext,
     )
+    top = [(path, score, level) for score, _, path, level in sorted(heap, reverse=True)]
+    return summary, top
+
+
+def _compute_risk_summary(stats: Dict[str, Any]) -> RiskSummary:
+    return _summarize_stats(stats.items(), top_n=0)[0]
 
 
 def _select_top_risky_files(stats: Dict[str, Any], n: int = 5) -> List[Tuple[str, int, str]]:
@@ -99,16 +221,7 @@ def _select_top_risky_files(stats: Dict[str, Any], n: int = 5) -> List[Tuple[str
       (ruta, risk_score, risk_level)
     ordenadas de mayor a menor riesgo.
     """
-    items: List[Tuple[str, int, str]] = []
-
-    for file_path, info in stats.items():
-        advanced = info.get("advanced", {})
-        score = int(advanced.get("risk_score", 0))
-        level = str(advanced.get("risk_level", "BAJO"))
-        items.append((file_path, score, level))
-
-    items.sort(key=lambda x: x[1], reverse=True)
-    return items[:n]
+    return _summarize_stats(stats.items(), top_n=n)[1]
 
 
 # ---------------------------------------------------------------------------
@@ -117,11 +230,9 @@ def _select_top_risky_files(stats: Dict[str, Any], n: int = 5) -> List[Tuple[str
 
 def _build_markdown_report(
     summary: RiskSummary,
-    stats: Dict[str, Any],
+    top_files: List[Tuple[str, int, str]],
     run_id: str,
 ) -> str:
-    top_files = _select_top_risky_files(stats, n=5)
-
     lines: List[str] = []
     lines.append(f"# MetaHunter - Reporte de análisis avanzado")
     lines.append("")
@@ -190,9 +301,10 @@ def _build_markdown_report(
 
 def _call_openai_if_available(
     summary: RiskSummary,
-    stats: Dict[str, Any],
+    stats: Dict[str, Any] | None = None,
     run_id: str | None = None,
     log_path: Path | None = None,
+    logger: JsonlLogger | None = None,
 ) -> str | None:
     """
     Intenta generar un comentario extra usando OpenAI si:
@@ -203,6 +315,12 @@ def _call_openai_if_available(
     """
 
     def _log_local(level: str, event: str, details: Dict | None = None) -> None:
+        if logger is not None:
+            try:
+                logger.event("ai_client", level, event, details or {})
+            except Exception:
+                pass
+            return
         if log_path is None or run_id is None:
             return
         try:
@@ -325,17 +443,7 @@ def _log_event(
     event: str,
     details: Dict | None = None,
 ) -> None:
-    record = {
-        "timestamp": _now_iso(),
-        "run_id": run_id,
-        "module": module,
-        "level": level,
-        "event": event,
-        "details": details or {},
-    }
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    with log_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    append_event(log_path, run_id, module, level, event, details)
 
 
 # ---------------------------------------------------------------------------
@@ -348,15 +456,19 @@ def run_ai_pipeline(
     report_path: Path,
     run_id: str,
     log_path: Path,
+    logger: JsonlLogger | None = None,
 ) -> None:
     """
     Pipeline de IA de alto nivel:
 
-    1) Lee el JSON de estadísticas (stats_path).
+    1) Recorre en streaming las estadísticas (stats_path, JSON o JSONL).
     2) Calcula un resumen (RiskSummary) y lo guarda en summary_path.
     3) Construye un reporte Markdown base (sin LLM) en report_path.
     4) Si hay OPENAI_API_KEY y la librería está instalada, añade
        una sección extra con observaciones generadas por IA.
+
+    Si se pasa `logger` (el JsonlLogger de la ejecución del CLI) los eventos
+    van a su buffer; si no, se abre uno propio sobre log_path.
     """
 
     stats_path = stats_path.resolve()
@@ -364,9 +476,22 @@ def run_ai_pipeline(
     report_path = report_path.resolve()
     log_path = log_path.resolve()
 
-    _log_event(
-        log_path,
-        run_id,
+    if logger is None:
+        with JsonlLogger(log_path, run_id) as own_logger:
+            _run_ai_pipeline(stats_path, summary_path, report_path, run_id, own_logger)
+        return
+
+    _run_ai_pipeline(stats_path, summary_path, report_path, run_id, logger)
+
+
+def _run_ai_pipeline(
+    stats_path: Path,
+    summary_path: Path,
+    report_path: Path,
+    run_id: str,
+    log: JsonlLogger,
+) -> None:
+    log.event(
         "ai_client",
         "INFO",
         "ai_pipeline_started",
@@ -377,11 +502,8 @@ def run_ai_pipeline(
         },
     )
 
-    # 1) Cargar estadísticas
-    stats = _load_stats(stats_path)
-
-    # 2) Resumen
-    summary = _compute_risk_summary(stats)
+    # 1-2) Resumen + top de riesgo en una sola pasada en streaming
+    summary, top_files = _summarize_stats(_iter_stats(stats_path), top_n=5)
 
     summary_path.parent.mkdir(parents=True, exist_ok=True)
     summary_path.write_text(
@@ -389,9 +511,7 @@ def run_ai_pipeline(
         encoding="utf-8",
     )
 
-    _log_event(
-        log_path,
-        run_id,
+    log.event(
         "ai_client",
         "INFO",
         "ai_summary_saved",
@@ -399,10 +519,10 @@ def run_ai_pipeline(
     )
 
     # 3) Reporte Markdown base
-    base_report = _build_markdown_report(summary, stats, run_id)
+    base_report = _build_markdown_report(summary, top_files, run_id)
 
     # 4) Intentar añadir comentario de IA (si está disponible la API)
-    ai_comment = _call_openai_if_available(summary, stats, run_id=run_id, log_path=log_path)
+    ai_comment = _call_openai_if_available(summary, run_id=run_id, logger=log)
 
     report_text = base_report
     if ai_comment:
@@ -414,9 +534,7 @@ def run_ai_pipeline(
     report_path.parent.mkdir(parents=True, exist_ok=True)
     report_path.write_text(report_text, encoding="utf-8")
 
-    _log_event(
-        log_path,
-        run_id,
+    log.event(
         "ai_client",
         "INFO",
         "ai_report_saved",
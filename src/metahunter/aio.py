@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, Iterable, Iterator, Tuple
+
+from . import engine
+from . import sniffer
+from .cache import AnalysisCache
+from .engine import EngineOptions, FileResult
+
+# Modos de E/S de run_pipeline:
+# - sync: engine.process_files (un archivo por worker, E/S bloqueante)
+# - async: bucle asyncio con una capa de E/S en hilos que mantiene varios
+#   archivos en vuelo, pensado para carpetas de red (SMB/NFS) o discos
+#   lentos donde domina la latencia de stat/open/read por archivo.
+# - staged: etapas encadenadas por colas acotadas (ver metahunter.stages).
+IO_MODES = ("sync", "async", "staged")
+
+# Archivos en vuelo por defecto en modo async (hilos de E/S y tamaño de la
+# ventana de reordenación) y staged (tokens de entrada a la tubería).
+DEFAULT_MAX_INFLIGHT = 16
+
+
+def process_files_async(
+    jobs: Iterable[Tuple[Any, ...]],
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    workers: int = 1,
+    options: EngineOptions | None = None,
+    cache: AnalysisCache | None = None,
+    manifest: Dict[str, Dict[str, Any]] | None = None,
+) -> Iterator[FileResult]:
+    """
+    Misma interfaz y mismo orden de resultados que engine.process_files,
+    pero con como mucho `max_inflight` archivos en vuelo a la vez:
+
+    - el recorrido del directorio y la lectura de los primeros bytes de
+      cada archivo (stat/open/read) se hacen en un pool de hilos, así la
+      latencia de un archivo se solapa con la de los siguientes;
+    - el proceso de cada archivo (limpieza, hash, análisis) va a un pool de
+      procesos si `workers` > 1 y, si no, a los mismos hilos de E/S (la
+      lectura, escritura y hash sueltan el GIL).
+
+    Contrapresión: no se toma un archivo nuevo de `jobs` hasta que sale el
+    más antiguo de la ventana, de modo que los resultados pendientes de
+    reordenar nunca superan `max_inflight`.
+
+    La caché y el manifiesto incremental se consultan en este hilo (el del
+    bucle), igual que en modo síncrono.
+    """
+    if max_inflight < 1:
+        raise ValueError("max_inflight debe ser al menos 1.")
+
+    loop = asyncio.new_event_loop()
+    io_pool = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="metahunter-io")
+    runner = _AsyncEngine(io_pool, max_inflight, workers, options, cache, manifest)
+    results = runner.results(iter(jobs))
+
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(results.aclose())
+        runner.close()
+        io_pool.shutdown(wait=True, cancel_futures=True)
+        loop.close()
+
+
+class _AsyncEngine:
+    """Ventana ordenada de tareas asyncio sobre los pools de E/S y de CPU."""
+
+    def __init__(
+        self,
+        io_pool: ThreadPoolExecutor,
+        max_inflight: int,
+        workers: int,
+        options: EngineOptions | None,
+        cache: AnalysisCache | None,
+        manifest: Dict[str, Dict[str, Any]] | None,
+    ) -> None:
+        self.io_pool = io_pool
+        self.max_inflight = max_inflight
+        self.workers = workers
+        self.options = options
+        self.cache = cache
+        self.manifest = manifest
+        self.cpu_pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    async def results(self, jobs: Iterator[Tuple[Any, ...]]):
+        loop = asyncio.get_running_loop()
+        window: Deque[Tuple[engine._Job, asyncio.Task]] = deque()
+        try:
+            while True:
+                # El walker (scandir) también es E/S: se avanza en un hilo
+                raw_job = await loop.run_in_executor(self.io_pool, next, jobs, None)
+                if raw_job is None:
+                    break
+                job = engine._prepare_job(raw_job, self.cache, self.manifest)
+                window.append((job, loop.create_task(self._process(job))))
+                if len(window) >= self.max_inflight:
+                    yield await self._next_result(window)
+
+            while window:
+                yield await self._next_result(window)
+        finally:
+            for _, task in window:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in window), return_exceptions=True)
+
+    async def _next_result(self, window: Deque[Tuple[engine._Job, asyncio.Task]]) -> FileResult:
+        job, task = window.popleft()
+        return engine._store_result(await task, job, self.cache)
+
+    async def _process(self, job: engine._Job) -> FileResult:
+        loop = asyncio.get_running_loop()
+        try:
+            started = time.perf_counter()
+            try:
+                head = await loop.run_in_executor(self.io_pool, sniffer.read_head, job.path)
+            except OSError:
+                head = None
+            sniff_ms = (time.perf_counter() - started) * 1000
+
+            call = functools.partial(engine.process_file, *job.args(self.options), head=head)
+            if self.cpu_pool is None:
+                result = await loop.run_in_executor(self.io_pool, call)
+            else:
+                result = await self._run_in_cpu_pool(job, call)
+        except Exception as e:  # noqa: BLE001
+            return FileResult(
+                path=str(job.path),
+                output=str(job.output_path),
+                error=str(e),
+                error_stage="worker",
+            )
+
+        if head is not None and result.stages_ms is not None:
+            result.stages_ms = {**result.stages_ms, "sniff": round(sniff_ms, 3)}
+        return result
+
+    async def _run_in_cpu_pool(self, job: engine._Job, call: functools.partial) -> FileResult:
+        loop = asyncio.get_running_loop()
+        pool = self.cpu_pool
+        try:
+            return await loop.run_in_executor(pool, call)
+        except BrokenProcessPool:
+            # Un worker murió y no se sabe por qué archivo: como en el modo
+            # síncrono, se cambia de pool y cada archivo afectado se reintenta
+            # aislado en un proceso propio.
+            if self.cpu_pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.cpu_pool = ProcessPoolExecutor(max_workers=self.workers)
+            return await loop.run_in_executor(self.io_pool, engine._run_isolated, job, self.options)
+
+    def close(self) -> None:
+        if self.cpu_pool is not None:
+            self.cpu_pool.shutdown(wait=True, cancel_futures=True)
@@ -2,12 +2,27 @@ from __future__ import annotations
 
 import hashlib
 import json
-import mimetypes
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Any, Dict, Iterable
+from typing import Any, Dict, Iterable, Iterator, Tuple
 
-from .advanced import analyze_file_advanced
+from .advanced import analyze_file_advanced, get_signature_matcher
+from .cache import AnalysisCache, file_signature
+from .extractors import extract_metadata
+from .sniffer import OCTET_STREAM, SNIFF_SIZE, declared_mime, is_mismatch, read_head, sniff_mime
+from .timing import StageTimer
+
+# Versión del análisis: incrementar cuando cambie lo que produce
+# analyze_file para invalidar las entradas de la caché persistente.
+ANALYSIS_VERSION = 4
+
+
+def analysis_version() -> str:
+    """
+    Versión efectiva para la caché: la del código más la del archivo de
+    firmas IA, para que actualizar las firmas invalide los resultados.
+    """
+    return f"{ANALYSIS_VERSION}+sig:{get_signature_matcher().version}"
 
 
 @dataclass
@@ -18,6 +33,9 @@ class FileAnalysis:
     mime_type: str
     size_bytes: int
     sha256: str
+    declared_mime_type: str
+    detected_mime_type: str
+    mime_mismatch: bool
     # Se pueden agregar más campos luego (autor, compañía, etc.)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -25,16 +43,23 @@ class FileAnalysis:
 
 
 def _hash_file(path: Path) -> str:
+    return _hash_and_head(path)[0]
+
+
+def _hash_and_head(path: Path) -> Tuple[str, bytes]:
+    """SHA-256 del archivo y sus primeros bytes (para el sniffer) en una sola lectura."""
     hasher = hashlib.sha256()
     with path.open("rb") as f:
+        head = f.read(max(SNIFF_SIZE, 8192))
+        hasher.update(head)
         for chunk in iter(lambda: f.read(8192), b""):
             hasher.update(chunk)
-    return hasher.hexdigest()
+    return hasher.hexdigest(), head[:SNIFF_SIZE]
 
 
-def _guess_mime_type(path: Path) -> str:
-    mime, _ = mimetypes.guess_type(str(path))
-    return mime or "application/octet-stream"
+def _guess_mime_type(path: Path, head: bytes) -> Tuple[str, str]:
+    """(tipo declarado por la extensión, tipo detectado por los bytes mágicos)."""
+    return declared_mime(path.suffix.lower()), sniff_mime(head)
 
 
 def _enrich_metadata_heuristic(base: Dict[str, Any]) -> Dict[str, Any]:
@@ -66,7 +91,81 @@ def _enrich_metadata_heuristic(base: Dict[str, Any]) -> Dict[str, Any]:
 
 
 
-def analyze_files(files: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
+def analyze_file(
+    path: Path,
+    sha256: str | None = None,
+    size_bytes: int | None = None,
+    head: bytes | None = None,
+    timer: StageTimer | None = None,
+) -> Dict[str, Any]:
+    """
+    Analiza un único archivo y devuelve su entrada de estadísticas:
+      { ...info técnica..., "advanced": { ...riesgo, forense, IA... } }
+
+    Si ya se conoce el SHA-256 del archivo (p. ej. calculado por el cleaner
+    durante la limpieza) se reutiliza en lugar de volver a leerlo; lo mismo
+    con el tamaño si ya viene del `stat` del walker, y con los primeros
+    bytes (`head`) que usa el sniffer de tipo MIME.
+
+    `mime_type` es el declarado por la extensión si el contenido es
+    compatible con él (más específico: DOCX frente a ZIP) y el detectado
+    por contenido si no lo es; ambos quedan en las stats junto con
+    `mime_mismatch`.
+
+    Si llega un `timer`, acumula en él el tiempo de las etapas hash,
+    sniff, extract y advanced.
+    """
+    timer = timer or StageTimer()
+    if size_bytes is None:
+        size_bytes = path.stat().st_size
+    if sha256 is None:
+        with timer.stage("hash"):
+            sha256, head = _hash_and_head(path)
+    elif head is None:
+        with timer.stage("sniff"):
+            head = read_head(path)
+    declared, detected = _guess_mime_type(path, head)
+    mismatch = is_mismatch(declared, detected)
+    if mismatch or declared == OCTET_STREAM:
+        mime_type = detected
+    else:
+        mime_type = declared
+
+    base = FileAnalysis(
+        path=str(path),
+        name=path.name,
+        extension=path.suffix.lower(),
+        mime_type=mime_type,
+        size_bytes=size_bytes,
+        sha256=sha256,
+        declared_mime_type=declared,
+        detected_mime_type=detected,
+        mime_mismatch=mismatch,
+    ).to_dict()
+
+    # Metadatos embebidos reales (PDF, OOXML, EXIF...), solo cabeceras
+    with timer.stage("extract"):
+        extracted = extract_metadata(path, head=head)
+    for key, value in extracted.items():
+        base.setdefault(key, value)
+
+    # Enriquecer metadatos según el nombre del archivo (heurística para demo)
+    base = _enrich_metadata_heuristic(base)
+
+    # Análisis avanzado (riesgo, forense, IA)
+    with timer.stage("advanced"):
+        advanced = analyze_file_advanced(base)
+
+    return {
+        **base,
+        "advanced": advanced.to_dict(),
+    }
+
+
+def analyze_files(
+    files: Iterable[Path],
+    cache: AnalysisCache | None = None,
+) -> Dict[str, Dict[str, Any]]:
     """
     Analiza una colección de archivos (típicamente los RAW, antes de limpiar) y devuelve:
       {
@@ -76,6 +175,9 @@ def analyze_files(files: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
         },
         ...
       }
+
+    Si se pasa una `cache`, los archivos cuya firma (tamaño, mtime, inodo)
+    no cambió reutilizan el análisis guardado sin volver a leerse.
     """
     results: Dict[str, Dict[str, Any]] = {}
 
@@ -83,29 +185,16 @@ def analyze_files(files: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
         if not path.is_file():
             continue
 
-        size_bytes = path.stat().st_size
-        sha256 = _hash_file(path)
-        mime_type = _guess_mime_type(path)
-
-        base = FileAnalysis(
-            path=str(path),
-            name=path.name,
-            extension=path.suffix.lower(),
-            mime_type=mime_type,
-            size_bytes=size_bytes,
-            sha256=sha256,
-        ).to_dict()
-
-        # Enriquecer metadatos según el nombre del archivo (heurística para demo)
-        base = _enrich_metadata_heuristic(base)
-
-        # Análisis avanzado (riesgo, forense, IA)
-        advanced = analyze_file_advanced(base)
+        if cache is None:
+            results[str(path)] = analyze_file(path)
+            continue
 
-        results[str(path)] = {
-            **base,
-            "advanced": advanced.to_dict(),
-        }
+        signature = file_signature(path.stat())
+        entry = cache.get(path, signature)
+        if entry is None:
+            entry = analyze_file(path)
+            cache.put(path, signature, entry)
+        results[str(path)] = entry
 
     return results
 
@@ -119,3 +208,80 @@ def save_stats(stats: Dict[str, Dict[str, Any]], output_path: Path) -> None:
         json.dumps(stats, ensure_ascii=False, indent=2),
         encoding="utf-8",
     )
+
+
+# ---------------------------------------------------------------------------
+# Escritura de stats en streaming (JSON Lines)
+# ---------------------------------------------------------------------------
+
+STATS_FORMATS = ("json", "jsonl")
+
+
+class StatsWriter:
+    """
+    Sumidero de estadísticas en streaming: cada archivo se escribe como una
+    línea JSON (su entrada completa, que ya incluye "path") en cuanto se
+    produce, sin acumular el dict de todo el lote en memoria.
+
+    Con fmt="json" las líneas van a un archivo temporal que, al cerrar, se
+    compacta en el JSON con forma de dict de siempre ({"ruta": {...}}).
+    """
+
+    def __init__(self, output_path: Path, fmt: str = "json") -> None:
+        if fmt not in STATS_FORMATS:
+            raise ValueError(f"Formato de stats desconocido: {fmt!r}")
+
+        self.output_path = output_path
+        self.fmt = fmt
+        self.count = 0
+
+        if fmt == "jsonl":
+            self.jsonl_path = output_path
+        else:
+            self.jsonl_path = output_path.with_name(output_path.name + ".partial.jsonl")
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.jsonl_path.open("w", encoding="utf-8")
+
+    def __enter__(self) -> "StatsWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc: Any) -> None:
+        self.close(compact=exc_type is None)
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self, compact: bool = True) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+
+        if self.fmt == "json" and compact:
+            compact_stats_jsonl(self.jsonl_path, self.output_path)
+            self.jsonl_path.unlink()
+
+
+def iter_stats_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def compact_stats_jsonl(jsonl_path: Path, output_path: Path) -> None:
+    """
+    Convierte stats JSONL al JSON con forma de dict que escribe save_stats,
+    byte a byte igual, pero leyendo y escribiendo una entrada cada vez.
+    """
+    with output_path.open("w", encoding="utf-8") as out:
+        first = True
+        for entry in iter_stats_jsonl(jsonl_path):
+            key = json.dumps(str(entry.get("path", "")), ensure_ascii=False)
+            value = json.dumps(entry, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            out.write(("{\n  " if first else ",\n  ") + f"{key}: {value}")
+            first = False
+        out.write("{}" if first else "\n}")
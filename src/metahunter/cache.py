@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Firma de un archivo en disco: (tamaño, mtime_ns, inodo)
+Signature = Tuple[int, int, int]
+
+# Entradas máximas por defecto antes de aplicar la expulsión LRU.
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# Escrituras acumuladas antes de hacer commit en SQLite.
+_COMMIT_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    path      TEXT PRIMARY KEY,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    inode     INTEGER NOT NULL,
+    version   TEXT NOT NULL,
+    sha256    TEXT NOT NULL,
+    stats     TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_last_used ON analysis(last_used);
+"""
+
+
+def file_signature(st: os.stat_result) -> Signature:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class AnalysisCache:
+    """
+    Caché persistente (SQLite) de resultados de analyzer.analyze_file.
+
+    Una entrada solo es válida si la firma (tamaño, mtime, inodo) del archivo
+    y la versión del análisis coinciden con las guardadas; en ese caso se
+    evita volver a leer/hashear el archivo y el análisis avanzado.
+    Cuando se superan `max_entries` se expulsan las menos usadas (LRU).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        version: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        rebuild: bool = False,
+    ) -> None:
+        self.db_path = db_path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if rebuild:
+            self._conn.execute("DELETE FROM analysis")
+        self._conn.commit()
+
+        # Marca temporal de esta ejecución para el LRU; los accesos se
+        # acumulan y se escriben juntos en lugar de un UPDATE por acierto.
+        self._now = time.time_ns()
+        self._touched: List[str] = []
+        self._pending_writes = 0
+
+    # ------------------------------------------------------------------
+    # Context manager
+    # ------------------------------------------------------------------
+
+    def __enter__(self) -> "AnalysisCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get(self, path: Path, signature: Signature) -> Dict[str, Any] | None:
+        key = str(path)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, version, stats FROM analysis WHERE path = ?",
+            (key,),
+        ).fetchone()
+
+        if row is None or tuple(row[:3]) != signature or row[3] != self.version:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touched.append(key)
+        return json.loads(row[4])
+
+    def put(self, path: Path, signature: Signature, stats: Dict[str, Any]) -> None:
+        size, mtime_ns, inode = signature
+        self._conn.execute(
+            "INSERT OR REPLACE INTO analysis "
+            "(path, size, mtime_ns, inode, version, sha256, stats, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(path),
+                size,
+                mtime_ns,
+                inode,
+                self.version,
+                str(stats.get("sha256", "")),
+                json.dumps(stats, ensure_ascii=False),
+                self._now,
+            ),
+        )
+        self._pending_writes += 1
+        if self._pending_writes >= _COMMIT_EVERY:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._flush_touched()
+        self._evict()
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None  # type: ignore[assignment]
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _flush_touched(self) -> None:
+        self._conn.executemany(
+            "UPDATE analysis SET last_used = ? WHERE path = ?",
+            ((self._now, key) for key in self._touched),
+        )
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM analysis WHERE path IN "
+            "(SELECT path FROM analysis ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+
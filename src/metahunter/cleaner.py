@@ -1,28 +1,357 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from io import BytesIO
 from pathlib import Path
+from typing import Any, Dict, Iterator
+
 from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.errors import PyPdfError
+
+from .hashio import CHUNK_SIZE, HashingReader, HashingWriter, SeekableHashingReader
+from .imageclean import IMAGE_FORMATS, ImageFormatUnsupported, strip_image_metadata
+from .ooxml import is_ooxml, strip_doc_props
+from .pdfclean import PAGE_METADATA_KEYS, PDF_MODES, FastRewriteUnsupported, rewrite_pdf_fast
+from .sniffer import read_head, sniff_format
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+# Versión de la limpieza: incrementar cuando cambie el archivo limpio que
+# se genera para un mismo RAW (invalida el manifiesto incremental).
+CLEANER_VERSION = 4
+
+# Estrategias de copia para archivos que no se limpian (pass-through):
+# - auto: reflink si el FS lo soporta, si no copy_file_range/sendfile
+#   (copia en kernel) y como último recurso copia en streaming.
+# - stream: copia por bloques en espacio de usuario.
+# - hardlink: enlace duro al RAW (opt-in: el limpio comparte inodo con el RAW).
+COPY_STRATEGIES = ("auto", "stream", "hardlink")
+
+# ioctl FICLONE de Linux (btrfs, XFS con reflink=1, ...)
+_FICLONE = 0x40049409
+
+# Bloque para copy_file_range/sendfile: el hash se calcula con pread justo
+# después de copiar cada bloque, cuando aún está en la caché de páginas.
+_KERNEL_CHUNK = 8 * CHUNK_SIZE
 
-def clean_file(input_path: Path, output_path: Path):
+
+@dataclass
+class CleanResult:
+    """
+    Resultado de limpiar un archivo en una sola pasada:
+    - hash y bytes leídos del archivo RAW
+    - hash y bytes escritos del archivo limpio
+    """
+    raw_sha256: str
+    clean_sha256: str
+    bytes_read: int
+    bytes_written: int
+    strategy: str = "pdf"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def clean_file(
+    input_path: Path,
+    output_path: Path,
+    copy_strategy: str = "auto",
+    known_sha256: str | None = None,
+    pdf_mode: str = "fast",
+    head: bytes | None = None,
+) -> CleanResult:
     """
     Limpia metadatos básicos del archivo PDF y lo guarda en output_path.
     Compatible con PyPDF2 moderno.
+
+    `pdf_mode` (ver PDF_MODES): "fast" copia los objetos sin metadatos tal
+    cual y solo reescribe los modificados; "full" reconstruye el documento
+    desde sus páginas (elimina también revisiones incrementales antiguas).
+    Si el modo rápido no es aplicable se usa el completo.
+
+    El tratamiento se elige por el contenido (bytes mágicos de `head`, o
+    leídos aquí si no se pasan), no por la extensión.
+
+    El RAW se hashea al vuelo con las mismas lecturas de la limpieza, sin
+    una pasada aparte, y el archivo limpio se hashea mientras se escribe,
+    sin releerlo. Cada byte se lee una sola vez salvo en el modo PDF
+    "fast", que lee el RAW con acceso aleatorio y relee objetos (ver
+    rewrite_pdf_fast); `bytes_read` cuenta la E/S real.
+
+    Los documentos Office (DOCX/XLSX/PPTX...) se limpian reescribiendo solo
+    sus docProps; el resto de miembros se copia comprimido tal cual. Las
+    imágenes JPEG/PNG/TIFF/WebP pierden EXIF/XMP/IPTC sin recodificarse.
+
+    Los archivos que no se limpian se copian con `copy_strategy` (ver
+    COPY_STRATEGIES) sin cargarlos en memoria; si ya se conoce su hash
+    (`known_sha256`) ni siquiera se leen en espacio de usuario.
     """
-    ext = input_path.suffix.lower()
+    if head is None:
+        head = read_head(input_path)
+    fmt = sniff_format(head)
+
+    if fmt == "zip" and is_ooxml(input_path):
+        return _clean_ooxml(input_path, output_path)
+
+    if fmt in IMAGE_FORMATS:
+        try:
+            return _clean_image(input_path, output_path, fmt)
+        except ImageFormatUnsupported:
+            return _copy_passthrough(input_path, output_path, copy_strategy, known_sha256)
 
-    if ext != ".pdf":
+    if fmt != "pdf":
         # Si no es PDF, solo copiar el archivo tal cual
-        output_path.write_bytes(input_path.read_bytes())
-        return
+        return _copy_passthrough(input_path, output_path, copy_strategy, known_sha256)
+
+    if pdf_mode not in PDF_MODES:
+        raise ValueError(f"Modo de limpieza PDF desconocido: {pdf_mode!r}")
+
+    try:
+        return _clean_pdf_file(input_path, output_path, known_sha256, pdf_mode)
+    except (PyPdfError, ValueError):
+        if input_path.suffix.lower() == ".pdf":
+            raise
+        # Parecía un PDF por su cabecera pero no lo es y tampoco se declara
+        # como tal: se copia sin tocar en lugar de perderlo.
+        return _copy_passthrough(input_path, output_path, copy_strategy, known_sha256)
+
+
+def _clean_pdf_file(
+    input_path: Path,
+    output_path: Path,
+    known_sha256: str | None,
+    pdf_mode: str,
+) -> CleanResult:
+    """Limpieza PDF según `pdf_mode`; si el modo rápido no es aplicable, completa."""
+    if pdf_mode == "fast":
+        try:
+            return _clean_pdf_fast(input_path, output_path, known_sha256)
+        except (FastRewriteUnsupported, PyPdfError):
+            pass
+
+    with _replacing(output_path) as tmp_path:
+        with input_path.open("rb") as src, tmp_path.open("wb") as dst:
+            reader = HashingReader(src)
+            writer = HashingWriter(dst)
+
+            # PdfReader necesita acceso aleatorio: se carga en memoria (igual
+            # que hace PyPDF2 cuando recibe una ruta) leyendo el disco una vez.
+            _clean_pdf(BytesIO(reader.read()), writer)
+
+    return CleanResult(
+        raw_sha256=reader.hexdigest(),
+        clean_sha256=writer.hexdigest(),
+        bytes_read=reader.bytes_read,
+        bytes_written=writer.bytes_written,
+        strategy="pdf-full",
+    )
+
+
+def _clean_pdf_fast(
+    input_path: Path,
+    output_path: Path,
+    known_sha256: str | None,
+) -> CleanResult:
+    with _replacing(output_path) as tmp_path:
+        # El RAW se lee con acceso aleatorio; su hash se calcula con esas
+        # mismas lecturas (ver rewrite_pdf_fast) si no se conoce ya.
+        with SeekableHashingReader(input_path, hash_data=known_sha256 is None) as reader, \
+                tmp_path.open("wb") as dst:
+            writer = HashingWriter(dst)
+            rewrite_pdf_fast(reader, writer)
+            reader.drain()
+
+    return CleanResult(
+        raw_sha256=known_sha256 or reader.hexdigest(),
+        clean_sha256=writer.hexdigest(),
+        bytes_read=reader.bytes_read,
+        bytes_written=writer.bytes_written,
+        strategy="pdf-fast",
+    )
+
+
+def _clean_ooxml(input_path: Path, output_path: Path) -> CleanResult:
+    with _replacing(output_path) as tmp_path:
+        with tmp_path.open("wb") as dst:
+            writer = HashingWriter(dst)
+            raw_sha256, bytes_read, mode = strip_doc_props(input_path, writer)
+
+    return CleanResult(
+        raw_sha256=raw_sha256,
+        clean_sha256=writer.hexdigest(),
+        bytes_read=bytes_read,
+        bytes_written=writer.bytes_written,
+        strategy=mode,
+    )
+
+
+def _clean_image(input_path: Path, output_path: Path, fmt: str) -> CleanResult:
+    with _replacing(output_path) as tmp_path:
+        with tmp_path.open("wb") as dst:
+            writer = HashingWriter(dst)
+            raw_sha256, bytes_read = strip_image_metadata(fmt, input_path, writer)
+
+    return CleanResult(
+        raw_sha256=raw_sha256,
+        clean_sha256=writer.hexdigest(),
+        bytes_read=bytes_read,
+        bytes_written=writer.bytes_written,
+        strategy=f"image-{fmt}",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Copia pass-through (memoria constante, sin importar el tamaño)
+# ---------------------------------------------------------------------------
+
+def _copy_passthrough(
+    input_path: Path,
+    output_path: Path,
+    strategy: str,
+    known_sha256: str | None,
+) -> CleanResult:
+    if strategy not in COPY_STRATEGIES:
+        raise ValueError(f"Estrategia de copia desconocida: {strategy!r}")
+
+    if strategy == "hardlink":
+        with _replacing(output_path) as tmp_path:
+            os.link(input_path, tmp_path)
+        sha256 = known_sha256 or _hash_path(input_path)
+        size = output_path.stat().st_size
+        return CleanResult(sha256, sha256, 0 if known_sha256 else size, 0, "hardlink")
+
+    with _replacing(output_path) as tmp_path:
+        with input_path.open("rb") as src, tmp_path.open("wb") as dst:
+            if strategy == "auto":
+                used = _try_reflink(src, dst)
+                if used:
+                    sha256 = known_sha256 or _hash_fd(src.fileno())
+                    size = os.fstat(dst.fileno()).st_size
+                    return CleanResult(sha256, sha256, 0 if known_sha256 else size, 0, "reflink")
+
+                for name, copy_chunk in (
+                    ("copy_file_range", _copy_file_range_chunk),
+                    ("sendfile", _sendfile_chunk),
+                ):
+                    copied = _kernel_copy(src, dst, copy_chunk, hash_data=known_sha256 is None)
+                    if copied is not None:
+                        hasher, size = copied
+                        sha256 = known_sha256 or hasher.hexdigest()
+                        return CleanResult(sha256, sha256, 0 if known_sha256 else size, size, name)
+
+            reader = HashingReader(src)
+            writer = HashingWriter(dst)
+            for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+                writer.write(chunk)
+
+    return CleanResult(
+        raw_sha256=reader.hexdigest(),
+        clean_sha256=writer.hexdigest(),
+        bytes_read=reader.bytes_read,
+        bytes_written=writer.bytes_written,
+        strategy="stream",
+    )
+
+
+@contextmanager
+def _replacing(output_path: Path) -> Iterator[Path]:
+    """
+    Temporal junto a `output_path` que se mueve encima con os.replace al
+    salir sin errores (y se borra si hay error). El destino existente nunca
+    se abre para escribir: si es un enlace duro al RAW (--copy-strategy
+    hardlink en una ejecución anterior), truncarlo destruiría el original.
+    """
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _try_reflink(src, dst) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        return False
+    return True
+
+
+def _copy_file_range_chunk(src_fd: int, dst_fd: int, offset: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, _KERNEL_CHUNK, offset, offset)
+
+
+def _sendfile_chunk(src_fd: int, dst_fd: int, offset: int) -> int:
+    return os.sendfile(dst_fd, src_fd, offset, _KERNEL_CHUNK)
+
+
+def _kernel_copy(src, dst, copy_chunk, hash_data: bool):
+    """
+    Copia src → dst dentro del kernel. Devuelve (hasher, bytes) o None si
+    la llamada no está disponible para este par de archivos (antes de
+    haber copiado nada), para probar la siguiente estrategia.
+    """
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    hasher = hashlib.sha256()
+    offset = 0
+
+    while True:
+        try:
+            n = copy_chunk(src_fd, dst_fd, offset)
+        except (AttributeError, OSError):
+            if offset == 0:
+                return None
+            raise
+        if n == 0:
+            break
+        if hash_data:
+            hasher.update(os.pread(src_fd, n, offset))
+        offset += n
+
+    if offset == 0 and os.fstat(src_fd).st_size > 0:
+        # Algunos FS virtuales (procfs, ...) reportan 0 bytes copiados
+        return None
+
+    return hasher, offset
+
+
+def _hash_fd(fd: int) -> str:
+    hasher = hashlib.sha256()
+    offset = 0
+    for chunk in iter(lambda: os.pread(fd, CHUNK_SIZE, offset), b""):
+        hasher.update(chunk)
+        offset += len(chunk)
+    return hasher.hexdigest()
+
+
+def _hash_path(path: Path) -> str:
+    with path.open("rb") as f:
+        reader = HashingReader(f)
+        reader.drain()
+    return reader.hexdigest()
+
 
-    reader = PdfReader(str(input_path))
+def _clean_pdf(data: BytesIO, out) -> None:
+    reader = PdfReader(data)
     writer = PdfWriter()
 
-    # Copiar páginas
+    # Copiar páginas, sin XMP ni /PieceInfo por página
     for page in reader.pages:
-        writer.add_page(page)
+        writer.add_page(page, excluded_keys=PAGE_METADATA_KEYS)
 
     # Limpiar metadatos con la forma actual correcta
     writer.add_metadata({})
 
     # Guardar PDF limpio
-    with open(output_path, "wb") as f:
-        writer.write(f)
+    writer.write(out)
@@ -1,44 +1,31 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Set
 
 from . import cleaner
 from . import analyzer
 from . import ai_client  # Asegúrate de que exista este módulo
-from .integrity import build_integrity_report
-
-
-# ---------------------------------------------------------------------------
-# Utilidad para logging JSONL
-# ---------------------------------------------------------------------------
-
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-
-
-def log_event(
-    log_path: Path,
-    run_id: str,
-    module: str,
-    level: str,
-    event: str,
-    details: Dict | None = None,
-) -> None:
-    record = {
-        "timestamp": _now_iso(),
-        "run_id": run_id,
-        "module": module,
-        "level": level,
-        "event": event,
-        "details": details or {},
-    }
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    with log_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+from . import advanced
+from . import aio
+from . import engine
+from . import incremental
+from . import integrity
+from . import manifest
+from . import merkle_store
+from . import stages
+from . import verify
+from .cache import AnalysisCache, DEFAULT_MAX_ENTRIES
+from .jsonlog import COMPRESSIONS, FSYNC_POLICIES, JsonlLogger
+from .walker import SYMLINK_POLICIES, iter_input_files
+from .timing import StageTimer, elapsed_ms, peak_rss_kb
+from .integrity import DEFAULT_MERKLE_VERSION, MERKLE_VERSIONS, build_integrity_report
 
 
 # ---------------------------------------------------------------------------
@@ -69,6 +56,34 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Ruta al archivo JSONL de logs (por ejemplo: examples/logs.jsonl).",
     )
+    parser.add_argument(
+        "--log-flush-interval",
+        type=float,
+        default=1.0,
+        help="Segundos máximos que un evento espera en el buffer antes de escribirse (por defecto: 1.0).",
+    )
+    parser.add_argument(
+        "--log-flush-size",
+        type=int,
+        default=256,
+        help="Eventos acumulados que fuerzan la escritura del buffer (por defecto: 256).",
+    )
+    parser.add_argument(
+        "--log-fsync",
+        choices=FSYNC_POLICIES,
+        default="none",
+        help="Cuándo hacer fsync del log: none, flush (en cada escritura del buffer) o close.",
+    )
+    parser.add_argument(
+        "--log-rotate-bytes",
+        type=int,
+        help="Rotar el log al superar este tamaño en bytes.",
+    )
+    parser.add_argument(
+        "--log-compress",
+        choices=COMPRESSIONS,
+        help="Comprimir los logs rotados (gzip, o zstd si está instalado 'zstandard').",
+    )
     parser.add_argument(
         "--use-ai",
         action="store_true",
@@ -79,6 +94,12 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Ruta del JSON con estadísticas de los archivos RAW (por defecto: examples/stats_<run_id>.json).",
     )
+    parser.add_argument(
+        "--stats-format",
+        choices=analyzer.STATS_FORMATS,
+        default="json",
+        help="json: dict compacto compatible (por defecto); jsonl: una línea por archivo, escrita en streaming.",
+    )
     parser.add_argument(
         "--ai-summary-path",
         type=Path,
@@ -95,16 +116,171 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Ruta de un JSON donde se guardará el reporte de integridad (Merkle root) de los archivos LIMPIOS.",
     )
+    parser.add_argument(
+        "--integrity-manifest",
+        dest="integrity_manifest_path",
+        type=Path,
+        help="Ruta de un manifiesto canónico JSONL (ruta relativa, tamaño y SHA-256 de cada archivo "
+        "LIMPIO, ordenado por ruta); se compara con `metahunter diff`.",
+    )
+    parser.add_argument(
+        "--merkle-version",
+        type=int,
+        choices=MERKLE_VERSIONS,
+        default=DEFAULT_MERKLE_VERSION,
+        help="Formato del árbol Merkle del reporte de integridad: 1 (hex concatenado, original) "
+        f"o 2 (digests binarios con prefijos de dominio; por defecto: {DEFAULT_MERKLE_VERSION}).",
+    )
+    parser.add_argument(
+        "--integrity-proofs",
+        action="store_true",
+        help="Guardar en el reporte de integridad la prueba de inclusión de cada archivo "
+        "(requiere --merkle-version 2; se comprueban con `metahunter verify`).",
+    )
+    parser.add_argument(
+        "--merkle-store",
+        dest="merkle_store_path",
+        type=Path,
+        help="Almacén Merkle persistente de los archivos LIMPIOS (binario); cada ejecución "
+        f"solo recalcula las ramas de los archivos que cambian (p. ej. <output-dir>/{merkle_store.DEFAULT_STORE_NAME}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de procesos para analizar/limpiar/hashear en paralelo (por defecto: 1, secuencial).",
+    )
+    parser.add_argument(
+        "--io-mode",
+        choices=aio.IO_MODES,
+        default="sync",
+        help="sync: E/S bloqueante por archivo (por defecto); async: bucle asyncio con varios archivos "
+        "en vuelo (stat/open/lectura en hilos), para carpetas de red o discos lentos; staged: etapas "
+        "(descubrir, cabecera, limpiar, analizar) encadenadas por colas acotadas.",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=aio.DEFAULT_MAX_INFLIGHT,
+        help=f"Archivos en vuelo a la vez con --io-mode async o staged (por defecto: {aio.DEFAULT_MAX_INFLIGHT}).",
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=stages.DEFAULT_QUEUE_DEPTH,
+        help=f"Tamaño de cada cola entre etapas con --io-mode staged (por defecto: {stages.DEFAULT_QUEUE_DEPTH}).",
+    )
+    parser.add_argument(
+        "--copy-strategy",
+        choices=cleaner.COPY_STRATEGIES,
+        default="auto",
+        help="Cómo copiar archivos que no se limpian: auto (reflink/copy_file_range/sendfile), "
+        "stream o hardlink (el limpio comparte inodo con el RAW).",
+    )
+    parser.add_argument(
+        "--pdf-mode",
+        choices=cleaner.PDF_MODES,
+        default="fast",
+        help="Limpieza de PDF: fast (copia los objetos sin metadatos tal cual) o full "
+        "(reconstruye el documento; elimina también revisiones incrementales antiguas).",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        help="Ruta de la caché de análisis SQLite (por defecto: metahunter_cache.sqlite junto al stats).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="No consultar ni actualizar la caché de análisis.",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Vaciar la caché de análisis antes de ejecutar y volver a poblarla.",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"Entradas máximas en la caché antes de expulsar las menos usadas (por defecto: {DEFAULT_MAX_ENTRIES}).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Solo limpiar archivos cuyo SHA-256 cambió respecto a la ejecución anterior.",
+    )
+    parser.add_argument(
+        "--run-manifest",
+        dest="run_manifest_path",
+        type=Path,
+        help=f"Manifiesto RAW→limpio usado por --incremental (por defecto: {incremental.DEFAULT_MANIFEST_NAME} junto al stats). "
+        "Solo se escribe con --incremental o --run-manifest.",
+    )
+
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Recorrer subcarpetas de --input-dir y replicar su estructura en --output-dir.",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Solo procesar archivos cuya ruta relativa o nombre coincida con el glob (repetible).",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Omitir archivos/carpetas cuya ruta relativa o nombre coincida con el glob (repetible).",
+    )
+    parser.add_argument("--min-size", type=int, help="Tamaño mínimo en bytes.")
+    parser.add_argument("--max-size", type=int, help="Tamaño máximo en bytes.")
+    parser.add_argument(
+        "--newer-than",
+        type=_parse_mtime,
+        help="Solo archivos modificados a partir de esta fecha (ISO 8601, p. ej. 2025-11-20).",
+    )
+    parser.add_argument(
+        "--older-than",
+        type=_parse_mtime,
+        help="Solo archivos modificados hasta esta fecha (ISO 8601).",
+    )
+    parser.add_argument(
+        "--symlinks",
+        choices=SYMLINK_POLICIES,
+        default="files",
+        help="Enlaces simbólicos: files (solo a archivos), follow (también carpetas) o skip.",
+    )
+    parser.add_argument(
+        "--sorted",
+        dest="sort_input",
+        action="store_true",
+        help="Recorre cada carpeta en orden alfabético (determinista) en lugar del orden de os.scandir.",
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    if args.integrity_proofs and args.merkle_version != 2:
+        parser.error("--integrity-proofs requiere --merkle-version 2")
+    if args.max_inflight < 1:
+        parser.error("--max-inflight debe ser al menos 1")
+    if args.queue_depth < 1:
+        parser.error("--queue-depth debe ser al menos 1")
+    return args
 
 
-def _collect_input_files(input_dir: Path) -> List[Path]:
-    """
-    Devuelve lista de archivos dentro de input_dir (no recursivo).
-    Si quieres recursivo, cambia a rglob('*').
-    """
-    return [p for p in input_dir.iterdir() if p.is_file()]
+def _parse_mtime(value: str) -> int:
+    """Convierte una fecha ISO 8601 (hora local si no trae zona) a ns epoch."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Fecha inválida: {value!r}") from e
+    return int(dt.timestamp() * 1_000_000_000)
 
 
 def run_pipeline(
@@ -116,6 +292,37 @@ def run_pipeline(
     ai_summary_path: Path | None = None,
     ai_report_path: Path | None = None,
     integrity_report_path: Path | None = None,
+    integrity_manifest_path: Path | None = None,
+    merkle_version: int = DEFAULT_MERKLE_VERSION,
+    integrity_proofs: bool = False,
+    merkle_store_path: Path | None = None,
+    workers: int = 1,
+    io_mode: str = "sync",
+    max_inflight: int = aio.DEFAULT_MAX_INFLIGHT,
+    queue_depth: int = stages.DEFAULT_QUEUE_DEPTH,
+    copy_strategy: str = "auto",
+    pdf_mode: str = "fast",
+    cache_path: Path | None = None,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    cache_max_entries: int = DEFAULT_MAX_ENTRIES,
+    incremental_mode: bool = False,
+    run_manifest_path: Path | None = None,
+    recursive: bool = False,
+    include: List[str] | None = None,
+    exclude: List[str] | None = None,
+    min_size: int | None = None,
+    max_size: int | None = None,
+    newer_than_ns: int | None = None,
+    older_than_ns: int | None = None,
+    symlinks: str = "files",
+    sort_input: bool = False,
+    stats_format: str = "json",
+    log_flush_interval: float = 1.0,
+    log_flush_size: int = 256,
+    log_fsync: str = "none",
+    log_rotate_bytes: int | None = None,
+    log_compress: str | None = None,
 ) -> None:
     # Generar run_id tipo 20251120T225112Z
     run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -127,6 +334,13 @@ def run_pipeline(
         ai_summary_path = Path("examples") / f"ai_summary_{run_id}.json"
     if ai_report_path is None:
         ai_report_path = Path("reports") / f"ai_report_{run_id}.md"
+    if cache_path is None:
+        cache_path = stats_path.parent / "metahunter_cache.sqlite"
+    # El manifiesto incremental (rutas y hashes de los RAW) solo se escribe
+    # si se pide, y por defecto fuera de output_dir.
+    save_manifest = incremental_mode or run_manifest_path is not None
+    if run_manifest_path is None:
+        run_manifest_path = stats_path.parent / incremental.DEFAULT_MANIFEST_NAME
 
     input_dir = input_dir.resolve()
     output_dir = output_dir.resolve()
@@ -134,179 +348,457 @@ def run_pipeline(
     stats_path = stats_path.resolve()
     ai_summary_path = ai_summary_path.resolve()
     ai_report_path = ai_report_path.resolve()
+    cache_path = cache_path.resolve()
+    run_manifest_path = run_manifest_path.resolve()
     if integrity_report_path is not None:
         integrity_report_path = integrity_report_path.resolve()
+    if integrity_manifest_path is not None:
+        integrity_manifest_path = integrity_manifest_path.resolve()
+    if merkle_store_path is not None:
+        merkle_store_path = merkle_store_path.resolve()
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    log_event(
+    # Tiempos de la ejecución: etapas globales (run_timer) y suma de las
+    # etapas de cada archivo (file_timer), más bytes de E/S de la limpieza.
+    run_started_at = time.perf_counter()
+    run_timer = StageTimer()
+    file_timer = StageTimer()
+    bytes_read = bytes_written = 0
+
+    with JsonlLogger(
         log_path,
         run_id,
-        "cli",
-        "INFO",
-        "run_started",
-        {
-            "input_dir": str(input_dir),
-            "output_dir": str(output_dir),
-            "use_ai": use_ai,
-        },
-    )
-
-    raw_files = _collect_input_files(input_dir)
-    if not raw_files:
-        log_event(
-            log_path,
-            run_id,
+        flush_interval=log_flush_interval,
+        flush_size=log_flush_size,
+        fsync=log_fsync,
+        rotate_bytes=log_rotate_bytes,
+        compress=log_compress,
+    ) as log:
+        log.event(
             "cli",
-            "WARNING",
-            "no_input_files",
-            {"input_dir": str(input_dir)},
+            "INFO",
+            "run_started",
+            {
+                "input_dir": str(input_dir),
+                "output_dir": str(output_dir),
+                "use_ai": use_ai,
+                "workers": workers,
+                "io_mode": io_mode,
+                "max_inflight": max_inflight if io_mode != "sync" else None,
+                "queue_depth": queue_depth if io_mode == "staged" else None,
+                "copy_strategy": copy_strategy,
+                "pdf_mode": pdf_mode,
+                "incremental": incremental_mode,
+                "recursive": recursive,
+            },
         )
-        print(f"[MetaHunter] No se encontraron archivos en {input_dir}")
-        return
-
-    # -----------------------------------------------------------------------
-    # ANÁLISIS DE ARCHIVOS RAW (ANTES DE LIMPIAR)
-    # -----------------------------------------------------------------------
-    stats = analyzer.analyze_files(raw_files)
-    analyzer.save_stats(stats, stats_path)
-
-    log_event(
-        log_path,
-        run_id,
-        "analyzer",
-        "INFO",
-        "stats_saved",
-        {"output": str(stats_path), "files": len(stats)},
-    )
-    print(f"[analyzer] Stats de archivos RAW guardadas en {stats_path}")
-
-    # -----------------------------------------------------------------------
-    #    LIMPIEZA DE METADATOS → archivos limpios en output_dir
-    #    y cálculo de hashes de los archivos limpios para integridad/Merkle
-    # -----------------------------------------------------------------------
-    processed_hashes: Dict[str, str] = {}
-
-    for f in raw_files:
-        out_path = output_dir / f.name
 
+        # Un archivo de firmas IA configurado explícitamente y roto para la
+        # ejecución aquí, en lugar de fallar en cada archivo (o en cada worker).
         try:
-            cleaner.clean_file(f, out_path)
+            advanced.get_signature_matcher()
+        except ValueError as e:
+            log.event("advanced", "ERROR", "ai_signatures_error", {"error": str(e)})
+            raise
+
+        # Recorrido en streaming: el procesamiento empieza con el primer archivo
+        # encontrado, sin esperar a enumerar todo el árbol.
+        raw_files = iter_input_files(
+            input_dir,
+            recursive=recursive,
+            include=include or [],
+            exclude=exclude or [],
+            min_size=min_size,
+            max_size=max_size,
+            newer_than_ns=newer_than_ns,
+            older_than_ns=older_than_ns,
+            symlinks=symlinks,
+            skip_dirs=[output_dir],
+            sort=sort_input,
+        )
+        first = next(raw_files, None)
+        if first is None:
+            log.event(
+                "cli",
+                "WARNING",
+                "no_input_files",
+                {"input_dir": str(input_dir)},
+            )
+            print(f"[MetaHunter] No se encontraron archivos en {input_dir}")
+            return
+
+        # -----------------------------------------------------------------------
+        # ANÁLISIS DE ARCHIVOS RAW + LIMPIEZA DE METADATOS → output_dir
+        # y cálculo de hashes de los archivos limpios para integridad/Merkle.
+        # El motor devuelve los resultados en el orden del recorrido, tanto en
+        # modo secuencial como con --workers N.
+        # -----------------------------------------------------------------------
+        processed_hashes: Dict[str, str] = {}
+        processed_sizes: Dict[str, int] = {}
+        run_manifest: Dict[str, Dict] = {}
+        unchanged = 0
+
+        files_seen = 0
+        first_result_ms: float | None = None
+        # Rutas relativas que ve el recorrido: el almacén Merkle borra las que
+        # faltan sin hacer stat de cada ruta guardada. Con filtros el recorrido
+        # no cubre todo el directorio y no se borra nada.
+        filtered = bool(include or exclude) or any(
+            v is not None for v in (min_size, max_size, newer_than_ns, older_than_ns)
+        )
+        walked: Set[str] | None = set() if merkle_store_path is not None and not filtered else None
 
-            # Hash de archivo LIMPIO para el reporte de integridad
-            clean_sha = analyzer._hash_file(out_path)  # reutilizamos helper interno
-            processed_hashes[str(out_path)] = clean_sha
+        def _jobs():
+            for f in itertools.chain([first], raw_files):
+                if walked is not None:
+                    walked.add(f.rel_path)
+                yield (f.path, output_dir / f.rel_path, f.signature)
 
-            log_event(
-                log_path,
-                run_id,
-                "cleaner",
-                "INFO",
-                "file_cleaned",
-                {"input": str(f), "output": str(out_path)},
-            )
-            print(f"[cleaner] OK  {f} -> {out_path}")
-        except Exception as e:  # noqa: BLE001
-            log_event(
-                log_path,
-                run_id,
-                "cleaner",
-                "ERROR",
-                "file_clean_error",
-                {"input": str(f), "error": str(e)},
-            )
-            print(f"[cleaner] ERR {f}: {e}")
+        jobs = _jobs()
 
-    # -----------------------------------------------------------------------
-    # IA (opcional) - resumen + reporte Markdown, usando STATS de los RAW
-    # -----------------------------------------------------------------------
-    if use_ai:
-        try:
-            # Asegúrate de que ai_client tenga esta función o ajusta el nombre
-            ai_client.run_ai_pipeline(
-                stats_path=stats_path,
-                summary_path=ai_summary_path,
-                report_path=ai_report_path,
-                run_id=run_id,
-                log_path=log_path,
+        options = engine.EngineOptions(copy_strategy=copy_strategy, pdf_mode=pdf_mode)
+        previous_manifest = (
+            incremental.load_run_manifest(run_manifest_path, options.to_dict())
+            if incremental_mode
+            else None
+        )
+        cache = (
+            AnalysisCache(
+                cache_path,
+                version=analyzer.analysis_version(),
+                max_entries=cache_max_entries,
+                rebuild=rebuild_cache,
             )
+            if use_cache
+            else None
+        )
 
-            log_event(
-                log_path,
-                run_id,
-                "ai_client",
-                "INFO",
-                "ai_pipeline_finished",
-                {
-                    "stats_path": str(stats_path),
-                    "summary_path": str(ai_summary_path),
-                    "report_path": str(ai_report_path),
-                },
+        stats_writer = analyzer.StatsWriter(stats_path, fmt=stats_format)
+
+        if io_mode == "async":
+            results = aio.process_files_async(
+                jobs,
+                max_inflight=max_inflight,
+                workers=workers,
+                options=options,
+                cache=cache,
+                manifest=previous_manifest,
             )
-            print(f"[ai_client] Resumen IA en {ai_summary_path}")
-            print(f"[ai_client] Reporte IA en {ai_report_path}")
-        except Exception as e:  # noqa: BLE001
-            log_event(
-                log_path,
-                run_id,
-                "ai_client",
-                "ERROR",
-                "ai_pipeline_error",
-                {"error": str(e)},
+        elif io_mode == "staged":
+            results = stages.process_files_staged(
+                jobs,
+                max_inflight=max_inflight,
+                queue_depth=queue_depth,
+                workers=workers,
+                options=options,
+                cache=cache,
+                manifest=previous_manifest,
             )
-            print(f"[ai_client] ERROR ejecutando IA: {e}")
-
-    # -----------------------------------------------------------------------
-    # Reporte de integridad (Merkle root) de archivos LIMPIOS
-    # -----------------------------------------------------------------------
-    if integrity_report_path is not None and processed_hashes:
-        try:
-            integrity_report = build_integrity_report(processed_hashes)
-            integrity_report_path.parent.mkdir(parents=True, exist_ok=True)
-            integrity_report_path.write_text(
-                json.dumps(integrity_report.to_dict(), ensure_ascii=False, indent=2),
-                encoding="utf-8",
+        else:
+            results = engine.process_files(
+                jobs,
+                workers=workers,
+                options=options,
+                cache=cache,
+                manifest=previous_manifest,
             )
 
-            log_event(
-                log_path,
-                run_id,
-                "cli",
+        process_started = time.perf_counter()
+        try:
+            for result in results:
+                files_seen += 1
+                if first_result_ms is None:
+                    # Latencia hasta el primer archivo listo para los sumideros
+                    first_result_ms = elapsed_ms(run_started_at)
+                file_timer.merge(result.stages_ms)
+                bytes_read += result.bytes_read or 0
+                bytes_written += result.bytes_written or 0
+                if result.stats is not None:
+                    stats_writer.write(result.stats)
+
+                if result.error_stage == "analyze":
+                    log.event(
+                        "analyzer",
+                        "ERROR",
+                        "file_analysis_error",
+                        {"input": result.path, "error": result.error, "duration_ms": result.duration_ms},
+                    )
+                    print(f"[analyzer] ERR {result.path}: {result.error}")
+                elif result.error is not None:
+                    log.event(
+                        "cleaner",
+                        "ERROR",
+                        "file_clean_error",
+                        {
+                            "input": result.path,
+                            "error": result.error,
+                            "stage": result.error_stage,
+                            "duration_ms": result.duration_ms,
+                        },
+                    )
+                    print(f"[cleaner] ERR {result.path}: {result.error}")
+                else:
+                    processed_hashes[result.output] = result.clean_sha256
+                    processed_sizes[result.output] = result.clean_size
+                    if save_manifest:
+                        run_manifest[result.path] = {
+                            "raw_sha256": result.stats["sha256"],
+                            "output": result.output,
+                            "clean_sha256": result.clean_sha256,
+                            "clean_size": result.clean_size,
+                            "clean_mtime_ns": result.clean_mtime_ns,
+                            "clean_inode": result.clean_inode,
+                        }
+
+                    if result.unchanged:
+                        unchanged += 1
+                        log.event(
+                            "cleaner",
+                            "INFO",
+                            "file_unchanged",
+                            {
+                                "input": result.path,
+                                "output": result.output,
+                                "duration_ms": result.duration_ms,
+                                "stages_ms": result.stages_ms,
+                            },
+                        )
+                        print(f"[cleaner] =   {result.path} (sin cambios)")
+                        continue
+
+                    log.event(
+                        "cleaner",
+                        "INFO",
+                        "file_cleaned",
+                        {
+                            "input": result.path,
+                            "output": result.output,
+                            "strategy": result.strategy,
+                            "duration_ms": result.duration_ms,
+                            "stages_ms": result.stages_ms,
+                            "bytes_read": result.bytes_read,
+                            "bytes_written": result.bytes_written,
+                        },
+                    )
+                    print(f"[cleaner] OK  {result.path} -> {result.output}")
+        except BaseException:
+            stats_writer.close(compact=False)
+            raise
+        finally:
+            if cache is not None:
+                cache.close()
+        run_timer.add("process", (time.perf_counter() - process_started) * 1000)
+
+        with run_timer.stage("stats"):
+            stats_writer.close()
+
+        if cache is not None:
+            log.event(
+                "analyzer",
                 "INFO",
-                "integrity_report_generated",
-                {
-                    "output": str(integrity_report_path),
-                    "files": len(processed_hashes),
-                    "algorithm": integrity_report.algorithm,
-                },
+                "analysis_cache_used",
+                {"cache_path": str(cache_path), "hits": cache.hits, "misses": cache.misses},
             )
-            print(f"[integrity] Reporte de integridad: {integrity_report_path}")
-        except Exception as e:  # noqa: BLE001
-            log_event(
-                log_path,
-                run_id,
-                "cli",
-                "ERROR",
-                "integrity_report_error",
-                {"error": str(e)},
-            )
-            print(f"[integrity] ERROR generando reporte de integridad: {e}")
 
-    # -----------------------------------------------------------------------
-    # Fin de ejecución
-    # -----------------------------------------------------------------------
-    log_event(
-        log_path,
-        run_id,
-        "cli",
-        "INFO",
-        "run_finished",
-        {"files_processed": len(raw_files)},
-    )
-    print(f"[MetaHunter] Ejecución completada. Archivos procesados: {len(raw_files)}")
+        if save_manifest:
+            incremental.save_run_manifest(run_manifest_path, run_manifest, options.to_dict())
+
+        log.event(
+            "analyzer",
+            "INFO",
+            "stats_saved",
+            {
+                "output": str(stats_path),
+                "files": stats_writer.count,
+                "format": stats_format,
+                "records_in": files_seen,
+                "records_out": stats_writer.count,
+                "duration_ms": run_timer.stages.get("stats"),
+            },
+        )
+        print(f"[analyzer] Stats de archivos RAW guardadas en {stats_path}")
+
+        # -----------------------------------------------------------------------
+        # IA (opcional) - resumen + reporte Markdown, usando STATS de los RAW
+        # -----------------------------------------------------------------------
+        if use_ai:
+            try:
+                # Asegúrate de que ai_client tenga esta función o ajusta el nombre
+                with run_timer.stage("ai"):
+                    ai_client.run_ai_pipeline(
+                        stats_path=stats_path,
+                        summary_path=ai_summary_path,
+                        report_path=ai_report_path,
+                        run_id=run_id,
+                        log_path=log_path,
+                        logger=log,
+                    )
+
+                log.event(
+                    "ai_client",
+                    "INFO",
+                    "ai_pipeline_finished",
+                    {
+                        "stats_path": str(stats_path),
+                        "summary_path": str(ai_summary_path),
+                        "report_path": str(ai_report_path),
+                        "duration_ms": run_timer.stages.get("ai"),
+                    },
+                )
+                print(f"[ai_client] Resumen IA en {ai_summary_path}")
+                print(f"[ai_client] Reporte IA en {ai_report_path}")
+            except Exception as e:  # noqa: BLE001
+                log.event(
+                    "ai_client",
+                    "ERROR",
+                    "ai_pipeline_error",
+                    {"error": str(e)},
+                )
+                print(f"[ai_client] ERROR ejecutando IA: {e}")
+
+        # -----------------------------------------------------------------------
+        # Reporte de integridad (Merkle root) de archivos LIMPIOS
+        # -----------------------------------------------------------------------
+        if integrity_report_path is not None and processed_hashes:
+            try:
+                with run_timer.stage("merkle"):
+                    integrity_report = build_integrity_report(
+                        processed_hashes,
+                        version=merkle_version,
+                        workers=workers,
+                        proofs=integrity_proofs,
+                        base_dir=output_dir,
+                        sizes=processed_sizes,
+                    )
+                    integrity_report_path.parent.mkdir(parents=True, exist_ok=True)
+                    integrity_report_path.write_text(
+                        json.dumps(integrity_report.to_dict(), ensure_ascii=False, indent=2),
+                        encoding="utf-8",
+                    )
+
+                log.event(
+                    "cli",
+                    "INFO",
+                    "integrity_report_generated",
+                    {
+                        "output": str(integrity_report_path),
+                        "files": len(processed_hashes),
+                        "algorithm": integrity_report.algorithm,
+                        "format_version": integrity_report.format_version,
+                        "proofs": integrity_proofs,
+                        "records_in": len(processed_hashes),
+                        "records_out": len(integrity_report.files),
+                        "duration_ms": run_timer.stages.get("merkle"),
+                    },
+                )
+                print(f"[integrity] Reporte de integridad: {integrity_report_path}")
+            except Exception as e:  # noqa: BLE001
+                log.event(
+                    "cli",
+                    "ERROR",
+                    "integrity_report_error",
+                    {"error": str(e)},
+                )
+                print(f"[integrity] ERROR generando reporte de integridad: {e}")
+
+        # -----------------------------------------------------------------------
+        # Manifiesto canónico (JSONL ordenado por ruta relativa)
+        # -----------------------------------------------------------------------
+        if integrity_manifest_path is not None and processed_hashes:
+            try:
+                with run_timer.stage("manifest"):
+                    manifest_root = manifest.write_manifest(
+                        integrity_manifest_path,
+                        (
+                            (integrity.relative_posix(path, output_dir), processed_sizes[path], h)
+                            for path, h in processed_hashes.items()
+                        ),
+                        base_dir=output_dir,
+                    )
+                log.event(
+                    "cli",
+                    "INFO",
+                    "integrity_manifest_generated",
+                    {
+                        "output": str(integrity_manifest_path),
+                        "files": len(processed_hashes),
+                        "merkle_root": manifest_root,
+                        "records_out": len(processed_hashes),
+                        "duration_ms": run_timer.stages.get("manifest"),
+                    },
+                )
+                print(f"[integrity] Manifiesto canónico: {integrity_manifest_path}")
+            except Exception as e:  # noqa: BLE001
+                log.event(
+                    "cli",
+                    "ERROR",
+                    "integrity_manifest_error",
+                    {"error": str(e)},
+                )
+                print(f"[integrity] ERROR generando el manifiesto canónico: {e}")
+
+        # -----------------------------------------------------------------------
+        # Almacén Merkle persistente (actualización incremental del root)
+        # -----------------------------------------------------------------------
+        if merkle_store_path is not None and processed_hashes:
+            try:
+                with run_timer.stage("merkle_store"):
+                    store, counts = merkle_store.update_store(
+                        merkle_store_path, output_dir, processed_hashes, seen=walked, recursive=recursive
+                    )
+                log.event(
+                    "cli",
+                    "INFO",
+                    "merkle_store_updated",
+                    {
+                        "output": str(merkle_store_path),
+                        "merkle_root": store.root(),
+                        "leaves": len(store),
+                        **counts,
+                        "duration_ms": run_timer.stages.get("merkle_store"),
+                    },
+                )
+                print(f"[integrity] Almacén Merkle: {merkle_store_path} (root {store.root()})")
+            except Exception as e:  # noqa: BLE001
+                log.event(
+                    "cli",
+                    "ERROR",
+                    "merkle_store_error",
+                    {"error": str(e)},
+                )
+                print(f"[integrity] ERROR actualizando el almacén Merkle: {e}")
+
+        # -----------------------------------------------------------------------
+        # Fin de ejecución
+        # -----------------------------------------------------------------------
+        log.event(
+            "cli",
+            "INFO",
+            "run_finished",
+            {
+                "files_processed": files_seen,
+                "files_unchanged": unchanged,
+                "records_in": files_seen,
+                "records_out": len(processed_hashes),
+                "duration_ms": elapsed_ms(run_started_at),
+                "stages_ms": run_timer.stages,
+                "file_stages_ms": file_timer.stages,
+                "io_bytes": {"read": bytes_read, "written": bytes_written},
+                "first_result_ms": first_result_ms,
+                "peak_rss_kb": peak_rss_kb(),
+            },
+        )
+        print(f"[MetaHunter] Ejecución completada. Archivos procesados: {files_seen}")
 
 
 def main() -> None:
+    # Subcomandos: metahunter verify ... / metahunter diff ...
+    if sys.argv[1:2] == ["verify"]:
+        sys.exit(verify.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["diff"]:
+        sys.exit(manifest.main(sys.argv[2:]))
+
     args = parse_args()
     run_pipeline(
         input_dir=args.input_dir,
@@ -317,6 +809,37 @@ def main() -> None:
         ai_summary_path=args.ai_summary_path,
         ai_report_path=args.ai_report_path,
         integrity_report_path=args.integrity_report_path,
+        integrity_manifest_path=args.integrity_manifest_path,
+        merkle_version=args.merkle_version,
+        integrity_proofs=args.integrity_proofs,
+        merkle_store_path=args.merkle_store_path,
+        workers=args.workers,
+        io_mode=args.io_mode,
+        max_inflight=args.max_inflight,
+        queue_depth=args.queue_depth,
+        copy_strategy=args.copy_strategy,
+        pdf_mode=args.pdf_mode,
+        cache_path=args.cache_path,
+        use_cache=not args.no_cache,
+        rebuild_cache=args.rebuild_cache,
+        cache_max_entries=args.cache_max_entries,
+        incremental_mode=args.incremental,
+        run_manifest_path=args.run_manifest_path,
+        recursive=args.recursive,
+        include=args.include,
+        exclude=args.exclude,
+        min_size=args.min_size,
+        max_size=args.max_size,
+        newer_than_ns=args.newer_than,
+        older_than_ns=args.older_than,
+        symlinks=args.symlinks,
+        sort_input=args.sort_input,
+        stats_format=args.stats_format,
+        log_flush_interval=args.log_flush_interval,
+        log_flush_size=args.log_flush_size,
+        log_fsync=args.log_fsync,
+        log_rotate_bytes=args.log_rotate_bytes,
+        log_compress=args.log_compress,
     )
 
 
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, Tuple
+
+from . import analyzer
+from . import cleaner
+from . import incremental
+from . import sniffer
+from .cache import AnalysisCache, Signature, file_signature
+from .timing import StageTimer, elapsed_ms
+
+
+# Archivos en vuelo por worker: mantiene el pool ocupado sin
+# encolar de golpe todo el lote (que puede ser un generador enorme).
+INFLIGHT_PER_WORKER = 4
+
+
+@dataclass
+class EngineOptions:
+    """
+    Opciones por archivo que se envían a cada worker (debe ser picklable).
+    """
+    copy_strategy: str = "auto"
+    pdf_mode: str = "fast"
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Con la versión del cleaner, para que el manifiesto incremental se
+        # invalide cuando cambia lo que produce la limpieza.
+        return {**asdict(self), "cleaner_version": cleaner.CLEANER_VERSION}
+
+
+@dataclass
+class FileResult:
+    """
+    Resultado del procesamiento completo de un archivo:
+    - stats: entrada de estadísticas del archivo RAW (analyzer)
+    - output / clean_sha256 / clean_size: archivo limpio y su hash (cleaner + integridad)
+    - clean_mtime_ns / clean_inode: stat del limpio, para el manifiesto incremental
+    - unchanged: en modo incremental, el RAW no cambió y no se volvió a limpiar
+    - error / error_stage: fallo aislado de este archivo ("analyze" o "clean")
+    - duration_ms: tiempo total de proceso del archivo en el worker
+    - stages_ms: tiempo por etapa (sniff, hash, clean, extract, advanced);
+      `clean` incluye el hash del RAW y del limpio, que van fusionados
+    - bytes_read / bytes_written: E/S de la limpieza (RAW leído, limpio escrito)
+    """
+    path: str
+    output: str
+    stats: Dict[str, Any] | None = None
+    clean_sha256: str | None = None
+    clean_size: int | None = None
+    clean_mtime_ns: int | None = None
+    clean_inode: int | None = None
+    strategy: str | None = None
+    from_cache: bool = False
+    unchanged: bool = False
+    error: str | None = None
+    error_stage: str | None = None
+    duration_ms: float | None = None
+    stages_ms: Dict[str, float] | None = None
+    bytes_read: int | None = None
+    bytes_written: int | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def process_file(
+    path: Path,
+    output_path: Path,
+    options: EngineOptions | None = None,
+    cached: Dict[str, Any] | None = None,
+    previous: Dict[str, Any] | None = None,
+    signature: Signature | None = None,
+    head: bytes | None = None,
+) -> FileResult:
+    """
+    Analiza, limpia y hashea (RAW y limpio) un único archivo.
+
+    Etapa fusionada: el cleaner hashea el RAW mientras lo lee y el archivo
+    limpio mientras lo escribe, y el analyzer reutiliza ese hash, así que
+    no hay pasadas extra para hashear. Cada byte se lee una sola vez salvo
+    en el modo PDF "fast", que relee objetos del RAW (ver
+    pdfclean.rewrite_pdf_fast); `bytes_read` cuenta la E/S real.
+
+    Si llega un análisis `cached` (caché persistente) se reutiliza: no se
+    vuelve a analizar y la copia pass-through no necesita hashear el RAW.
+
+    Si llega la entrada `previous` del manifiesto incremental y el hash RAW
+    no cambió, no se limpia de nuevo y se reutiliza el hash limpio guardado.
+
+    `signature` (tamaño, mtime, inodo) viene del walker y evita otro `stat`,
+    y `head` (primeros bytes) puede venir ya leído por la capa de E/S.
+
+    Nunca lanza excepciones: cualquier fallo queda registrado en el
+    resultado para que un archivo corrupto no detenga el lote.
+    """
+    started = time.perf_counter()
+    result, raw_sha256, head = _clean_step(path, output_path, options, cached, previous, head)
+    result = _analyze_step(result, path, raw_sha256, cached, signature, head)
+    result.duration_ms = elapsed_ms(started)
+    return result
+
+
+def _clean_step(
+    path: Path,
+    output_path: Path,
+    options: EngineOptions | None = None,
+    cached: Dict[str, Any] | None = None,
+    previous: Dict[str, Any] | None = None,
+    head: bytes | None = None,
+) -> Tuple[FileResult, str | None, bytes | None]:
+    """
+    Primera mitad de process_file: cabecera, comprobación incremental y
+    limpieza (con el hash del RAW y del limpio fusionados). Devuelve el
+    resultado parcial, el hash del RAW (si ya se conoce) y la cabecera.
+    """
+    options = options or EngineOptions()
+    result = FileResult(path=str(path), output=str(output_path))
+    timer = StageTimer()
+
+    raw_sha256 = cached["sha256"] if cached else None
+
+    # Primeros bytes del RAW: los comparten cleaner (elección de formato) y
+    # analyzer (sniffer de tipo MIME) para no leerlos dos veces.
+    if head is None:
+        try:
+            with timer.stage("sniff"):
+                head = sniffer.read_head(path)
+        except OSError:
+            head = None
+
+    if previous is not None:
+        try:
+            if raw_sha256 is None:
+                with timer.stage("hash"):
+                    raw_sha256 = analyzer._hash_file(path)
+            if incremental.is_unchanged(previous, raw_sha256, output_path):
+                result.clean_sha256 = previous["clean_sha256"]
+                result.clean_size = previous["clean_size"]
+                result.clean_mtime_ns = previous["clean_mtime_ns"]
+                result.clean_inode = previous["clean_inode"]
+                result.unchanged = True
+        except OSError:
+            # Se deja que la limpieza normal registre el error
+            pass
+
+    if not result.unchanged:
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with timer.stage("clean"):
+                cleaned = cleaner.clean_file(
+                    path,
+                    output_path,
+                    copy_strategy=options.copy_strategy,
+                    known_sha256=raw_sha256,
+                    pdf_mode=options.pdf_mode,
+                    head=head,
+                )
+            raw_sha256 = cleaned.raw_sha256
+            result.clean_sha256 = cleaned.clean_sha256
+            st = output_path.stat()
+            result.clean_size = st.st_size
+            result.clean_mtime_ns = st.st_mtime_ns
+            result.clean_inode = st.st_ino
+            result.strategy = cleaned.strategy
+            result.bytes_read = cleaned.bytes_read
+            result.bytes_written = cleaned.bytes_written
+        except Exception as e:  # noqa: BLE001
+            result.error = str(e)
+            result.error_stage = "clean"
+
+    result.stages_ms = timer.stages
+    return result, raw_sha256, head
+
+
+def _analyze_step(
+    result: FileResult,
+    path: Path,
+    raw_sha256: str | None,
+    cached: Dict[str, Any] | None = None,
+    signature: Signature | None = None,
+    head: bytes | None = None,
+) -> FileResult:
+    """Segunda mitad de process_file: análisis del RAW (o el de la caché)."""
+    timer = StageTimer()
+    timer.merge(result.stages_ms)
+
+    if cached is not None:
+        result.stats = cached
+        result.from_cache = True
+        result.stages_ms = timer.stages
+        return result
+
+    try:
+        result.stats = analyzer.analyze_file(
+            path,
+            sha256=raw_sha256,
+            size_bytes=signature[0] if signature else None,
+            head=head,
+            timer=timer,
+        )
+    except Exception as e:  # noqa: BLE001
+        result.error = str(e)
+        result.error_stage = "analyze"
+        result.clean_sha256 = None
+
+    result.stages_ms = timer.stages
+    return result
+
+
+def process_files(
+    jobs: Iterable[Tuple[Any, ...]],
+    workers: int = 1,
+    options: EngineOptions | None = None,
+    cache: AnalysisCache | None = None,
+    manifest: Dict[str, Dict[str, Any]] | None = None,
+) -> Iterator[FileResult]:
+    """
+    Procesa trabajos (entrada, salida[, firma]) y devuelve los resultados en
+    el MISMO orden que `jobs`, sin importar qué worker termine primero.
+    `jobs` puede ser un generador: solo se consume a medida que hay hueco.
+
+    - workers == 1: todo en el proceso actual (modo secuencial clásico).
+    - workers > 1: pool de procesos (PyPDF2 es CPU-bound y no libera el GIL).
+
+    Si un worker muere (segfault, OOM-killer...) el pool entero queda roto
+    y no se sabe qué archivo lo provocó. El archivo de la cabeza de la
+    ventana se reprocesa solo en un pool de un proceso (si vuelve a morir,
+    solo ese archivo queda con error_stage="worker") y el resto se reenvía
+    a un pool nuevo. Cada rotura aísla un archivo, así que no hace falta un
+    contador de intentos y ningún archivo inocente se marca como fallido.
+
+    La `cache` (si existe) solo se consulta/actualiza en este proceso; a los
+    workers les llega el análisis ya resuelto. Lo mismo con `manifest`
+    (modo incremental): cada worker recibe solo la entrada de su archivo.
+    """
+    def _prepare(job: Tuple[Any, ...]) -> _Job:
+        return _prepare_job(job, cache, manifest)
+
+    def _store(result: FileResult, job: _Job) -> FileResult:
+        return _store_result(result, job, cache)
+
+    if workers < 1:
+        raise ValueError("workers debe ser al menos 1.")
+
+    if workers == 1:
+        for job in map(_prepare, jobs):
+            yield _store(process_file(*job.args(options)), job)
+        return
+
+    window = workers * INFLIGHT_PER_WORKER
+    pending: Deque[Tuple[_Job, Future]] = deque()
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    def _submit(job: _Job) -> None:
+        pending.append((job, pool.submit(process_file, *job.args(options))))
+
+    def _next_result() -> FileResult:
+        nonlocal pool
+
+        job, future = pending.popleft()
+        try:
+            return _store(future.result(), job)
+        except BrokenProcessPool:
+            # Ver el docstring: se aísla el de la cabeza y el resto se
+            # reenvía a un pool nuevo.
+            pool.shutdown(wait=False, cancel_futures=True)
+            rest = [j for j, _ in pending]
+            pending.clear()
+
+            result = _run_isolated(job, options)
+
+            pool = ProcessPoolExecutor(max_workers=workers)
+            for j in rest:
+                _submit(j)
+            return _store(result, job)
+        except Exception as e:  # noqa: BLE001
+            return FileResult(
+                path=str(job.path),
+                output=str(job.output_path),
+                error=str(e),
+                error_stage="worker",
+            )
+
+    try:
+        for job in map(_prepare, jobs):
+            _submit(job)
+            if len(pending) >= window:
+                yield _next_result()
+
+        while pending:
+            yield _next_result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _prepare_job(
+    job: Tuple[Any, ...],
+    cache: AnalysisCache | None,
+    manifest: Dict[str, Dict[str, Any]] | None,
+) -> "_Job":
+    """Resuelve en el proceso padre la caché y la entrada incremental de un trabajo."""
+    path, output_path, *rest = job
+    signature = rest[0] if rest else None
+    previous = manifest.get(str(path)) if manifest else None
+    if cache is None:
+        return _Job(path, output_path, signature, None, previous)
+    if signature is None:
+        try:
+            signature = file_signature(path.stat())
+        except OSError:
+            return _Job(path, output_path, None, None, previous)
+    return _Job(path, output_path, signature, cache.get(path, signature), previous)
+
+
+def _store_result(result: FileResult, job: "_Job", cache: AnalysisCache | None) -> FileResult:
+    """Guarda en la caché el análisis nuevo de un resultado (si procede)."""
+    if cache is not None and job.signature is not None and result.stats is not None \
+            and not result.from_cache and result.error_stage != "analyze":
+        cache.put(job.path, job.signature, result.stats)
+    return result
+
+
+def _run_isolated(job: "_Job", options: EngineOptions | None) -> FileResult:
+    with ProcessPoolExecutor(max_workers=1) as solo:
+        try:
+            return solo.submit(process_file, *job.args(options)).result()
+        except BrokenProcessPool:
+            return FileResult(
+                path=str(job.path),
+                output=str(job.output_path),
+                error="El proceso worker terminó inesperadamente.",
+                error_stage="worker",
+            )
+
+
+class _Job:
+    """Trabajo pendiente del motor con lo ya resuelto en el proceso padre."""
+
+    __slots__ = ("path", "output_path", "signature", "cached", "previous")
+
+    def __init__(
+        self,
+        path: Path,
+        output_path: Path,
+        signature: Signature | None,
+        cached: Dict[str, Any] | None,
+        previous: Dict[str, Any] | None,
+    ) -> None:
+        self.path = path
+        self.output_path = output_path
+        self.signature = signature
+        self.cached = cached
+        self.previous = previous
+
+    def args(self, options: EngineOptions | None) -> Tuple[Any, ...]:
+        return (self.path, self.output_path, options, self.cached, self.previous, self.signature)
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from PyPDF2 import PdfReader
+
+from .ooxml import read_doc_props
+from .sniffer import read_head, sniff_format
+
+# ---------------------------------------------------------------------------
+# Opcional: Pillow para EXIF / chunks de texto de imágenes
+# ---------------------------------------------------------------------------
+
+try:
+    from PIL import Image  # type: ignore[import]
+    _HAS_PIL = True
+except Exception:  # noqa: BLE001
+    Image = None  # type: ignore[assignment]
+    _HAS_PIL = False
+
+
+Extractor = Callable[[Path], Dict[str, Any]]
+
+# formato -> función extractora; ampliable con register_extractor()
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(fmt: str) -> Callable[[Extractor], Extractor]:
+    """Decorador para registrar (o sustituir) el extractor de un formato."""
+    def decorator(func: Extractor) -> Extractor:
+        EXTRACTORS[fmt] = func
+        return func
+    return decorator
+
+
+def extract_metadata(path: Path, head: bytes | None = None) -> Dict[str, Any]:
+    """
+    Extrae los metadatos embebidos de un archivo, leyendo solo las regiones
+    de cabecera/metadatos (sin decodificar páginas ni píxeles).
+
+    Devuelve claves normalizadas (author, company, creator_tool, software,
+    created_at, modified_at, camera_model, gps_latitude, ...) listas para
+    `analyze_file_advanced`. Un archivo dañado no interrumpe el análisis:
+    se devuelve lo obtenido junto con `metadata_error`.
+    """
+    if head is None:
+        head = read_head(path)
+
+    # Formato real según los bytes mágicos (no la extensión)
+    fmt = sniff_format(head)
+    extractor = EXTRACTORS.get(fmt) if fmt else None
+    if extractor is None:
+        return {}
+
+    try:
+        found = extractor(path)
+    except Exception as exc:  # noqa: BLE001
+        return {"metadata_format": fmt, "metadata_error": str(exc)}
+
+    found = {k: v for k, v in found.items() if v not in (None, "", [], {})}
+    found["metadata_format"] = fmt
+    return found
+
+
+# ---------------------------------------------------------------------------
+# PDF: diccionario Info + XMP del catálogo
+# ---------------------------------------------------------------------------
+
+_PDF_INFO_KEYS = {
+    "/Author": "author",
+    "/Creator": "creator_tool",
+    "/Producer": "software",
+    "/CreationDate": "created_at",
+    "/ModDate": "modified_at",
+    "/Title": "title",
+    "/Company": "company",
+}
+
+_PDF_DATE_RE = re.compile(
+    r"^D?:?(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?"
+    r"(?:([Zz+\-])(\d{2})?'?(\d{2})?'?)?"
+)
+
+
+def _pdf_date(value: str) -> str:
+    """Convierte 'D:20231201120000+01'00'' a ISO 8601; si no encaja, lo deja igual."""
+    m = _PDF_DATE_RE.match(value.strip())
+    if not m:
+        return value
+    year, month, day, hour, minute, second, sign, tz_h, tz_m = m.groups()
+    iso = f"{year}-{month or '01'}-{day or '01'}T{hour or '00'}:{minute or '00'}:{second or '00'}"
+    if sign in ("Z", "z"):
+        iso += "Z"
+    elif sign:
+        iso += f"{sign}{tz_h or '00'}:{tz_m or '00'}"
+    return iso
+
+
+@register_extractor("pdf")
+def _extract_pdf(path: Path) -> Dict[str, Any]:
+    # PdfReader con un archivo abierto (no una ruta) no carga el PDF entero:
+    # lee la tabla xref del final y resuelve solo los objetos que se piden.
+    with path.open("rb") as f:
+        reader = PdfReader(f)
+        info = reader.metadata or {}
+
+        result: Dict[str, Any] = {}
+        for key, name in _PDF_INFO_KEYS.items():
+            value = info.get(key)
+            if value is None:
+                continue
+            value = str(value).strip()
+            if key in ("/CreationDate", "/ModDate"):
+                value = _pdf_date(value)
+            result[name] = value
+
+        xmp = reader.xmp_metadata
+        if xmp is not None:
+            creators = xmp.dc_creator or []
+            if creators and "author" not in result:
+                result["author"] = ", ".join(str(c) for c in creators)
+            if xmp.xmp_creator_tool and "creator_tool" not in result:
+                result["creator_tool"] = str(xmp.xmp_creator_tool)
+            if xmp.pdf_producer and "software" not in result:
+                result["software"] = str(xmp.pdf_producer)
+            if xmp.xmp_create_date and "created_at" not in result:
+                result["created_at"] = xmp.xmp_create_date.isoformat()
+            if xmp.xmp_modify_date and "modified_at" not in result:
+                result["modified_at"] = xmp.xmp_modify_date.isoformat()
+
+        result["page_count"] = _pdf_page_count(reader)
+    return result
+
+
+def _pdf_page_count(reader: PdfReader) -> int:
+    """
+    Número de páginas según /Root/Pages/Count del catálogo, sin recorrer el
+    árbol de páginas (len(reader.pages) resuelve todos sus nodos). Solo si
+    falta o no es un entero válido se cuentan las páginas una a una.
+    """
+    try:
+        count = reader.trailer["/Root"]["/Pages"]["/Count"]
+        if int(count) >= 0:
+            return int(count)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        pass
+    return len(reader.pages)
+
+
+# ---------------------------------------------------------------------------
+# OOXML (DOCX/XLSX/PPTX): docProps/core.xml, app.xml y custom.xml
+# ---------------------------------------------------------------------------
+
+_CORE_KEYS = {
+    "creator": "author",
+    "lastModifiedBy": "last_modified_by",
+    "created": "created_at",
+    "modified": "modified_at",
+    "title": "title",
+}
+
+_APP_KEYS = {
+    "Company": "company",
+    "Manager": "manager",
+    "Application": "software",
+}
+
+
+def _parse_props(xml: bytes | None) -> Dict[str, str]:
+    """Texto de los elementos hijos de un XML de propiedades, por nombre local."""
+    if not xml:
+        return {}
+    props: Dict[str, str] = {}
+    for child in ET.fromstring(xml):
+        local = child.tag.rsplit("}", 1)[-1]
+        if local == "property":
+            # custom.xml: <property name="..."><vt:lpwstr>valor</vt:lpwstr></property>
+            value = "".join(child.itertext()).strip()
+            if value:
+                props[f"custom:{child.get('name', '')}"] = value
+        elif child.text and child.text.strip():
+            props[local] = child.text.strip()
+    return props
+
+
+@register_extractor("zip")
+def _extract_ooxml(path: Path) -> Dict[str, Any]:
+    # Solo el directorio central y los docProps, no el documento entero
+    raw = read_doc_props(path)
+    core = _parse_props(raw.get("docProps/core.xml"))
+    app = _parse_props(raw.get("docProps/app.xml"))
+    custom = _parse_props(raw.get("docProps/custom.xml"))
+
+    result: Dict[str, Any] = {}
+    for key, name in _CORE_KEYS.items():
+        if key in core:
+            result[name] = core[key]
+    for key, name in _APP_KEYS.items():
+        if key in app:
+            result[name] = app[key]
+    if "software" in result and "AppVersion" in app:
+        result["software"] = f"{result['software']} {app['AppVersion']}"
+    result.update(custom)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Imágenes: EXIF (IFD0, Exif, GPS), XMP y chunks de texto PNG
+# ---------------------------------------------------------------------------
+
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+
+_TAG_MAKE = 271
+_TAG_MODEL = 272
+_TAG_SOFTWARE = 305
+_TAG_DATETIME = 306
+_TAG_ARTIST = 315
+_TAG_DATETIME_ORIGINAL = 36867
+
+_XMP_CREATOR_TOOL_RE = re.compile(rb"CreatorTool(?:=\"|>)([^\"<]+)")
+_XMP_SOURCE_TYPE_RE = re.compile(rb"DigitalSourceType(?:=\"|>)([^\"<]+)")
+
+
+def _exif_date(value: Any) -> str:
+    """'2023:12:01 12:00:00' (EXIF) -> '2023-12-01T12:00:00'."""
+    text = str(value).strip()
+    if len(text) >= 19 and text[4] == ":" and text[7] == ":":
+        return f"{text[:4]}-{text[5:7]}-{text[8:10]}T{text[11:19]}"
+    return text
+
+
+def _gps_coord(value: Any, ref: Any) -> float | None:
+    """Grados/minutos/segundos EXIF a grados decimales (negativo para S/W)."""
+    try:
+        degrees, minutes, seconds = (float(v) for v in value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    coord = degrees + minutes / 60.0 + seconds / 3600.0
+    if str(ref).strip().upper() in ("S", "W"):
+        coord = -coord
+    return round(coord, 7)
+
+
+def _extract_image(path: Path) -> Dict[str, Any]:
+    if not _HAS_PIL:
+        return {}
+
+    result: Dict[str, Any] = {}
+    # Image.open es perezoso: lee las cabeceras y segmentos de metadatos,
+    # pero no decodifica los píxeles mientras no se llame a load().
+    with Image.open(path) as img:
+        exif = img.getexif()
+        if exif:
+            make = str(exif.get(_TAG_MAKE, "")).strip("\x00 ")
+            model = str(exif.get(_TAG_MODEL, "")).strip("\x00 ")
+            if make:
+                result["device"] = make
+            if model:
+                result["camera_model"] = model if not make or model.startswith(make) else f"{make} {model}"
+            if _TAG_SOFTWARE in exif:
+                result["software"] = str(exif[_TAG_SOFTWARE]).strip("\x00 ")
+            if _TAG_ARTIST in exif:
+                result["author"] = str(exif[_TAG_ARTIST]).strip("\x00 ")
+            if _TAG_DATETIME in exif:
+                result["modified_at"] = _exif_date(exif[_TAG_DATETIME])
+
+            sub = exif.get_ifd(_EXIF_IFD)
+            if _TAG_DATETIME_ORIGINAL in sub:
+                result["created_at"] = _exif_date(sub[_TAG_DATETIME_ORIGINAL])
+
+            gps = exif.get_ifd(_GPS_IFD)
+            if gps:
+                lat = _gps_coord(gps.get(2), gps.get(1))
+                lon = _gps_coord(gps.get(4), gps.get(3))
+                if lat is not None and lon is not None:
+                    result["gps_latitude"] = lat
+                    result["gps_longitude"] = lon
+
+        xmp = img.info.get("xmp") or img.info.get("XML:com.adobe.xmp")
+        if isinstance(xmp, str):
+            xmp = xmp.encode("utf-8", "replace")
+        if xmp:
+            m = _XMP_CREATOR_TOOL_RE.search(xmp)
+            if m:
+                result.setdefault("creator_tool", m.group(1).decode("utf-8", "replace"))
+            m = _XMP_SOURCE_TYPE_RE.search(xmp)
+            if m:
+                result["digital_source_type"] = m.group(1).decode("utf-8", "replace")
+
+        # Chunks tEXt/iTXt/zTXt de PNG: cada uno como campo propio para
+        # que las coincidencias de firmas IA indiquen de qué chunk vienen.
+        if img.format == "PNG":
+            for key, value in img.info.items():
+                if isinstance(value, str) and key != "xmp" and key != "XML:com.adobe.xmp":
+                    result[f"png:{key}"] = value
+            if "png:Software" in result:
+                result.setdefault("software", result["png:Software"])
+            if "png:Author" in result:
+                result.setdefault("author", result["png:Author"])
+
+    return result
+
+
+for _fmt in ("jpeg", "png", "tiff", "webp"):
+    register_extractor(_fmt)(_extract_image)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import io
+from pathlib import Path
+from typing import Any, BinaryIO
+
+# Tamaño de bloque para las copias/lecturas en streaming.
+CHUNK_SIZE = 1024 * 1024
+
+
+class HashingReader:
+    """
+    Envoltorio de lectura secuencial que calcula SHA-256 y cuenta bytes
+    a medida que el consumidor lee, para no volver a leer el archivo
+    solo para hashearlo.
+    """
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self._raw = raw
+        self._hasher = hashlib.sha256()
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self._hasher.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        n = self._raw.readinto(buffer)
+        if n:
+            self._hasher.update(memoryview(buffer)[:n])
+            self.bytes_read += n
+        return n
+
+    def drain(self) -> None:
+        """Consume (y hashea) lo que quede sin leer del archivo."""
+        for _ in iter(lambda: self.read(CHUNK_SIZE), b""):
+            pass
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+class SeekableHashingReader:
+    """
+    Lector con acceso aleatorio (seek/tell) para quien salta por el archivo,
+    como PdfReader. El SHA-256 del archivo entero se calcula sin una pasada
+    aparte: cada lectura que cruza el final de lo ya hasheado lo hace
+    avanzar, y hash_until()/drain() leen solo los huecos que nadie ha pedido.
+
+    Con `hash_data=False` (hash ya conocido) solo lee. `bytes_read` es lo que
+    el sistema operativo entregó al buffer de lectura (E/S real), no la suma
+    de las lecturas pequeñas del parser, que salen de ese buffer.
+    """
+
+    def __init__(self, path: Path, hash_data: bool = True) -> None:
+        self._counter = _CountingFileIO(path)
+        self._raw = io.BufferedReader(self._counter)
+        self._hasher = hashlib.sha256() if hash_data else None
+        self._hashed = 0
+
+    def __enter__(self) -> "SeekableHashingReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._raw.close()
+
+    @property
+    def bytes_read(self) -> int:
+        return self._counter.bytes_read
+
+    def read(self, size: int = -1) -> bytes:
+        pos = self._raw.tell()
+        data = self._raw.read(size)
+        self._account(pos, data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        pos = self._raw.tell()
+        data = self._raw.readline(size)
+        self._account(pos, data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def hash_until(self, offset: int) -> None:
+        """Hashea (leyéndolo si hace falta) todo el archivo hasta `offset`."""
+        if self._hasher is None or self._hashed >= offset:
+            return
+        pos = self._raw.tell()
+        self._raw.seek(self._hashed)
+        while self._hashed < offset:
+            if not self.read(min(CHUNK_SIZE, offset - self._hashed)):
+                break
+        self._raw.seek(pos)
+
+    def drain(self) -> None:
+        """Hashea lo que quede sin leer hasta el final del archivo."""
+        if self._hasher is None:
+            return
+        self._raw.seek(self._hashed)
+        for _ in iter(lambda: self.read(CHUNK_SIZE), b""):
+            pass
+
+    def hexdigest(self) -> str:
+        if self._hasher is None:
+            raise ValueError("Lector creado con hash_data=False.")
+        return self._hasher.hexdigest()
+
+    def _account(self, pos: int, data: bytes) -> None:
+        end = pos + len(data)
+        if self._hasher is not None and pos <= self._hashed < end:
+            self._hasher.update(memoryview(data)[self._hashed - pos:])
+            self._hashed = end
+
+
+class _CountingFileIO(io.FileIO):
+    """FileIO que cuenta los bytes que devuelve el sistema operativo."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path, "rb")
+        self.bytes_read = 0
+
+    def readinto(self, buffer) -> int | None:
+        n = super().readinto(buffer)
+        if n:
+            self.bytes_read += n
+        return n
+
+
+class HashingWriter:
+    """
+    Envoltorio de escritura que calcula SHA-256 y cuenta bytes de todo lo
+    que se escribe, para obtener el hash del archivo limpio sin releerlo.
+    """
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self._raw = raw
+        self._hasher = hashlib.sha256()
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        self._raw.write(data)
+        self._hasher.update(data)
+        n = len(memoryview(data).cast("B"))
+        self.bytes_written += n
+        return n
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import BinaryIO, List, Set, Tuple
+
+from .hashio import CHUNK_SIZE, HashingReader, HashingWriter
+
+# Formatos de imagen (según sniffer.sniff_format) que se limpian sin recodificar.
+IMAGE_FORMATS = ("jpeg", "png", "tiff", "webp")
+
+
+class ImageFormatUnsupported(Exception):
+    """Variante del formato que no se sabe limpiar (p. ej. BigTIFF)."""
+
+
+def strip_image_metadata(fmt: str, input_path: Path, out: HashingWriter) -> Tuple[str, int]:
+    """
+    Escribe en `out` la imagen sin EXIF/XMP/IPTC ni comentarios.
+
+    Se recorren los segmentos/chunks/IFDs del formato y se copian tal cual
+    los datos comprimidos de la imagen: no se decodifica ni se recodifica
+    nada (sin pérdida de calidad) y la memoria usada es constante. El RAW
+    se lee secuencialmente una vez y se hashea al vuelo.
+
+    Devuelve (sha256 RAW, bytes leídos).
+    """
+    strip = _STRIPPERS.get(fmt)
+    if strip is None:
+        raise ImageFormatUnsupported(fmt)
+
+    with input_path.open("rb") as f:
+        plan = _PLANNERS[fmt](f) if fmt in _PLANNERS else None
+        f.seek(0)
+        reader = HashingReader(f)
+        strip(reader, out, plan)
+        # Datos tras el final de la imagen: se copian sin tocar
+        _copy_rest(reader, out)
+
+    return reader.hexdigest(), reader.bytes_read
+
+
+# ---------------------------------------------------------------------------
+# Utilidades de lectura/copia
+# ---------------------------------------------------------------------------
+
+def _read_exact(reader: HashingReader, size: int) -> bytes:
+    data = reader.read(size)
+    if len(data) != size:
+        raise ValueError("Imagen truncada.")
+    return data
+
+
+def _copy(reader: HashingReader, out: HashingWriter, size: int) -> None:
+    while size > 0:
+        chunk = _read_exact(reader, min(size, CHUNK_SIZE))
+        out.write(chunk)
+        size -= len(chunk)
+
+
+def _skip(reader: HashingReader, size: int) -> None:
+    while size > 0:
+        size -= len(_read_exact(reader, min(size, CHUNK_SIZE)))
+
+
+def _copy_rest(reader: HashingReader, out: HashingWriter) -> None:
+    for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+        out.write(chunk)
+
+
+# ---------------------------------------------------------------------------
+# JPEG: segmentos de marcador hasta el primer SOS
+# ---------------------------------------------------------------------------
+
+_JPEG_SOI = b"\xff\xd8"
+_JPEG_SOS = 0xDA
+_JPEG_EOI = 0xD9
+_JPEG_COM = 0xFE
+# Marcadores sin longitud (TEM, RSTn)
+_JPEG_STANDALONE = {0x01, *range(0xD0, 0xD8)}
+
+
+def _keep_jpeg_segment(marker: int, data: bytes) -> bool:
+    """
+    Se conservan APP0 (JFIF), APP2 solo con perfil ICC y APP14 (Adobe,
+    transformación de color); el resto de APPn (EXIF, XMP, IPTC/Photoshop,
+    datos de fabricante) y COM se eliminan.
+    """
+    if marker == _JPEG_COM:
+        return False
+    if 0xE0 <= marker <= 0xEF:
+        if marker == 0xE0:
+            return True
+        if marker == 0xE2:
+            return data.startswith(b"ICC_PROFILE\x00")
+        if marker == 0xEE:
+            return data.startswith(b"Adobe")
+        return False
+    return True
+
+
+def _strip_jpeg(reader: HashingReader, out: HashingWriter, plan=None) -> None:
+    if _read_exact(reader, 2) != _JPEG_SOI:
+        raise ValueError("No es un JPEG (falta SOI).")
+    out.write(_JPEG_SOI)
+
+    while True:
+        if _read_exact(reader, 1) != b"\xff":
+            raise ValueError("Marcador JPEG inválido.")
+        marker = _read_exact(reader, 1)[0]
+        while marker == 0xFF:  # bytes de relleno
+            marker = _read_exact(reader, 1)[0]
+
+        if marker in _JPEG_STANDALONE or marker == _JPEG_EOI:
+            out.write(bytes((0xFF, marker)))
+            if marker == _JPEG_EOI:
+                return
+            continue
+
+        length_bytes = _read_exact(reader, 2)
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2:
+            raise ValueError("Longitud de segmento JPEG inválida.")
+        data = _read_exact(reader, length - 2)
+
+        if marker == _JPEG_SOS:
+            # Desde aquí, datos comprimidos (y escaneos siguientes): tal cual
+            out.write(bytes((0xFF, marker)) + length_bytes + data)
+            return
+
+        if _keep_jpeg_segment(marker, data):
+            out.write(bytes((0xFF, marker)) + length_bytes + data)
+
+
+# ---------------------------------------------------------------------------
+# PNG: chunks de texto, EXIF y fecha
+# ---------------------------------------------------------------------------
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_DROP = {b"tEXt", b"iTXt", b"zTXt", b"eXIf", b"tIME"}
+
+
+def _strip_png(reader: HashingReader, out: HashingWriter, plan=None) -> None:
+    if _read_exact(reader, 8) != _PNG_SIGNATURE:
+        raise ValueError("No es un PNG (firma inválida).")
+    out.write(_PNG_SIGNATURE)
+
+    while True:
+        header = _read_exact(reader, 8)
+        length, ctype = struct.unpack(">I4s", header)
+        if ctype in _PNG_DROP:
+            _skip(reader, length + 4)  # datos + CRC
+            continue
+        out.write(header)
+        _copy(reader, out, length + 4)
+        if ctype == b"IEND":
+            return
+
+
+# ---------------------------------------------------------------------------
+# WebP: chunks EXIF/XMP y banderas de VP8X
+# ---------------------------------------------------------------------------
+
+_WEBP_DROP = {b"EXIF", b"XMP "}
+_VP8X_EXIF_FLAG = 0x08
+_VP8X_XMP_FLAG = 0x04
+
+
+def _plan_webp(f: BinaryIO) -> List[Tuple[bytes, int]]:
+    """Primera pasada (solo cabeceras de chunk) para conocer el tamaño RIFF final."""
+    header = f.read(12)
+    if len(header) != 12 or header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        raise ValueError("No es un WebP (cabecera RIFF inválida).")
+    riff_end = 8 + struct.unpack("<I", header[4:8])[0]
+
+    chunks: List[Tuple[bytes, int]] = []
+    pos = 12
+    while pos + 8 <= riff_end:
+        f.seek(pos)
+        chunk_header = f.read(8)
+        if len(chunk_header) != 8:
+            break
+        fourcc, size = struct.unpack("<4sI", chunk_header)
+        chunks.append((fourcc, size))
+        pos += 8 + size + (size & 1)
+    return chunks
+
+
+def _strip_webp(reader: HashingReader, out: HashingWriter, chunks) -> None:
+    _read_exact(reader, 12)
+    riff_size = 4 + sum(8 + size + (size & 1) for fourcc, size in chunks if fourcc not in _WEBP_DROP)
+    out.write(b"RIFF" + struct.pack("<I", riff_size) + b"WEBP")
+
+    for fourcc, size in chunks:
+        padded = size + (size & 1)
+        header = _read_exact(reader, 8)
+        if fourcc in _WEBP_DROP:
+            _skip(reader, padded)
+            continue
+        out.write(header)
+        if fourcc == b"VP8X" and size >= 1:
+            data = bytearray(_read_exact(reader, padded))
+            data[0] &= ~(_VP8X_EXIF_FLAG | _VP8X_XMP_FLAG) & 0xFF
+            out.write(bytes(data))
+        else:
+            _copy(reader, out, padded)
+
+
+# ---------------------------------------------------------------------------
+# TIFF: parches sobre los IFDs, aplicados durante la copia en streaming
+# ---------------------------------------------------------------------------
+
+# Etiquetas de IFD0 con metadatos que se eliminan
+_TIFF_DROP_TAGS = {
+    270,    # ImageDescription
+    271,    # Make
+    272,    # Model
+    305,    # Software
+    306,    # DateTime
+    315,    # Artist
+    316,    # HostComputer
+    700,    # XMP
+    33432,  # Copyright
+    33723,  # IPTC-NAA
+    34377,  # Photoshop
+    34665,  # Exif IFD
+    34853,  # GPS IFD
+}
+# Punteros a sub-IFDs cuyo contenido también se borra
+_TIFF_SUB_IFD_TAGS = {34665, 34853, 40965}
+
+_TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4}
+
+# Parche: (offset, datos) o (offset, tamaño a poner a cero)
+Patch = Tuple[int, "bytes | int"]
+
+
+def _plan_tiff(f: BinaryIO) -> List[Patch]:
+    """
+    Lee solo los IFDs (acceso aleatorio) y devuelve los parches a aplicar:
+    cada IFD se reescribe sin las entradas de metadatos (mismo sitio, resto
+    a cero) y los valores/sub-IFDs de esas entradas se ponen a cero.
+    """
+    header = f.read(8)
+    if header[:4] == b"II+\x00" or header[:4] == b"MM\x00+":
+        raise ImageFormatUnsupported("BigTIFF")
+    if header[:4] not in (b"II*\x00", b"MM\x00*"):
+        raise ValueError("No es un TIFF (cabecera inválida).")
+    bo = "<" if header[:2] == b"II" else ">"
+
+    patches: List[Patch] = []
+    seen: Set[int] = set()
+    offset = struct.unpack(bo + "I", header[4:8])[0]
+    while offset and offset not in seen:
+        seen.add(offset)
+        entries, next_offset = _read_ifd(f, bo, offset)
+
+        kept = [e for e in entries if e[0] not in _TIFF_DROP_TAGS]
+        if len(kept) != len(entries):
+            for entry in entries:
+                if entry[0] in _TIFF_DROP_TAGS:
+                    _zero_entry(f, bo, entry, patches, seen)
+            ifd = struct.pack(bo + "H", len(kept))
+            ifd += b"".join(e[4] for e in kept)
+            ifd += struct.pack(bo + "I", next_offset)
+            ifd += bytes(12 * (len(entries) - len(kept)))
+            patches.append((offset, ifd))
+
+        offset = next_offset
+    return patches
+
+
+def _read_ifd(f: BinaryIO, bo: str, offset: int):
+    f.seek(offset)
+    count_bytes = f.read(2)
+    if len(count_bytes) != 2:
+        raise ValueError("IFD de TIFF fuera del archivo.")
+    count = struct.unpack(bo + "H", count_bytes)[0]
+    raw = f.read(12 * count + 4)
+    if len(raw) != 12 * count + 4:
+        raise ValueError("IFD de TIFF truncado.")
+
+    entries = []
+    for i in range(count):
+        entry = raw[12 * i:12 * i + 12]
+        tag, typ, n = struct.unpack(bo + "HHI", entry[:8])
+        value = struct.unpack(bo + "I", entry[8:])[0]
+        entries.append((tag, typ, n, value, entry))
+    next_offset = struct.unpack(bo + "I", raw[-4:])[0]
+    return entries, next_offset
+
+
+def _zero_entry(f: BinaryIO, bo: str, entry, patches: List[Patch], seen: Set[int]) -> None:
+    tag, typ, n, value, _ = entry
+    size = _TIFF_TYPE_SIZES.get(typ, 1) * n
+    if size > 4:
+        patches.append((value, size))
+
+    if tag in _TIFF_SUB_IFD_TAGS and value and value not in seen:
+        seen.add(value)
+        try:
+            sub_entries, _ = _read_ifd(f, bo, value)
+        except ValueError:
+            return
+        patches.append((value, 2 + 12 * len(sub_entries) + 4))
+        for sub in sub_entries:
+            _zero_entry(f, bo, sub, patches, seen)
+
+
+def _strip_tiff(reader: HashingReader, out: HashingWriter, patches: List[Patch]) -> None:
+    # Parches ordenados por offset; se aplican sobre cada bloque copiado
+    patches = sorted(patches, key=lambda p: p[0])
+    pos = 0
+    for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+        end = pos + len(chunk)
+        block = None
+        for start, patch in patches:
+            if start >= end:
+                break
+            length = patch if isinstance(patch, int) else len(patch)
+            if start + length <= pos:
+                continue
+            if block is None:
+                block = bytearray(chunk)
+            lo, hi = max(start, pos), min(start + length, end)
+            data = bytes(hi - lo) if isinstance(patch, int) else patch[lo - start:hi - start]
+            block[lo - pos:hi - pos] = data
+        out.write(block if block is not None else chunk)
+        pos = end
+
+
+_STRIPPERS = {
+    "jpeg": _strip_jpeg,
+    "png": _strip_png,
+    "webp": _strip_webp,
+    "tiff": _strip_tiff,
+}
+
+# Formatos que necesitan una primera pasada sobre las cabeceras
+_PLANNERS = {
+    "webp": _plan_webp,
+    "tiff": _plan_tiff,
+}
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+# Nombre por defecto del manifiesto, junto al stats (como la caché de
+# análisis). Nunca dentro de --output-dir: guarda rutas y hashes de los RAW,
+# justo lo que no debe acompañar a los archivos limpios.
+DEFAULT_MANIFEST_NAME = "metahunter_manifest.json"
+
+MANIFEST_VERSION = 2
+
+
+def load_run_manifest(path: Path, options: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Devuelve las entradas del manifiesto de la ejecución anterior:
+      { "ruta/raw": {"raw_sha256", "output", "clean_sha256", "clean_size",
+                     "clean_mtime_ns", "clean_inode"} }
+
+    Si no existe, está corrupto o se generó con otras opciones de limpieza
+    (que cambiarían el archivo limpio) se devuelve vacío y todo se limpia.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    if data.get("options") != options:
+        return {}
+
+    files = data.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_run_manifest(
+    path: Path,
+    files: Dict[str, Dict[str, Any]],
+    options: Dict[str, Any],
+) -> None:
+    """
+    Escribe el manifiesto de forma atómica (archivo temporal + replace) para
+    que una ejecución interrumpida no deje un manifiesto a medias.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {"version": MANIFEST_VERSION, "options": options, "files": files},
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def is_unchanged(entry: Dict[str, Any] | None, raw_sha256: str, output_path: Path) -> bool:
+    """
+    Un archivo no necesita limpiarse de nuevo si su hash RAW coincide con el
+    del manifiesto y el archivo limpio anterior sigue en su sitio intacto:
+    misma ruta, tamaño, mtime e inodo. Cualquier escritura o sustitución
+    del limpio cambia su mtime o su inodo, así que el `clean_sha256`
+    guardado solo se reutiliza si el archivo es el mismo que se hasheó.
+    """
+    if not entry or entry.get("raw_sha256") != raw_sha256:
+        return False
+    if entry.get("output") != str(output_path):
+        return False
+    try:
+        st = output_path.stat()
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns, st.st_ino) == (
+        entry.get("clean_size"),
+        entry.get("clean_mtime_ns"),
+        entry.get("clean_inode"),
+    )
@@ -1,8 +1,28 @@
 from __future__ import annotations
 
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, asdict
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Versiones del árbol Merkle:
+# - 1: concatena los hex de cada par y duplica el último nodo si el nivel es
+#   impar (formato original; los reportes sin `format_version` son v1).
+# - 2: trabaja sobre los digests binarios de 32 bytes, con prefijos de
+#   dominio 0x00 (hoja) / 0x01 (nodo interno) y, si el nivel es impar, el
+#   último nodo sube sin duplicarse (como en RFC 6962).
+MERKLE_VERSIONS = (1, 2)
+DEFAULT_MERKLE_VERSION = 2
+
+DIGEST_SIZE = 32
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Hojas a partir de las que compensa repartir el árbol v2 entre procesos.
+# Los subárboles tienen tamaño potencia de dos: así sus raíces son nodos
+# del árbol completo y el resultado no depende del número de workers.
+PARALLEL_MIN_LEAVES = 1 << 18
 
 
 @dataclass
@@ -12,38 +32,208 @@ class IntegrityReport:
     - algoritmo usado (SHA-256)
     - Merkle root del conjunto de hashes
     - lista de archivos y su hash
+    - versión del árbol Merkle (ver MERKLE_VERSIONS)
+
+    Los archivos van ordenados por ruta (bytes UTF-8) y, con `base_dir`,
+    las rutas son relativas a esa carpeta en formato POSIX: el mismo
+    conjunto limpio da el mismo root en cualquier sistema operativo.
+
+    Con pruebas de inclusión, cada archivo lleva además su posición
+    (`index`) y su camino de auditoría (`proof`, hashes hex de hoja a raíz).
     """
     algorithm: str
     merkle_root: str
-    files: List[Dict[str, str]]
+    files: List[Dict[str, Any]]
+    format_version: int = 1
+    base_dir: str | None = None
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
 
-def build_integrity_report(file_hashes: Dict[str, str]) -> IntegrityReport:
+def build_integrity_report(
+    file_hashes: Dict[str, str],
+    version: int = DEFAULT_MERKLE_VERSION,
+    workers: int = 1,
+    proofs: bool = False,
+    base_dir: Path | None = None,
+    sizes: Dict[str, int] | None = None,
+) -> IntegrityReport:
     """
     Construye un reporte de integridad a partir de un dict:
       { "ruta/archivo": "hash_hex_sha256" }
+
+    Con `base_dir` las rutas se guardan relativas a esa carpeta, y con
+    `sizes` ({ misma ruta: bytes }) cada archivo lleva su tamaño.
+
+    Con `proofs` (solo versión 2) se guarda la prueba de inclusión de cada
+    archivo, para verificarlo después sin el resto de hashes.
     """
     if not file_hashes:
         raise ValueError("No se proporcionaron hashes de archivo para construir el reporte de integridad.")
 
-    hashes = list(file_hashes.values())
-    root = _build_merkle_root(hashes)
+    files_list: List[Dict[str, Any]] = []
+    for path, h in file_hashes.items():
+        entry: Dict[str, Any] = {"path": relative_posix(path, base_dir), "hash": h}
+        if sizes is not None:
+            entry["size"] = sizes[path]
+        files_list.append(entry)
+    files_list.sort(key=lambda e: path_sort_key(e["path"]))
+    hashes = [entry["hash"] for entry in files_list]
 
-    files_list = [
-        {"path": path, "hash": h}
-        for path, h in file_hashes.items()
-    ]
+    if proofs:
+        if version != 2:
+            raise ValueError("Las pruebas de inclusión requieren format_version 2.")
+        levels = merkle_levels(hashes)
+        root = levels[-1].hex()
+        for index, entry in enumerate(files_list):
+            entry["index"] = index
+            entry["proof"] = inclusion_proof(levels, index)
+    else:
+        root = compute_merkle_root(hashes, version=version, workers=workers)
 
     return IntegrityReport(
         algorithm="SHA-256",
         merkle_root=root,
         files=files_list,
+        format_version=version,
+        base_dir=str(base_dir) if base_dir is not None else None,
     )
 
 
+def relative_posix(path: str | Path, base_dir: Path | None = None) -> str:
+    """Ruta canónica de una hoja: relativa a `base_dir` (si hay) y con '/'."""
+    path = Path(path)
+    if base_dir is not None:
+        path = path.relative_to(base_dir)
+    return path.as_posix()
+
+
+def path_sort_key(path: str) -> bytes:
+    """Orden canónico de las hojas: bytes UTF-8 de la ruta relativa."""
+    return path.encode("utf-8", "surrogateescape")
+
+
+def compute_merkle_root(hashes: List[str], version: int = DEFAULT_MERKLE_VERSION, workers: int = 1) -> str:
+    """Merkle root (hex) de una lista de hashes hex con la versión indicada."""
+    if version == 1:
+        return _build_merkle_root(hashes)
+    if version == 2:
+        return _build_merkle_root_v2(hashes, workers=workers)
+    raise ValueError(f"Versión de Merkle no soportada: {version!r}")
+
+
+def verify_integrity_report(report: Dict[str, Any]) -> bool:
+    """
+    Recalcula el Merkle root de un reporte ya cargado (JSON) y lo compara con
+    el guardado. Un reporte sin `format_version` es de la versión 1.
+    """
+    version = int(report.get("format_version", 1))
+    hashes = [entry["hash"] for entry in report.get("files", [])]
+    if not hashes:
+        return False
+    return compute_merkle_root(hashes, version=version) == str(report.get("merkle_root", "")).lower()
+
+
+class MerkleAccumulator:
+    """
+    Merkle root v2 en streaming, para listas que no caben en memoria (p. ej.
+    al escribir un manifiesto). Guarda solo las raíces de los subárboles
+    completos (como mucho log2 n) y da el mismo root que compute_merkle_root.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._stack: List[Tuple[int, bytes]] = []
+
+    def add(self, file_hash: str) -> None:
+        node = hashlib.sha256(LEAF_PREFIX + bytes.fromhex(file_hash)).digest()
+        height = 0
+        while self._stack and self._stack[-1][0] == height:
+            _, left = self._stack.pop()
+            node = hashlib.sha256(NODE_PREFIX + left + node).digest()
+            height += 1
+        self._stack.append((height, node))
+        self.count += 1
+
+    def root(self) -> str:
+        if not self._stack:
+            raise ValueError("No hay hashes para construir el Merkle root.")
+        node = self._stack[-1][1]
+        for _, left in reversed(self._stack[:-1]):
+            node = hashlib.sha256(NODE_PREFIX + left + node).digest()
+        return node.hex()
+
+
+# ---------------------------------------------------------------------------
+# Pruebas de inclusión (versión 2)
+# ---------------------------------------------------------------------------
+
+def merkle_levels(hashes: Sequence[str]) -> List[bytes]:
+    """Todos los niveles del árbol v2: [hojas, ..., raíz] (O(n) en memoria)."""
+    if not hashes:
+        raise ValueError("No hay hashes para construir el Merkle root.")
+    levels = [leaf_level(hashes)]
+    while len(levels[-1]) > DIGEST_SIZE:
+        levels.append(next_level(levels[-1]))
+    return levels
+
+
+def inclusion_proof(levels: List[bytes], index: int) -> List[str]:
+    """
+    Camino de auditoría de la hoja `index`: el hermano en cada nivel, de
+    abajo arriba. Los niveles donde el nodo sube sin hermano no aportan
+    nada, así que la prueba tiene como mucho ceil(log2 n) hashes.
+    """
+    count = len(levels[0]) // DIGEST_SIZE
+    if not 0 <= index < count:
+        raise IndexError(f"Hoja fuera de rango: {index} (hay {count}).")
+
+    proof: List[str] = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling * DIGEST_SIZE < len(level):
+            proof.append(level[sibling * DIGEST_SIZE:(sibling + 1) * DIGEST_SIZE].hex())
+        index //= 2
+    return proof
+
+
+def root_from_proof(file_hash: str, index: int, count: int, proof: Sequence[str]) -> str:
+    """
+    Recalcula la raíz v2 a partir del hash de un archivo, su posición, el
+    número total de hojas y su prueba de inclusión (O(log n)).
+    """
+    if not 0 <= index < count:
+        raise ValueError(f"Hoja fuera de rango: {index} (hay {count}).")
+
+    node = hashlib.sha256(LEAF_PREFIX + bytes.fromhex(file_hash)).digest()
+    siblings = iter(proof)
+    size = count
+    while size > 1:
+        if index % 2 == 1:
+            node = hashlib.sha256(NODE_PREFIX + bytes.fromhex(next(siblings)) + node).digest()
+        elif index + 1 < size:
+            node = hashlib.sha256(NODE_PREFIX + node + bytes.fromhex(next(siblings))).digest()
+        index //= 2
+        size = (size + 1) // 2
+
+    if next(siblings, None) is not None:
+        raise ValueError("La prueba de inclusión tiene hashes de más.")
+    return node.hex()
+
+
+def verify_inclusion(file_hash: str, index: int, count: int, proof: Sequence[str], root: str) -> bool:
+    """True si la prueba demuestra que `file_hash` es la hoja `index` del árbol con raíz `root`."""
+    try:
+        return root_from_proof(file_hash, index, count, proof) == root.lower()
+    except (ValueError, StopIteration):
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Versión 1
+# ---------------------------------------------------------------------------
+
 def _build_merkle_root(hashes: List[str]) -> str:
     """
     Construye un Merkle root simple a partir de una lista de hashes hex.
@@ -67,3 +257,66 @@ def _build_merkle_root(hashes: List[str]) -> str:
         current_level = next_level
 
     return current_level[0]
+
+
+# ---------------------------------------------------------------------------
+# Versión 2
+# ---------------------------------------------------------------------------
+
+def _build_merkle_root_v2(hashes: List[str], workers: int = 1) -> str:
+    """
+    Merkle root v2. Cada nivel es un único buffer contiguo de digests de 32
+    bytes (sin un objeto str por nodo). Con `workers` > 1 y al menos
+    PARALLEL_MIN_LEAVES hojas, el árbol se parte en un subárbol por worker
+    (tamaño potencia de dos) que se calcula en otro proceso; aquí solo se
+    combinan sus raíces.
+    """
+    if not hashes:
+        raise ValueError("No hay hashes para construir el Merkle root.")
+
+    if workers > 1 and len(hashes) >= PARALLEL_MIN_LEAVES:
+        per_worker = -(-len(hashes) // workers)
+        step = 1 << (per_worker - 1).bit_length()
+        chunks = [hashes[i:i + step] for i in range(0, len(hashes), step)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            level = b"".join(pool.map(_chunk_root, chunks))
+    else:
+        level = leaf_level(hashes)
+
+    return _subtree_root(level).hex()
+
+
+def leaf_level(hashes: List[str]) -> bytes:
+    """Nivel de hojas v2: sha256(0x00 || digest) por cada hash hex."""
+    sha256 = hashlib.sha256
+    fromhex = bytes.fromhex
+    try:
+        digests = [fromhex(h) for h in hashes]
+    except ValueError as e:
+        raise ValueError(f"Hash SHA-256 inválido: {e}") from e
+    if any(len(d) != DIGEST_SIZE for d in digests):
+        raise ValueError("Hash SHA-256 inválido: se esperan 32 bytes.")
+    return b"".join([sha256(LEAF_PREFIX + d).digest() for d in digests])
+
+
+def next_level(level: bytes) -> bytes:
+    """Nivel superior v2: sha256(0x01 || izq || der); el último impar sube tal cual."""
+    view = memoryview(level)
+    sha256 = hashlib.sha256
+    pair = 2 * DIGEST_SIZE
+    pairs_end = len(level) // pair * pair
+
+    parent = [sha256(NODE_PREFIX + view[i:i + pair]).digest() for i in range(0, pairs_end, pair)]
+    if pairs_end < len(level):
+        parent.append(view[pairs_end:].tobytes())
+    return b"".join(parent)
+
+
+def _chunk_root(hashes: List[str]) -> bytes:
+    return _subtree_root(leaf_level(hashes))
+
+
+def _subtree_root(level: bytes) -> bytes:
+    while len(level) > DIGEST_SIZE:
+        level = next_level(level)
+    return level
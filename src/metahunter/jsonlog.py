@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+# ---------------------------------------------------------------------------
+# Opcional: compresión zstd para la rotación (si no, solo gzip)
+# ---------------------------------------------------------------------------
+
+try:
+    import zstandard  # type: ignore[import]
+    _HAS_ZSTD = True
+except Exception:  # noqa: BLE001
+    zstandard = None  # type: ignore[assignment]
+    _HAS_ZSTD = False
+
+
+# Políticas de fsync:
+# - none: el SO decide cuándo persistir
+# - flush: fsync en cada vaciado del buffer
+# - close: un único fsync al cerrar el logger
+FSYNC_POLICIES = ("none", "flush", "close")
+
+COMPRESSIONS = ("gzip", "zstd")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def build_record(
+    run_id: str,
+    module: str,
+    level: str,
+    event: str,
+    details: Dict | None = None,
+) -> Dict[str, Any]:
+    return {
+        "timestamp": _now_iso(),
+        "run_id": run_id,
+        "module": module,
+        "level": level,
+        "event": event,
+        "details": details or {},
+    }
+
+
+def append_event(
+    log_path: Path,
+    run_id: str,
+    module: str,
+    level: str,
+    event: str,
+    details: Dict | None = None,
+) -> None:
+    """
+    Escribe un único evento (open + write + close). Para muchos eventos
+    usar JsonlLogger, que los agrupa en un buffer.
+    """
+    record = build_record(run_id, module, level, event, details)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class JsonlLogger:
+    """
+    Logger JSONL por ejecución con buffer de escritura.
+
+    - Los eventos se acumulan y se escriben juntos cuando hay `flush_size`
+      pendientes o han pasado `flush_interval` segundos (hilo de fondo).
+    - Seguro entre hilos (lock).
+    - Rotación opcional al superar `rotate_bytes`, comprimiendo el archivo
+      rotado con gzip o zstd. El renombrado se hace con el lock tomado y la
+      compresión fuera de él, para no bloquear a los hilos que registran.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        run_id: str,
+        flush_interval: float = 1.0,
+        flush_size: int = 256,
+        fsync: str = "none",
+        rotate_bytes: int | None = None,
+        compress: str | None = None,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync desconocida: {fsync!r}")
+        if compress is not None and compress not in COMPRESSIONS:
+            raise ValueError(f"Compresión desconocida: {compress!r}")
+        if compress == "zstd" and not _HAS_ZSTD:
+            raise ValueError("La compresión zstd requiere el paquete 'zstandard'.")
+
+        self.log_path = log_path
+        self.run_id = run_id
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, flush_size)
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.compress = compress
+
+        self._buffer: List[str] = []
+        self._rotated: List[Path] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = log_path.open("a", encoding="utf-8")
+
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if flush_interval and flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    # ------------------------------------------------------------------
+    # Context manager
+    # ------------------------------------------------------------------
+
+    def __enter__(self) -> "JsonlLogger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def event(
+        self,
+        module: str,
+        level: str,
+        event: str,
+        details: Dict | None = None,
+    ) -> None:
+        self.write_record(build_record(self.run_id, module, level, event, details))
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._closed:
+                raise ValueError("El logger ya está cerrado.")
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_size:
+                self._flush_locked()
+        self._compress_rotated()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+        self._compress_rotated()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            if self.fsync == "close":
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._closed = True
+        self._compress_rotated()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        self._file.write("".join(self._buffer))
+        self._buffer.clear()
+        self._file.flush()
+        if self.fsync == "flush":
+            os.fsync(self._file.fileno())
+        if self.rotate_bytes and self._file.tell() >= self.rotate_bytes:
+            self._rotate_locked()
+
+    def _rotate_locked(self) -> None:
+        self._file.close()
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        rotated = self.log_path.with_name(f"{self.log_path.name}.{stamp}")
+        os.replace(self.log_path, rotated)
+        if self.compress is not None:
+            self._rotated.append(rotated)
+
+        self._file = self.log_path.open("a", encoding="utf-8")
+
+    def _compress_rotated(self) -> None:
+        """Comprime los archivos rotados pendientes, sin tener el lock."""
+        while self._rotated:
+            with self._lock:
+                if not self._rotated:
+                    return
+                rotated = self._rotated.pop(0)
+
+            if self.compress == "gzip":
+                with rotated.open("rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                with rotated.open("rb") as src, open(f"{rotated}.zst", "wb") as dst:
+                    zstandard.ZstdCompressor().copy_stream(src, dst)
+            rotated.unlink()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            with self._lock:
+                if self._closed:
+                    return
+                self._flush_locked()
+            self._compress_rotated()
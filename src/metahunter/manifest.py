@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Sequence, Tuple
+
+from .integrity import MerkleAccumulator, path_sort_key
+
+# Manifiesto canónico de integridad (JSONL, se escribe y se lee en streaming):
+#   1ª línea: cabecera {"format", "version", "algorithm", "base_dir"}
+#   una línea por archivo {"path", "size", "sha256"}, rutas relativas POSIX
+#   ordenadas por bytes UTF-8
+#   última línea: {"files", "merkle_version", "merkle_root"} (árbol v2)
+MANIFEST_FORMAT = "metahunter-manifest"
+MANIFEST_VERSION = 1
+
+# (ruta relativa, tamaño, sha256 hex)
+Entry = Tuple[str, int, str]
+
+
+class ManifestWriter:
+    """
+    Escribe un manifiesto canónico a partir de entradas YA ordenadas
+    (comprueba el orden sobre la marcha). Memoria O(log n): el Merkle root
+    se calcula en streaming.
+    """
+
+    def __init__(self, path: Path, base_dir: Path | None = None) -> None:
+        self.path = path
+        self.base_dir = base_dir
+        self._tmp_path = path.with_name(path.name + ".tmp")
+        self._merkle = MerkleAccumulator()
+        self._last_key: bytes | None = None
+        self._f = None
+
+    def __enter__(self) -> "ManifestWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self._tmp_path.open("w", encoding="utf-8", newline="\n")
+        self._write_line({
+            "format": MANIFEST_FORMAT,
+            "version": MANIFEST_VERSION,
+            "algorithm": "SHA-256",
+            "base_dir": str(self.base_dir) if self.base_dir is not None else None,
+        })
+        return self
+
+    def write(self, rel_path: str, size: int, sha256: str) -> None:
+        key = path_sort_key(rel_path)
+        if self._last_key is not None and key <= self._last_key:
+            raise ValueError(f"Manifiesto desordenado o con rutas repetidas en {rel_path!r}")
+        self._last_key = key
+        self._merkle.add(sha256)
+        self._write_line({"path": rel_path, "size": size, "sha256": sha256})
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self._write_line({
+                    "files": self._merkle.count,
+                    "merkle_version": 2,
+                    "merkle_root": self._merkle.root() if self._merkle.count else None,
+                })
+        finally:
+            self._f.close()
+        if exc_type is None:
+            os.replace(self._tmp_path, self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+    @property
+    def merkle_root(self) -> str | None:
+        return self._merkle.root() if self._merkle.count else None
+
+    def _write_line(self, record: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def write_manifest(path: Path, entries: Iterable[Entry], base_dir: Path | None = None) -> str | None:
+    """Ordena las entradas y escribe el manifiesto; devuelve el Merkle root."""
+    with ManifestWriter(path, base_dir=base_dir) as writer:
+        for rel_path, size, sha256 in sorted(entries, key=lambda e: path_sort_key(e[0])):
+            writer.write(rel_path, size, sha256)
+    return writer.merkle_root
+
+
+def read_header(path: Path) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+    if header.get("format") != MANIFEST_FORMAT or header.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path} no es un manifiesto de integridad v{MANIFEST_VERSION}.")
+    return header
+
+
+def iter_manifest(path: Path) -> Iterator[Entry]:
+    """Entradas del manifiesto en orden, sin cargarlo entero en memoria."""
+    read_header(path)
+    with path.open("r", encoding="utf-8") as f:
+        f.readline()
+        for line in f:
+            record = json.loads(line)
+            if "path" in record:
+                yield record["path"], int(record["size"]), record["sha256"]
+
+
+# ---------------------------------------------------------------------------
+# Diferencias entre manifiestos
+# ---------------------------------------------------------------------------
+
+def diff_manifests(old: Iterable[Entry], new: Iterable[Entry]) -> Iterator[Tuple[str, str, Entry | None, Entry | None]]:
+    """
+    Compara dos listas de entradas ordenadas en una sola pasada (merge join,
+    O(n + m)). Devuelve (estado, ruta, entrada antigua, entrada nueva) con
+    estado "added", "removed" o "changed"; las iguales se omiten.
+    """
+    old_it, new_it = _checked(old), _checked(new)
+    a, b = next(old_it, None), next(new_it, None)
+
+    while a is not None or b is not None:
+        if b is None or (a is not None and path_sort_key(a[0]) < path_sort_key(b[0])):
+            yield "removed", a[0], a, None
+            a = next(old_it, None)
+        elif a is None or path_sort_key(b[0]) < path_sort_key(a[0]):
+            yield "added", b[0], None, b
+            b = next(new_it, None)
+        else:
+            if a[1:] != b[1:]:
+                yield "changed", a[0], a, b
+            a, b = next(old_it, None), next(new_it, None)
+
+
+def _checked(entries: Iterable[Entry]) -> Iterator[Entry]:
+    last: bytes | None = None
+    for entry in entries:
+        key = path_sort_key(entry[0])
+        if last is not None and key <= last:
+            raise ValueError(f"Manifiesto desordenado o con rutas repetidas en {entry[0]!r}")
+        last = key
+        yield entry
+
+
+# ---------------------------------------------------------------------------
+# CLI: metahunter diff
+# ---------------------------------------------------------------------------
+
+_MARKS = {"added": "+", "removed": "-", "changed": "M"}
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="metahunter diff",
+        description="Diferencias entre dos manifiestos de integridad (--integrity-manifest).",
+    )
+    parser.add_argument("old", type=Path, help="Manifiesto anterior.")
+    parser.add_argument("new", type=Path, help="Manifiesto nuevo.")
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Una línea JSON por diferencia en lugar de texto.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    counts = {"added": 0, "removed": 0, "changed": 0}
+
+    for status, rel_path, a, b in diff_manifests(iter_manifest(args.old), iter_manifest(args.new)):
+        counts[status] += 1
+        if args.json:
+            print(json.dumps({
+                "status": status,
+                "path": rel_path,
+                "old_sha256": a[2] if a else None,
+                "new_sha256": b[2] if b else None,
+            }, ensure_ascii=False))
+        else:
+            print(f"{_MARKS[status]} {rel_path}")
+
+    if not args.json:
+        print(f"[diff] {counts['added']} añadidos, {counts['removed']} eliminados, {counts['changed']} modificados")
+    return 1 if any(counts.values()) else 0
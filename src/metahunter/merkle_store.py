@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .integrity import DIGEST_SIZE, LEAF_PREFIX, NODE_PREFIX, inclusion_proof, next_level
+
+# Nombre por defecto del almacén, dentro de --output-dir.
+DEFAULT_STORE_NAME = ".metahunter_merkle.bin"
+
+STORE_VERSION = 1
+
+# Cabecera: magic, versión, nº de hojas, tamaño del bloque de rutas.
+_HEADER = struct.Struct("<4sB3xQQ")
+_MAGIC = b"MHMS"
+
+# Separador de rutas en el archivo: NUL no puede aparecer en una ruta.
+_PATH_SEP = b"\x00"
+
+
+class MerkleStore:
+    """
+    Árbol Merkle v2 persistente (mismo árbol que integrity.merkle_levels)
+    con las hojas ordenadas por ruta relativa.
+
+    Formato del archivo (little endian):
+      cabecera | rutas UTF-8 separadas por NUL | digests de archivo (n × 32)
+      | nivel 0 (hojas) | nivel 1 | ... | raíz
+
+    Cambiar el hash de un archivo existente o añadir rutas que quedan al
+    final recalcula solo los nodos en el camino a la raíz (O(log n) por
+    hoja) y, al guardar, esos nodos se escriben en su sitio dentro del
+    archivo. Insertar o borrar rutas en medio desplaza las hojas
+    posteriores: se recalcula desde la primera posición afectada y el
+    archivo se reescribe (de forma atómica).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.paths: List[str] = []
+        self.digests = bytearray()
+        self.levels: List[bytearray] = []
+        # Cambios pendientes de guardar: (bloque, índice) de 32 bytes, donde
+        # el bloque -1 son los digests y el resto el nivel del árbol.
+        self._dirty_slots: Set[Tuple[int, int]] = set()
+        self._rewrite = False
+        self._paths_size = 0
+        self._load()
+
+    # -----------------------------------------------------------------------
+    # Lectura
+    # -----------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def root(self) -> str | None:
+        return bytes(self.levels[-1]).hex() if self.paths else None
+
+    def get(self, rel_path: str) -> str | None:
+        i = self._index(rel_path)
+        return None if i is None else self.digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE].hex()
+
+    def proof(self, rel_path: str) -> Tuple[int, int, List[str]]:
+        """(índice, nº de hojas, prueba de inclusión) de una ruta."""
+        i = self._index(rel_path)
+        if i is None:
+            raise KeyError(rel_path)
+        return i, len(self.paths), inclusion_proof(self.levels, i)
+
+    def _index(self, rel_path: str) -> int | None:
+        i = bisect_left(self.paths, rel_path)
+        return i if i < len(self.paths) and self.paths[i] == rel_path else None
+
+    # -----------------------------------------------------------------------
+    # Cambios
+    # -----------------------------------------------------------------------
+
+    def apply(self, updates: Dict[str, str], deletes: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Aplica un lote de cambios { ruta relativa: sha256 hex } y borrados,
+        y recalcula solo los nodos afectados. Devuelve el recuento de hojas
+        añadidas, actualizadas y borradas.
+        """
+        n = len(self.paths)
+        counts = {"added": 0, "updated": 0, "deleted": 0}
+        dirty: Set[int] = set()
+        inserts: Dict[str, bytes] = {}
+
+        for rel_path, digest_hex in updates.items():
+            digest = _digest(digest_hex)
+            i = self._index(rel_path)
+            if i is None:
+                inserts[rel_path] = digest
+            elif self.digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE] != digest:
+                self._set_leaf(i, digest)
+                dirty.add(i)
+                counts["updated"] += 1
+
+        removed = {i for i in map(self._index, deletes) if i is not None}
+        for i in removed:
+            dirty.discard(i)
+        counts["deleted"] = len(removed)
+        counts["added"] = len(inserts)
+
+        tail = None
+        if inserts or removed:
+            first_insert = min(bisect_left(self.paths, p) for p in inserts) if inserts else n
+            tail = min([first_insert] + list(removed))
+            self._rebuild_suffix(tail, inserts, removed)
+            dirty = {i for i in dirty if i < tail}
+
+        if dirty or tail is not None:
+            self._recompute(dirty, tail)
+        return counts
+
+    def _set_leaf(self, i: int, digest: bytes) -> None:
+        pos = slice(i * DIGEST_SIZE, (i + 1) * DIGEST_SIZE)
+        self.digests[pos] = digest
+        self.levels[0][pos] = hashlib.sha256(LEAF_PREFIX + digest).digest()
+        self._dirty_slots.update(((-1, i), (0, i)))
+
+    def _rebuild_suffix(self, tail: int, inserts: Dict[str, bytes], removed: Set[int]) -> None:
+        """
+        Reconstruye rutas, digests y hojas desde `tail`: los tramos sin
+        cambios entre inserciones/borrados se copian como slices (O(k)
+        operaciones en Python para k cambios, más la copia en bloque).
+        """
+        old_paths = self.paths
+        old_digests = self.digests
+        old_leaves = self.levels[0] if self.levels else bytearray()
+
+        if not removed and tail == len(old_paths):
+            # Solo rutas nuevas detrás de todas las existentes (o almacén vacío)
+            new_paths = sorted(inserts)
+            sha256 = hashlib.sha256
+            new_digests = [inserts[p] for p in new_paths]
+            self.paths = old_paths + new_paths
+            self.digests = old_digests + b"".join(new_digests)
+            leaves = old_leaves + b"".join([sha256(LEAF_PREFIX + d).digest() for d in new_digests])
+            self.levels[:1] = [leaves]
+            self._rewrite = True
+            return
+
+        # (posición en la lista antigua, 0 = insertar antes / 1 = borrar, ruta)
+        events = sorted(
+            [(bisect_left(old_paths, p), 0, p) for p in inserts]
+            + [(i, 1, "") for i in removed]
+        )
+
+        paths = old_paths[:tail]
+        digests = [old_digests[:tail * DIGEST_SIZE]]
+        leaves = [old_leaves[:tail * DIGEST_SIZE]]
+        cursor = tail
+        for pos, kind, rel_path in events:
+            paths.extend(old_paths[cursor:pos])
+            digests.append(old_digests[cursor * DIGEST_SIZE:pos * DIGEST_SIZE])
+            leaves.append(old_leaves[cursor * DIGEST_SIZE:pos * DIGEST_SIZE])
+            cursor = pos
+            if kind == 0:
+                digest = inserts[rel_path]
+                paths.append(rel_path)
+                digests.append(digest)
+                leaves.append(hashlib.sha256(LEAF_PREFIX + digest).digest())
+            else:
+                cursor = pos + 1
+        paths.extend(old_paths[cursor:])
+        digests.append(old_digests[cursor * DIGEST_SIZE:])
+        leaves.append(old_leaves[cursor * DIGEST_SIZE:])
+
+        self.paths = paths
+        self.digests = bytearray(b"".join(digests))
+        # Los niveles superiores conservan su prefijo (nodos anteriores a
+        # `tail`); _recompute reemplaza el resto.
+        if self.levels:
+            self.levels[0] = bytearray(b"".join(leaves))
+        else:
+            self.levels = [bytearray(b"".join(leaves))]
+        # Cambia el número de hojas: los offsets del archivo se desplazan
+        self._rewrite = True
+
+    def _recompute(self, dirty: Set[int], tail: int | None) -> None:
+        """
+        Sube nivel a nivel recalculando los padres de los nodos modificados
+        (`dirty`) y, si hay `tail`, todos los nodos a partir de esa posición.
+        """
+        level_no = 0
+        if not self.paths:
+            self.levels = []
+            return
+
+        while len(self.levels[level_no]) > DIGEST_SIZE:
+            child = self.levels[level_no]
+            count = len(child) // DIGEST_SIZE
+            parent_count = (count + 1) // 2
+
+            if level_no + 1 >= len(self.levels):
+                self.levels.append(bytearray())
+            parent = self.levels[level_no + 1]
+
+            parent_dirty = {i // 2 for i in dirty}
+            if tail is not None:
+                start = tail // 2
+                parent[start * DIGEST_SIZE:] = next_level(bytes(child[start * 2 * DIGEST_SIZE:]))
+                parent_dirty = {j for j in parent_dirty if j < start}
+                tail = start
+            for j in parent_dirty:
+                parent[j * DIGEST_SIZE:(j + 1) * DIGEST_SIZE] = _node(child, j, count)
+                self._dirty_slots.add((level_no + 1, j))
+
+            if len(parent) != parent_count * DIGEST_SIZE:
+                raise AssertionError("Nivel Merkle con tamaño inconsistente.")
+            dirty = parent_dirty
+            level_no += 1
+
+        del self.levels[level_no + 1:]
+
+    # -----------------------------------------------------------------------
+    # Persistencia
+    # -----------------------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return
+        if len(data) < _HEADER.size:
+            raise ValueError(f"Almacén Merkle truncado: {self.path}")
+        magic, version, count, paths_size = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != STORE_VERSION:
+            raise ValueError(f"{self.path} no es un almacén Merkle v{STORE_VERSION}.")
+
+        self._paths_size = paths_size
+        pos = _HEADER.size
+        blob = data[pos:pos + paths_size]
+        self.paths = blob.decode("utf-8").split("\0") if count else []
+        pos += paths_size
+
+        self.digests = bytearray(data[pos:pos + count * DIGEST_SIZE])
+        pos += count * DIGEST_SIZE
+        size = count
+        while size:
+            self.levels.append(bytearray(data[pos:pos + size * DIGEST_SIZE]))
+            pos += size * DIGEST_SIZE
+            size = 0 if size == 1 else (size + 1) // 2
+
+        if len(self.paths) != count or pos != len(data):
+            raise ValueError(f"Almacén Merkle corrupto: {self.path}")
+
+    def save(self) -> None:
+        """
+        Guarda los cambios. Si solo cambiaron hashes (mismas rutas), se
+        escriben únicamente los bloques de 32 bytes modificados; si no, el
+        archivo se reescribe completo de forma atómica.
+        """
+        if self._rewrite or not self.path.exists():
+            self._write_all()
+        elif self._dirty_slots:
+            self._write_dirty()
+        self._dirty_slots.clear()
+        self._rewrite = False
+
+    def _write_all(self) -> None:
+        blob = _PATH_SEP.join(p.encode("utf-8") for p in self.paths)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(_HEADER.pack(_MAGIC, STORE_VERSION, len(self.paths), len(blob)))
+            f.write(blob)
+            f.write(self.digests)
+            for level in self.levels:
+                f.write(level)
+        os.replace(tmp_path, self.path)
+        self._paths_size = len(blob)
+
+    def _write_dirty(self) -> None:
+        block_offsets = [_HEADER.size + self._paths_size]
+        for block in [self.digests] + self.levels:
+            block_offsets.append(block_offsets[-1] + len(block))
+
+        with self.path.open("r+b") as f:
+            for block_no, i in sorted(self._dirty_slots):
+                block = self.digests if block_no < 0 else self.levels[block_no]
+                f.seek(block_offsets[block_no + 1] + i * DIGEST_SIZE)
+                f.write(block[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])
+
+
+def update_store(
+    path: Path,
+    base_dir: Path,
+    file_hashes: Dict[str, str],
+    seen: Set[str] | None = None,
+    recursive: bool = True,
+) -> Tuple[MerkleStore, Dict[str, int]]:
+    """
+    Aplica al almacén los hashes de una ejecución ({ ruta absoluta: sha256 }
+    de archivos bajo `base_dir`) y lo guarda.
+
+    `seen` son las rutas relativas que el recorrido vio en esta ejecución
+    (con o sin error): las rutas del almacén que no están ahí se borran, sin
+    consultar el disco. Sin `seen` (ejecución con filtros, que no recorre todo
+    el directorio) no se borra nada. Con `recursive=False` el recorrido solo
+    ve el primer nivel y solo se borran rutas de ese nivel.
+    """
+    store = MerkleStore(path)
+    updates = {Path(p).relative_to(base_dir).as_posix(): h for p, h in file_hashes.items()}
+    gone: List[str] = []
+    if seen is not None:
+        gone = [rel for rel in store.paths if rel not in seen and (recursive or "/" not in rel)]
+    counts = store.apply(updates, gone)
+    store.save()
+    return store, counts
+
+
+def _node(child: bytearray, j: int, count: int) -> bytes:
+    left = 2 * j
+    if left + 1 >= count:
+        return bytes(child[left * DIGEST_SIZE:(left + 1) * DIGEST_SIZE])
+    return hashlib.sha256(NODE_PREFIX + child[left * DIGEST_SIZE:(left + 2) * DIGEST_SIZE]).digest()
+
+
+def _digest(digest_hex: str) -> bytes:
+    digest = bytes.fromhex(digest_hex)
+    if len(digest) != DIGEST_SIZE:
+        raise ValueError(f"Hash SHA-256 inválido: {digest_hex!r}")
+    return digest
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import shutil
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .hashio import CHUNK_SIZE, HashingReader, HashingWriter
+
+# Miembros con metadatos del documento y su contenido mínimo válido
+# (mismos namespaces raíz, sin propiedades).
+DOC_PROPS_MEMBERS: Dict[str, bytes] = {
+    "docProps/core.xml": (
+        b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        b'<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"'
+        b' xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/"'
+        b' xmlns:dcmitype="http://purl.org/dc/dcmitype/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"/>'
+    ),
+    "docProps/app.xml": (
+        b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        b'<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"'
+        b' xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes"/>'
+    ),
+    "docProps/custom.xml": (
+        b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        b'<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/custom-properties"'
+        b' xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes"/>'
+    ),
+}
+
+# Límite de tamaño (descomprimido) para leer un docProps: son XML de pocos KB.
+MAX_PROPS_SIZE = 1024 * 1024
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+
+_LOCAL_SIG = b"PK\x03\x04"
+_CENTRAL_SIG = b"PK\x01\x02"
+_END_SIG = b"PK\x05\x06"
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_ZIP64_EXTRA_ID = 0x0001
+_ZIP32_LIMIT = 0xFFFFFFFF
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+def is_ooxml(path: Path) -> bool:
+    """Un ZIP es un paquete OOXML si tiene [Content_Types].xml (solo lee el directorio central)."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            zf.getinfo("[Content_Types].xml")
+    except (KeyError, zipfile.BadZipFile, OSError):
+        return False
+    return True
+
+
+def read_doc_props(path: Path) -> Dict[str, bytes]:
+    """
+    Devuelve el contenido de los docProps presentes en el documento.
+
+    ZipFile solo lee el directorio central (al final del archivo) y después
+    los miembros pedidos; el resto del documento no se toca.
+    """
+    props: Dict[str, bytes] = {}
+    with zipfile.ZipFile(path) as zf:
+        for name in DOC_PROPS_MEMBERS:
+            try:
+                info = zf.getinfo(name)
+            except KeyError:
+                continue
+            if info.file_size <= MAX_PROPS_SIZE:
+                props[name] = zf.read(info)
+    return props
+
+
+# ---------------------------------------------------------------------------
+# Limpieza
+# ---------------------------------------------------------------------------
+
+def strip_doc_props(input_path: Path, out: HashingWriter) -> Tuple[str, int, str]:
+    """
+    Escribe en `out` una copia del documento con los docProps vaciados.
+
+    Los demás miembros se copian con sus bytes comprimidos tal cual (sin
+    descomprimir ni recomprimir); solo se reescriben las cabeceras locales
+    (sin data descriptor, bit 3 a cero) y el directorio central con los
+    nuevos offsets. El RAW se lee secuencialmente una sola vez y se hashea
+    al vuelo.
+
+    Devuelve (sha256 RAW, bytes leídos, modo) con modo "ooxml" o, si el ZIP
+    usa extensiones ZIP64, "ooxml-zipfile" (reescritura con zipfile).
+    """
+    with zipfile.ZipFile(input_path) as zf:
+        infos = zf.infolist()
+        comment = zf.comment
+
+    if _needs_zip64(input_path, infos):
+        return _rewrite_with_zipfile(input_path, out)
+
+    central: List[bytes] = []
+    with input_path.open("rb") as f:
+        reader = HashingReader(f)
+        for info in sorted(infos, key=lambda i: i.header_offset):
+            # Hueco hasta la cabecera local (data descriptor anterior, etc.)
+            _skip(reader, info.header_offset - reader.bytes_read)
+
+            header = reader.read(_LOCAL_HEADER.size)
+            if len(header) != _LOCAL_HEADER.size or not header.startswith(_LOCAL_SIG):
+                raise ValueError(f"Cabecera local ZIP inválida en {info.filename!r}")
+            fields = _LOCAL_HEADER.unpack(header)
+            name = reader.read(fields[9])
+            extra = reader.read(fields[10])
+
+            offset = out.bytes_written
+            replacement = DOC_PROPS_MEMBERS.get(info.filename)
+            if replacement is not None:
+                _skip(reader, info.compress_size)
+                data = _deflate(replacement)
+                flags = info.flag_bits & _FLAG_UTF8
+                method, version = zipfile.ZIP_DEFLATED, 20
+                crc, csize, usize = zlib.crc32(replacement), len(data), len(replacement)
+                extra = b""
+                out.write(_local_header(version, flags, method, info, crc, csize, usize, name, extra))
+                out.write(data)
+            else:
+                flags = info.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+                method, version = info.compress_type, info.extract_version
+                crc, csize, usize = info.CRC, info.compress_size, info.file_size
+                out.write(_local_header(version, flags, method, info, crc, csize, usize, name, extra))
+                _copy(reader, out, csize)
+
+            central.append(
+                _central_header(info, version, flags, method, crc, csize, usize, name, offset)
+            )
+
+        # Directorio central original y lo que haya detrás: solo se hashea
+        reader.drain()
+
+    cd_offset = out.bytes_written
+    for record in central:
+        out.write(record)
+    cd_size = out.bytes_written - cd_offset
+    out.write(_END_RECORD.pack(
+        _END_SIG, 0, 0, len(central), len(central), cd_size, cd_offset, len(comment),
+    ))
+    out.write(comment)
+
+    return reader.hexdigest(), reader.bytes_read, "ooxml"
+
+
+def _needs_zip64(input_path: Path, infos: List[zipfile.ZipInfo]) -> bool:
+    if len(infos) >= 0xFFFF or input_path.stat().st_size >= _ZIP32_LIMIT:
+        return True
+    for info in infos:
+        if max(info.file_size, info.compress_size, info.header_offset) >= _ZIP32_LIMIT:
+            return True
+        if _ZIP64_EXTRA_ID in _extra_ids(info.extra):
+            return True
+    return False
+
+
+def _extra_ids(extra: bytes) -> List[int]:
+    ids = []
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<2H", extra, pos)
+        ids.append(header_id)
+        pos += 4 + size
+    return ids
+
+
+def _dos_datetime(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+    return dos_time, dos_date
+
+
+def _local_header(version, flags, method, info, crc, csize, usize, name, extra) -> bytes:
+    dos_time, dos_date = _dos_datetime(info.date_time)
+    return _LOCAL_HEADER.pack(
+        _LOCAL_SIG, version, flags, method, dos_time, dos_date,
+        crc, csize, usize, len(name), len(extra),
+    ) + name + extra
+
+
+def _central_header(info, version, flags, method, crc, csize, usize, name, offset) -> bytes:
+    dos_time, dos_date = _dos_datetime(info.date_time)
+    return _CENTRAL_HEADER.pack(
+        _CENTRAL_SIG, info.create_version | info.create_system << 8, version, flags, method,
+        dos_time, dos_date, crc, csize, usize, len(name), len(info.extra), len(info.comment),
+        0, info.internal_attr, info.external_attr, offset,
+    ) + name + info.extra + info.comment
+
+
+def _deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _skip(reader: HashingReader, size: int) -> None:
+    if size < 0:
+        raise ValueError("Miembros ZIP solapados o desordenados.")
+    while size > 0:
+        chunk = reader.read(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("ZIP truncado.")
+        size -= len(chunk)
+
+
+def _copy(reader: HashingReader, out: HashingWriter, size: int) -> None:
+    while size > 0:
+        chunk = reader.read(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("ZIP truncado.")
+        out.write(chunk)
+        size -= len(chunk)
+
+
+def _rewrite_with_zipfile(input_path: Path, out: HashingWriter) -> Tuple[str, int, str]:
+    """
+    Respaldo para ZIP64: reescritura miembro a miembro con zipfile (en
+    streaming, pero descomprimiendo y recomprimiendo cada miembro).
+    """
+    with input_path.open("rb") as f:
+        raw = HashingReader(f)
+        raw.drain()
+
+    with zipfile.ZipFile(input_path) as zin, zipfile.ZipFile(out, "w") as zout:
+        zout.comment = zin.comment
+        for info in zin.infolist():
+            target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            target.compress_type = info.compress_type
+            target.external_attr = info.external_attr
+            target.create_system = info.create_system
+
+            replacement = DOC_PROPS_MEMBERS.get(info.filename)
+            if replacement is not None:
+                zout.writestr(target, replacement)
+                continue
+
+            target.file_size = info.file_size
+            with zin.open(info) as src, zout.open(target, "w", force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    return raw.hexdigest(), raw.bytes_read, "ooxml-zipfile"
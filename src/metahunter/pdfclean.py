@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import zlib
+from io import BytesIO
+from typing import Dict, List, Set, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+from .hashio import CHUNK_SIZE, HashingWriter, SeekableHashingReader
+
+# Modos de limpieza de PDF:
+# - full: reconstruye el documento desde el árbol de páginas con PdfWriter
+#   (descarta revisiones incrementales antiguas y objetos huérfanos).
+# - fast: copia cada objeto vivo tal cual (incluidas las object streams) y
+#   solo re-serializa los objetos con metadatos; vuelve a `full` si no puede.
+PDF_MODES = ("full", "fast")
+
+# Claves que se eliminan del catálogo y de las páginas: XMP y datos
+# privados de la aplicación que generó el PDF.
+PAGE_METADATA_KEYS = ("/Metadata", "/PieceInfo")
+
+# Claves de /Params de un archivo embebido (fechas, checksum...).
+_EMBEDDED_STRIP_KEYS = ("/Params", "/Metadata")
+
+# Claves estándar del diccionario Info: un diccionario sin /Type que solo
+# tiene estas claves es un Info de una revisión anterior.
+_INFO_KEYS = {
+    "/Title", "/Author", "/Subject", "/Keywords", "/Creator", "/Producer",
+    "/CreationDate", "/ModDate", "/Trapped", "/Company", "/SourceModified",
+}
+
+
+class FastRewriteUnsupported(Exception):
+    """El PDF necesita el modo `full` (cifrado, metadatos en object streams...)."""
+
+
+def rewrite_pdf_fast(src: SeekableHashingReader, out: HashingWriter) -> None:
+    """
+    Escribe en `out` el PDF de `src` sin Info, XMP del catálogo, metadatos
+    de página ni /Params de archivos embebidos.
+
+    PdfReader sobre el archivo abierto solo lee la xref y los objetos que se
+    piden; cada objeto se parsea (uno a la vez, sin caché) para saber dónde
+    termina y se copian sus bytes originales. Solo se re-serializan los
+    objetos modificados, y se escribe una xref nueva (tabla clásica, o xref
+    stream si el original usa object streams).
+
+    E/S del RAW: el acceso es aleatorio y no se evitan las relecturas. La
+    xref y el árbol de páginas se leen al buscar los metadatos, y cada
+    objeto copiado se lee al parsearlo (para saber dónde termina) y otra vez
+    al copiarlo, en total unas 2-3 veces el tamaño del archivo (casi todo
+    desde la caché de páginas; `src.bytes_read` lo cuenta). El hash del RAW
+    sí va sin pasada extra: avanza con esas lecturas en orden de offset y
+    solo se leen aparte los huecos que no se copian (objetos eliminados,
+    xref antigua).
+    """
+    reader = PdfReader(src)
+    if reader.is_encrypted:
+        raise FastRewriteUnsupported("PDF cifrado")
+
+    trailer = reader.trailer
+    compressed = reader.xref_objStm
+
+    modified: Dict[int, DictionaryObject] = {}
+    dropped: Set[int] = set()
+
+    info_ref = trailer.raw_get("/Info")
+    if isinstance(info_ref, IndirectObject):
+        dropped.add(info_ref.idnum)
+
+    root_ref = trailer.raw_get("/Root")
+    root = root_ref.get_object()
+    _strip_object(root_ref, root, modified, dropped)
+    _strip_pages(root.get("/Pages"), modified, dropped, set())
+    _strip_embedded_files(root_ref, root, modified)
+
+    inside_objstm = sorted(n for n in set(modified) | dropped if n in compressed)
+    if inside_objstm:
+        raise FastRewriteUnsupported(f"metadatos dentro de object streams: {inside_objstm}")
+
+    # Objetos vivos sin comprimir, en el orden en que aparecen en el archivo
+    live: List[Tuple[int, int, int]] = []
+    for gen, entries in reader.xref.items():
+        free = reader.xref_free_entry.get(gen, {})
+        for num, offset in entries.items():
+            if num == 0 or free.get(num) or num in compressed or num in dropped:
+                continue
+            live.append((offset, num, gen))
+    live.sort()
+
+    src.seek(0)
+    header = src.readline(32).rstrip(b"\r\n")
+    out.write(header + b"\n%\xe2\xe3\xcf\xd3\n")
+
+    # Los objetos ya resueltos se vuelven a leer del archivo para conocer
+    # dónde terminan; los modificados se conservan en `modified`.
+    reader.resolved_objects.clear()
+
+    offsets: Dict[int, Tuple[int, int]] = {}
+    for start, num, gen in live:
+        src.hash_until(start)
+        if num in modified:
+            offsets[num] = (out.bytes_written, gen)
+            _write_object(out, num, gen, modified[num])
+            continue
+
+        reader.resolved_objects.pop((gen, num), None)
+        obj = reader.get_object(IndirectObject(num, gen, reader))
+        end = src.tell()
+        # Sin caché: memoria acotada por el objeto más grande
+        reader.resolved_objects.pop((gen, num), None)
+
+        if isinstance(obj, StreamObject) and obj.get("/Type") == "/XRef":
+            continue  # la xref antigua se sustituye por la nueva
+        if _is_stale_info(obj):
+            continue
+
+        offsets[num] = (out.bytes_written, gen)
+        _copy_range(src, out, start, end)
+        out.write(b"\nendobj\n")
+
+    size = max([int(trailer.get("/Size", 0))] + [n + 1 for n in offsets] + [n + 1 for n in compressed])
+    new_trailer = DictionaryObject({NameObject("/Root"): root_ref})
+    if "/ID" in trailer:
+        new_trailer[NameObject("/ID")] = trailer.raw_get("/ID")
+
+    if compressed:
+        _write_xref_stream(out, offsets, compressed, size, new_trailer)
+    else:
+        _write_xref_table(out, offsets, size, new_trailer)
+
+
+# ---------------------------------------------------------------------------
+# Objetos a modificar
+# ---------------------------------------------------------------------------
+
+def _strip_object(
+    ref: IndirectObject,
+    obj: DictionaryObject,
+    modified: Dict[int, DictionaryObject],
+    dropped: Set[int],
+) -> None:
+    changed = False
+    for key in PAGE_METADATA_KEYS:
+        if key not in obj:
+            continue
+        value = obj.raw_get(key)
+        if isinstance(value, IndirectObject):
+            dropped.add(value.idnum)
+        del obj[key]
+        changed = True
+    if changed:
+        modified[ref.idnum] = obj
+
+
+def _strip_pages(
+    node_ref,
+    modified: Dict[int, DictionaryObject],
+    dropped: Set[int],
+    seen: Set[int],
+) -> None:
+    if not isinstance(node_ref, IndirectObject) or node_ref.idnum in seen:
+        return
+    seen.add(node_ref.idnum)
+
+    node = node_ref.get_object()
+    _strip_object(node_ref, node, modified, dropped)
+    for kid in node.get("/Kids", ArrayObject()):
+        _strip_pages(kid, modified, dropped, seen)
+
+
+def _strip_embedded_files(
+    root_ref: IndirectObject,
+    root: DictionaryObject,
+    modified: Dict[int, DictionaryObject],
+) -> None:
+    """
+    Quita /Params (fechas, checksum) y /Metadata de los archivos embebidos.
+
+    Los streams pueden venir como objetos directos dentro del filespec o del
+    árbol de nombres, así que se recuerda el objeto indirecto más cercano
+    que los contiene: ese es el que hay que re-serializar.
+    """
+    owner = (root_ref, root)
+    names, owner = _resolve(root, "/Names", owner)
+    if not isinstance(names, DictionaryObject):
+        return
+    tree, owner = _resolve(names, "/EmbeddedFiles", owner)
+    stack = [(tree, owner)] if isinstance(tree, DictionaryObject) else []
+    seen: Set[int] = set()
+
+    while stack:
+        node, node_owner = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+
+        for kid in node.get("/Kids", ArrayObject()):
+            if isinstance(kid, IndirectObject):
+                stack.append((kid.get_object(), (kid, kid.get_object())))
+
+        entries = node.get("/Names", ArrayObject())
+        for filespec in list(entries)[1::2]:
+            fs_owner = node_owner
+            if isinstance(filespec, IndirectObject):
+                fs_owner = (filespec, filespec.get_object())
+            filespec = filespec.get_object()
+            if not isinstance(filespec, DictionaryObject):
+                continue
+            ef, ef_owner = _resolve(filespec, "/EF", fs_owner)
+            if not isinstance(ef, DictionaryObject):
+                continue
+            for key in list(ef):
+                stream, stream_owner = _resolve(ef, key, ef_owner)
+                if not isinstance(stream, DictionaryObject):
+                    continue
+                stripped = [k for k in _EMBEDDED_STRIP_KEYS if k in stream]
+                for k in stripped:
+                    del stream[k]
+                if stripped:
+                    ref, obj = stream_owner
+                    modified[ref.idnum] = obj
+
+
+def _resolve(container: DictionaryObject, key: str, owner):
+    """Valor de `key` y el objeto indirecto que lo contiene (ref, objeto)."""
+    value = container.raw_get(key) if key in container else None
+    if isinstance(value, IndirectObject):
+        obj = value.get_object()
+        return obj, (value, obj)
+    return value, owner
+
+
+def _is_stale_info(obj) -> bool:
+    if not isinstance(obj, DictionaryObject) or isinstance(obj, StreamObject):
+        return False
+    keys = set(obj.keys())
+    return bool(keys) and "/Type" not in keys and keys <= _INFO_KEYS
+
+
+# ---------------------------------------------------------------------------
+# Escritura
+# ---------------------------------------------------------------------------
+
+def _write_object(out: HashingWriter, num: int, gen: int, obj) -> None:
+    buf = BytesIO()
+    obj.write_to_stream(buf, None)
+    out.write(b"%d %d obj\n" % (num, gen))
+    out.write(buf.getvalue())
+    out.write(b"\nendobj\n")
+
+
+def _copy_range(src: SeekableHashingReader, out: HashingWriter, start: int, end: int) -> None:
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(remaining, CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("PDF truncado.")
+        out.write(chunk)
+        remaining -= len(chunk)
+
+
+def _write_xref_table(
+    out: HashingWriter,
+    offsets: Dict[int, Tuple[int, int]],
+    size: int,
+    trailer: DictionaryObject,
+) -> None:
+    xref_offset = out.bytes_written
+    lines = [b"xref\n0 %d\n" % size]
+    for num in range(size):
+        if num in offsets:
+            offset, gen = offsets[num]
+            lines.append(b"%010d %05d n \n" % (offset, gen))
+        else:
+            lines.append(b"0000000000 65535 f \n")
+    out.write(b"".join(lines))
+
+    trailer[NameObject("/Size")] = NumberObject(size)
+    buf = BytesIO()
+    trailer.write_to_stream(buf, None)
+    out.write(b"trailer\n" + buf.getvalue() + b"\nstartxref\n%d\n%%%%EOF\n" % xref_offset)
+
+
+def _write_xref_stream(
+    out: HashingWriter,
+    offsets: Dict[int, Tuple[int, int]],
+    compressed: Dict[int, Tuple[int, int]],
+    size: int,
+    trailer: DictionaryObject,
+) -> None:
+    # La propia xref stream ocupa el siguiente número de objeto libre
+    xref_num = size
+    size += 1
+    xref_offset = out.bytes_written
+    offsets = {**offsets, xref_num: (xref_offset, 0)}
+
+    w2 = max(4, (max(o for o, _ in offsets.values()).bit_length() + 7) // 8)
+    w3 = max(2, (max([i for _, i in compressed.values()] + [0]).bit_length() + 7) // 8)
+
+    rows = bytearray()
+    for num in range(size):
+        if num in offsets:
+            offset, gen = offsets[num]
+            rows += b"\x01" + offset.to_bytes(w2, "big") + gen.to_bytes(w3, "big")
+        elif num in compressed:
+            stm, idx = compressed[num]
+            rows += b"\x02" + int(stm).to_bytes(w2, "big") + int(idx).to_bytes(w3, "big")
+        else:
+            rows += b"\x00" + bytes(w2) + (65535 if num == 0 else 0).to_bytes(w3, "big")
+
+    data = zlib.compress(bytes(rows))
+    trailer.update({
+        NameObject("/Type"): NameObject("/XRef"),
+        NameObject("/Size"): NumberObject(size),
+        NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(w2), NumberObject(w3)]),
+        NameObject("/Filter"): NameObject("/FlateDecode"),
+        NameObject("/Length"): NumberObject(len(data)),
+    })
+    buf = BytesIO()
+    trailer.write_to_stream(buf, None)
+    out.write(b"%d 0 obj\n" % xref_num)
+    out.write(buf.getvalue())
+    out.write(b"\nstream\n" + data + b"\nendstream\nendobj\n")
+    out.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
@@ -2,10 +2,10 @@
 # reporter.py
 # Resume logs .jsonl (JSON Lines) de /examples o archivos sueltos y genera reportes JSON/CSV/Markdown.
 
-import argparse, json, sys, csv
+import argparse, json, sys, csv, math, sqlite3
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any, List, Iterable, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Iterable, Iterator, Tuple
 from collections import Counter, defaultdict
 
 # --------- Utilidades ---------
@@ -16,7 +16,17 @@ ISO_FORMATS = (
     "%Y-%m-%d",
 )
 
+EPOCH = datetime(1970, 1, 1)
+
 def parse_ts(s: str):
+    """Timestamp ISO 8601 -> datetime naive (UTC). fromisoformat cubre casi todos los casos."""
+    try:
+        dt = datetime.fromisoformat(s[:-1] if s.endswith("Z") else s)
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+    except (ValueError, TypeError):
+        pass
     for f in ISO_FORMATS:
         try:
             return datetime.strptime(s, f)
@@ -37,25 +47,305 @@ def load_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
                 sys.stderr.write(f"[WARN] {path.name}:{i} no es JSON válido: {e}\n")
 
 def iter_logs(paths: List[Path]) -> Iterable[Tuple[Path, Dict[str, Any]]]:
+    for f in log_files(paths):
+        for obj in load_jsonl(f):
+            yield f, obj
+
+def log_files(paths: List[Path]) -> Iterator[Path]:
     for p in paths:
         if p.is_dir():
-            for f in sorted(p.rglob("*.jsonl")):
-                for obj in load_jsonl(f):
-                    yield f, obj
+            yield from sorted(p.rglob("*.jsonl"))
         elif p.is_file():
-            for obj in load_jsonl(p):
-                yield p, obj
+            yield p
         else:
             sys.stderr.write(f"[WARN] Ruta no encontrada: {p}\n")
 
+def field(r: Dict[str, Any], key: str):
+    """Campo del evento; los logs del pipeline lo guardan en details.*"""
+    if key in r:
+        return r[key]
+    details = r.get("details")
+    if isinstance(details, dict):
+        return details.get(key)
+    return None
+
+def event_ts(r: Dict[str, Any]):
+    ts = r.get("timestamp") or r.get("time") or r.get("@timestamp")
+    return parse_ts(ts) if isinstance(ts, str) else None
+
+# --------- Filtros ---------
+FILTER_FIELDS = ("run_id", "module", "event", "level")
+
+def build_filters(since=None, until=None, last_days=None, **values) -> Dict[str, Any]:
+    """
+    since/until: ISO 8601 (UTC); last_days: últimos N días desde ahora.
+    values: run_id/module/event/level -> lista de valores aceptados.
+    """
+    filters: Dict[str, Any] = {"since": parse_ts(since) if since else None,
+                               "until": parse_ts(until) if until else None}
+    if last_days is not None:
+        start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=last_days)
+        filters["since"] = max(filters["since"] or start, start)
+    for key in FILTER_FIELDS:
+        filters[key] = [v.upper() if key == "level" else v for v in values.get(key) or []]
+    return filters
+
+def matches(r: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    for key in FILTER_FIELDS:
+        accepted = filters.get(key)
+        if accepted:
+            value = str(r.get(key, ""))
+            if (value.upper() if key == "level" else value) not in accepted:
+                return False
+    if filters.get("since") or filters.get("until"):
+        dt = event_ts(r)
+        if dt is None:
+            return False
+        if filters.get("since") and dt < filters["since"]:
+            return False
+        if filters.get("until") and dt > filters["until"]:
+            return False
+    return True
+
+def filter_records(records, filters):
+    return ((src, r) for src, r in records if matches(r, filters))
+
+# --------- Almacén indexado (SQLite) ---------
+class LogStore:
+    """
+    Copia local e indexada de los logs: cada ingesta solo lee los bytes
+    nuevos de cada .jsonl (offset guardado por archivo) y las consultas
+    por tiempo/run_id/módulo/evento/nivel usan índices en vez de releer
+    todos los archivos.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sources (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        inode INTEGER,
+        offset INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        source_id INTEGER NOT NULL,
+        ts REAL,
+        run_id TEXT,
+        module TEXT,
+        event TEXT,
+        level TEXT,
+        raw TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+    CREATE INDEX IF NOT EXISTS idx_events_run ON events(run_id, ts);
+    CREATE INDEX IF NOT EXISTS idx_events_module ON events(module, ts);
+    CREATE INDEX IF NOT EXISTS idx_events_event ON events(event, ts);
+    CREATE INDEX IF NOT EXISTS idx_events_level ON events(level, ts);
+    CREATE INDEX IF NOT EXISTS idx_events_source ON events(source_id);
+    """
+    BATCH = 5000
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def ingest(self, paths: List[Path]) -> int:
+        return sum(self._ingest_file(f) for f in log_files(paths))
+
+    def _ingest_file(self, f: Path) -> int:
+        key = str(f.resolve())
+        st = f.stat()
+        row = self.conn.execute("SELECT id, inode, offset FROM sources WHERE path = ?", (key,)).fetchone()
+        with self.conn:
+            if row is None:
+                source_id = self.conn.execute(
+                    "INSERT INTO sources (path, inode, offset) VALUES (?, ?, 0)", (key, st.st_ino)
+                ).lastrowid
+                offset = 0
+            else:
+                source_id, inode, offset = row
+                if inode != st.st_ino or st.st_size < offset:
+                    # Rotado o truncado: se vuelve a ingerir desde el principio
+                    self.conn.execute("DELETE FROM events WHERE source_id = ?", (source_id,))
+                    offset = 0
+            if st.st_size == offset:
+                return 0
+
+            added = 0
+            batch = []
+            with f.open("rb") as fh:
+                fh.seek(offset)
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break  # línea a medio escribir: se lee en la próxima ingesta
+                    offset += len(line)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        r = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        sys.stderr.write(f"[WARN] {f.name}: línea no es JSON válido: {e}\n")
+                        continue
+                    if not isinstance(r, dict):
+                        continue
+                    dt = event_ts(r)
+                    batch.append((
+                        source_id,
+                        (dt - EPOCH).total_seconds() if dt else None,
+                        r.get("run_id"),
+                        r.get("task") or r.get("module") or r.get("name"),
+                        r.get("event"),
+                        str(r.get("level", "")).upper() or None,
+                        line.decode("utf-8"),
+                    ))
+                    if len(batch) >= self.BATCH:
+                        added += self._insert(batch)
+            added += self._insert(batch)
+            self.conn.execute(
+                "UPDATE sources SET inode = ?, offset = ? WHERE id = ?", (st.st_ino, offset, source_id)
+            )
+        return added
+
+    def _insert(self, batch) -> int:
+        n = len(batch)
+        if n:
+            self.conn.executemany(
+                "INSERT INTO events (source_id, ts, run_id, module, event, level, raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            batch.clear()
+        return n
+
+    def query(self, filters: Dict[str, Any]) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+        where, params = [], []
+        if filters.get("since"):
+            where.append("e.ts >= ?")
+            params.append((filters["since"] - EPOCH).total_seconds())
+        if filters.get("until"):
+            where.append("e.ts <= ?")
+            params.append((filters["until"] - EPOCH).total_seconds())
+        for key in FILTER_FIELDS:
+            values = filters.get(key)
+            if values:
+                where.append(f"e.{key} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        sql = "SELECT s.path, e.raw FROM events e JOIN sources s ON s.id = e.source_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.ts, e.id"
+        for path, raw in self.conn.execute(sql, params):
+            yield Path(path), json.loads(raw)
+
+# --------- Estadísticas en streaming ---------
+class QuantileSketch:
+    """
+    Sketch de cuantiles con buckets logarítmicos (estilo DDSketch): error
+    relativo <= `accuracy` en cada cuantil, memoria acotada por el rango de
+    valores (no por su número) y mergeable sumando los conteos por bucket.
+    """
+
+    def __init__(self, accuracy: float = 0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Counter = Counter()
+        self.zeros = 0  # valores <= 0 (duraciones nulas)
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Sketches con distinta precisión no se pueden combinar")
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # punto medio (relativo) del bucket (gamma^(k-1), gamma^k]
+                return 2 * self.gamma ** key / (1 + self.gamma)
+        return 2 * self.gamma ** max(self.buckets) / (1 + self.gamma)
+
+class RunningStats:
+    """count/min/max/sum en O(1) memoria + sketch para p50/p95/p99."""
+
+    def __init__(self):
+        self.count = 0
+        self.min = self.max = None
+        self.sum = 0.0
+        self.sketch = QuantileSketch()
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+        self.sketch.add(value)
+
+    def merge(self, other: "RunningStats"):
+        if not other.count:
+            return
+        self.count += other.count
+        self.sum += other.sum
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def _quantile(self, q: float):
+        # el sketch es aproximado: nunca fuera del rango observado
+        x = self.sketch.quantile(q)
+        return None if x is None else _round(min(max(x, self.min), self.max))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "min": self.min,
+            "avg": (self.sum / self.count) if self.count else None,
+            "max": self.max,
+            "sum": self.sum if self.count else None,
+            "p50": self._quantile(0.50),
+            "p95": self._quantile(0.95),
+            "p99": self._quantile(0.99),
+        }
+
+def _round(x):
+    return None if x is None else round(x, 3)
+
 # --------- Agregación ---------
 def aggregate(records: Iterable[Tuple[Path, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Una sola pasada en streaming: memoria constante respecto al nº de eventos."""
     total = 0
     level_counts = Counter()
     status_counts = Counter()
     task_counts = Counter()
-    durations = []
+    durations = RunningStats()
+    event_durations: Dict[str, RunningStats] = defaultdict(RunningStats)
+    stage_durations: Dict[str, RunningStats] = defaultdict(RunningStats)
     inputs = outputs = 0
+    bytes_in = bytes_out = 0
+    peak_rss = {"self": None, "children": None}
     first_ts = last_ts = None
 
     examples = []  # primeras N entradas para mostrar en el MD
@@ -73,19 +363,37 @@ def aggregate(records: Iterable[Tuple[Path, Dict[str, Any]]]) -> Dict[str, Any]:
         task_counts[task] += 1
 
         # duración (ms o s)
-        dur = r.get("duration_ms")
-        if dur is None and "duration_s" in r:
+        dur = field(r, "duration_ms")
+        if dur is None and field(r, "duration_s") is not None:
             try:
-                dur = float(r["duration_s"]) * 1000.0
+                dur = float(field(r, "duration_s")) * 1000.0
             except Exception:
                 dur = None
-        if isinstance(dur, (int, float)):
-            durations.append(float(dur))
+        if isinstance(dur, (int, float)) and not isinstance(dur, bool):
+            durations.add(float(dur))
+            event_durations[str(r.get("event") or task)].add(float(dur))
+
+        # tiempos por etapa (por archivo o por ejecución) y E/S
+        stages = field(r, "stages_ms")
+        if isinstance(stages, dict):
+            for stage, ms in stages.items():
+                if isinstance(ms, (int, float)):
+                    stage_durations[stage].add(float(ms))
+        try:
+            bytes_in += int(field(r, "bytes_read") or 0)
+            bytes_out += int(field(r, "bytes_written") or 0)
+        except Exception:
+            pass
+        rss = field(r, "peak_rss_kb")
+        if isinstance(rss, dict):
+            for k in peak_rss:
+                if isinstance(rss.get(k), int):
+                    peak_rss[k] = max(peak_rss[k] or 0, rss[k])
 
         # conteos de IO si vienen
         try:
-            inputs += int(r.get("records_in") or 0)
-            outputs += int(r.get("records_out") or 0)
+            inputs += int(field(r, "records_in") or 0)
+            outputs += int(field(r, "records_out") or 0)
         except Exception:
             pass
 
@@ -107,10 +415,10 @@ def aggregate(records: Iterable[Tuple[Path, Dict[str, Any]]]) -> Dict[str, Any]:
                 "task": task,
                 "status": status,
                 "level": level,
-                "message": r.get("message") or r.get("msg"),
-                "records_in": r.get("records_in"),
-                "records_out": r.get("records_out"),
-                "duration_ms": r.get("duration_ms") or r.get("duration_s"),
+                "message": r.get("message") or r.get("msg") or r.get("event"),
+                "records_in": field(r, "records_in"),
+                "records_out": field(r, "records_out"),
+                "duration_ms": field(r, "duration_ms") or field(r, "duration_s"),
             }
             examples.append(ex)
 
@@ -119,14 +427,12 @@ def aggregate(records: Iterable[Tuple[Path, Dict[str, Any]]]) -> Dict[str, Any]:
     summary["levels"] = dict(level_counts)
     summary["status"] = dict(status_counts)
     summary["tasks"] = dict(task_counts)
-    summary["duration_ms"] = {
-        "count": len(durations),
-        "min": min(durations) if durations else None,
-        "avg": (sum(durations)/len(durations)) if durations else None,
-        "max": max(durations) if durations else None,
-        "sum": sum(durations) if durations else None,
-    }
+    summary["duration_ms"] = durations.to_dict()
+    summary["events_duration_ms"] = {k: v.to_dict() for k, v in sorted(event_durations.items())}
+    summary["stages_ms"] = {k: v.to_dict() for k, v in sorted(stage_durations.items())}
     summary["records"] = {"in": inputs, "out": outputs}
+    summary["bytes"] = {"read": bytes_in, "written": bytes_out}
+    summary["peak_rss_kb"] = peak_rss
     summary["window"] = {
         "start": first_ts.isoformat() if first_ts else None,
         "end": last_ts.isoformat() if last_ts else None,
@@ -152,11 +458,20 @@ def write_csv(summary: Dict[str, Any], out_path: Path):
         ("duration_ms.avg", summary.get("duration_ms", {}).get("avg")),
         ("duration_ms.max", summary.get("duration_ms", {}).get("max")),
         ("duration_ms.sum", summary.get("duration_ms", {}).get("sum")),
+        ("duration_ms.p50", summary.get("duration_ms", {}).get("p50")),
+        ("duration_ms.p95", summary.get("duration_ms", {}).get("p95")),
+        ("duration_ms.p99", summary.get("duration_ms", {}).get("p99")),
         ("records.in", summary.get("records", {}).get("in")),
         ("records.out", summary.get("records", {}).get("out")),
+        ("bytes.read", summary.get("bytes", {}).get("read")),
+        ("bytes.written", summary.get("bytes", {}).get("written")),
+        ("peak_rss_kb.self", summary.get("peak_rss_kb", {}).get("self")),
+        ("peak_rss_kb.children", summary.get("peak_rss_kb", {}).get("children")),
         ("window.start", summary.get("window", {}).get("start")),
         ("window.end", summary.get("window", {}).get("end")),
     ]
+    for stage, st in summary.get("stages_ms", {}).items():
+        flat += [(f"stage.{stage}.{k}", st.get(k)) for k in ("count", "sum", "p50", "p95", "p99")]
     with out_path.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["metric", "value"])
@@ -172,6 +487,7 @@ def write_md(summary: Dict[str, Any], out_path: Path):
     md.append(f"- **Eventos totales:** {summary.get('total_events', 0)}\n")
     dm = summary.get("duration_ms", {})
     md.append(f"- **Duración (ms):** min={dm.get('min')}, avg={dm.get('avg')}, max={dm.get('max')}, sum={dm.get('sum')}\n")
+    md.append(f"- **Percentiles (ms):** p50={dm.get('p50')}, p95={dm.get('p95')}, p99={dm.get('p99')}\n")
     rec = summary.get("records", {})
     md.append(f"- **Registros:** in={rec.get('in')}, out={rec.get('out')}\n")
     win = summary.get("window", {})
@@ -186,6 +502,25 @@ def write_md(summary: Dict[str, Any], out_path: Path):
         for k, v in sorted(d.items(), key=lambda kv: (-kv[1], str(kv[0]))):
             md.append(f"| {k} | {v} |\n")
 
+    io = summary.get("bytes", {})
+    md.append(f"- **Bytes (limpieza):** leídos={io.get('read')}, escritos={io.get('written')}\n")
+    rss = summary.get("peak_rss_kb", {})
+    md.append(f"- **RSS pico (KiB):** proceso={rss.get('self')}, workers={rss.get('children')}\n")
+
+    def stats_table(title: str, d: Dict[str, Any]):
+        if not d:
+            return
+        md.append(f"\n### {title}\n")
+        md.append("| clave | n | suma ms | media ms | p50 | p95 | p99 | max |\n|---|---:|---:|---:|---:|---:|---:|---:|\n")
+        for k, st in sorted(d.items(), key=lambda kv: -(kv[1].get("sum") or 0)):
+            avg = st.get("avg")
+            md.append(f"| {k} | {st.get('count')} | {round(st.get('sum') or 0, 3)} | "
+                      f"{round(avg, 3) if avg is not None else ''} | {st.get('p50')} | "
+                      f"{st.get('p95')} | {st.get('p99')} | {st.get('max')} |\n")
+
+    stats_table("Tiempo por etapa (stages_ms)", summary.get("stages_ms", {}))
+    stats_table("Duración por evento", summary.get("events_duration_ms", {}))
+
     dict_table("Niveles (level)", summary.get("levels", {}))
     dict_table("Estatus (status)", summary.get("status", {}))
     dict_table("Tareas (task)", summary.get("tasks", {}))
@@ -226,16 +561,39 @@ def main():
         action="store_true",
         help="Escribir todos los formatos (JSON, CSV, MD)",
     )
+    ap.add_argument(
+        "--store",
+        type=Path,
+        help="Base SQLite indexada: ingiere solo lo nuevo de cada .jsonl y consulta con índices",
+    )
+    ap.add_argument("--since", help="Solo eventos desde esta fecha (ISO 8601, UTC)")
+    ap.add_argument("--until", help="Solo eventos hasta esta fecha (ISO 8601, UTC)")
+    ap.add_argument("--last-days", type=float, help="Solo eventos de los últimos N días")
+    ap.add_argument("--run-id", action="append", help="Filtrar por run_id (repetible)")
+    ap.add_argument("--module", action="append", help="Filtrar por módulo (repetible)")
+    ap.add_argument("--event", action="append", help="Filtrar por evento (repetible)")
+    ap.add_argument("--level", action="append", help="Filtrar por nivel, p. ej. ERROR (repetible)")
     args = ap.parse_args()
 
     paths = [Path(p) for p in args.logs]
-    records = list(iter_logs(paths))
-    if not records:
+    filters = build_filters(
+        since=args.since, until=args.until, last_days=args.last_days,
+        run_id=args.run_id, module=args.module, event=args.event, level=args.level,
+    )
+    if args.store:
+        store = LogStore(args.store)
+        try:
+            added = store.ingest(paths)
+            sys.stderr.write(f"[INFO] {added} eventos nuevos ingeridos en {args.store}\n")
+            summary = aggregate(store.query(filters))
+        finally:
+            store.close()
+    else:
+        summary = aggregate(filter_records(iter_logs(paths), filters))
+    if not summary["total_events"]:
         sys.stderr.write("[ERROR] No se encontraron eventos en .jsonl\n")
         sys.exit(2)
 
-    summary = aggregate(records)
-
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+
+# Archivo de firmas por defecto (versionado junto al paquete); se puede
+# sustituir con la variable de entorno METAHUNTER_AI_SIGNATURES, que también
+# heredan los procesos worker.
+DEFAULT_SIGNATURES_PATH = Path(__file__).parent / "data" / "ai_signatures.json"
+SIGNATURES_ENV = "METAHUNTER_AI_SIGNATURES"
+
+
+@dataclass
+class SignatureMatch:
+    """Coincidencia de una firma de generador IA en un campo de metadatos."""
+    signature: str
+    generator: str
+    field: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SignatureMatcher:
+    """
+    Buscador multi-patrón de una sola pasada.
+
+    Todas las firmas se compilan en una única alternancia dentro de un
+    lookahead, así el motor de regex (en C) prueba todas en cada posición
+    del texto y encuentra también coincidencias solapadas. Como en cada
+    posición solo se captura la alternativa más larga, se precalculan las
+    firmas que son prefijo de otra para reportarlas también.
+
+    Cada firma es (patrón, generador[, palabra[, campos]]):
+    - palabra: solo coincide si no va pegada a otra letra o dígito, así
+      "canva" no salta con "Canvas" ni "gemini" con "geminiproject";
+    - campos: solo cuenta en esas claves de metadatos (p. ej. software o
+      creator_tool), no en rutas ni textos libres.
+    """
+
+    def __init__(self, signatures: Iterable[Tuple[Any, ...]], version: str = "") -> None:
+        self.version = version
+        self.generators: Dict[str, str] = {}
+        self._words: Dict[str, re.Pattern] = {}
+        self._fields: Dict[str, FrozenSet[str]] = {}
+        for pattern, generator, *extra in signatures:
+            pattern = pattern.lower()
+            if not pattern or pattern in self.generators:
+                continue
+            self.generators[pattern] = generator
+            if extra and extra[0]:
+                self._words[pattern] = re.compile(_word_regex(pattern))
+            if len(extra) > 1 and extra[1]:
+                self._fields[pattern] = frozenset(extra[1])
+
+        patterns = sorted(self.generators, key=len, reverse=True)
+        self._prefixes: Dict[str, List[str]] = {
+            p: [q for q in patterns if q != p and p.startswith(q)] for p in patterns
+        }
+        alternation = "|".join(
+            _word_regex(p) if p in self._words else re.escape(p) for p in patterns
+        )
+        self._regex = re.compile(f"(?=({alternation}))") if patterns else None
+
+    @property
+    def patterns(self) -> List[str]:
+        return list(self.generators)
+
+    def find(self, text: str) -> List[str]:
+        """Firmas presentes en `text` (ya en minúsculas), sin repetir."""
+        if self._regex is None:
+            return []
+        found: Dict[str, None] = {}
+        for m in self._regex.finditer(text):
+            hit = m.group(1)
+            found[hit] = None
+            for prefix in self._prefixes[hit]:
+                word = self._words.get(prefix)
+                if word is None or word.match(text, m.start()):
+                    found[prefix] = None
+        return list(found)
+
+    def match_metadata(self, metadata: Dict[str, Any]) -> List[SignatureMatch]:
+        """
+        Busca firmas campo a campo (clave y valor) para saber qué clave de
+        metadatos provocó cada coincidencia.
+        """
+        matches: List[SignatureMatch] = []
+        for key, value in metadata.items():
+            if value is None:
+                continue
+            field = str(key)
+            for text in (str(value).lower(), field.lower()):
+                for hit in self.find(text):
+                    fields = self._fields.get(hit)
+                    if fields is None or field in fields:
+                        matches.append(SignatureMatch(hit, self.generators[hit], field))
+        return matches
+
+
+def load_signatures(path: Path | None = None) -> SignatureMatcher:
+    """
+    Carga un archivo de firmas:
+      {"version": "...", "signatures": [{"pattern": "...", "generator": "..."}]}
+
+    Claves opcionales por firma: "word" (palabra completa) y "fields"
+    (lista de claves de metadatos donde cuenta); ver SignatureMatcher.
+    """
+    if path is None:
+        env = os.getenv(SIGNATURES_ENV)
+        path = Path(env) if env else DEFAULT_SIGNATURES_PATH
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not isinstance(data.get("signatures"), list):
+        raise ValueError(f"Archivo de firmas IA inválido: {path}")
+
+    return SignatureMatcher(
+        (
+            (
+                str(s["pattern"]),
+                str(s.get("generator", s["pattern"])),
+                bool(s.get("word", False)),
+                [str(f) for f in s.get("fields") or ()],
+            )
+            for s in data["signatures"]
+        ),
+        version=str(data.get("version", "")),
+    )
+
+
+def _word_regex(pattern: str) -> str:
+    # Sin letra/dígito pegado a ningún lado (vale también si la firma
+    # empieza o termina con un signo, a diferencia de \b)
+    return rf"(?<![^\W_]){re.escape(pattern)}(?![^\W_])"
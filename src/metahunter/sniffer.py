@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import mimetypes
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+
+# Bytes iniciales que se examinan: suficientes para todas las firmas de la
+# tabla, el primer miembro de un ZIP (ODF guarda ahí su mimetype), la
+# cabecera PE de la mayoría de ejecutables y la zona donde los lectores de
+# PDF aceptan la cabecera %PDF- (primer KiB).
+SNIFF_SIZE = 1024
+
+# Los lectores de PDF admiten basura antes de %PDF- dentro del primer KiB.
+_PDF_HEADER_WINDOW = 1024
+
+# Bytes de control que también aparecen en texto normal
+_TEXT_CONTROLS = b"\t\n\r\f\x1b"
+
+OCTET_STREAM = "application/octet-stream"
+ZIP_MIME = "application/zip"
+
+# (offset, bytes mágicos, tipo MIME); se prueban en orden. Las firmas de
+# dos bytes que aparecen en cualquier binario ("BM", "MZ") no están aquí:
+# se validan con su cabecera en _sniff_bmp y _sniff_pe.
+SIGNATURES: List[Tuple[int, bytes, str]] = [
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"II+\x00", "image/tiff"),
+    (0, b"MM\x00+", "image/tiff"),
+    (0, b"\x00\x00\x01\x00", "image/vnd.microsoft.icon"),
+    (0, b"8BPS", "image/vnd.adobe.photoshop"),
+    (0, b"PK\x03\x04", ZIP_MIME),
+    (0, b"PK\x05\x06", ZIP_MIME),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"BZh", "application/x-bzip2"),
+    (0, b"\xfd7zXZ\x00", "application/x-xz"),
+    (0, b"\x28\xb5\x2f\xfd", "application/zstd"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"Rar!\x1a\x07", "application/vnd.rar"),
+    (0, b"{\\rtf", "application/rtf"),
+    (0, b"\x7fELF", "application/x-elf"),
+    (0, b"SQLite format 3\x00", "application/vnd.sqlite3"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"\x1aE\xdf\xa3", "video/webm"),
+    (257, b"ustar", "application/x-tar"),
+]
+
+# Tamaños de la cabecera DIB de un BMP (BITMAPCOREHEADER ... BITMAPV5HEADER)
+_BMP_DIB_SIZES = {12, 16, 40, 52, 56, 64, 108, 124}
+
+# Subtipo RIFF (bytes 8..12)
+_RIFF_TYPES = {
+    b"WEBP": "image/webp",
+    b"WAVE": "audio/wav",
+    b"AVI ": "video/x-msvideo",
+}
+
+# Marca principal ISO BMFF (caja 'ftyp', bytes 8..12)
+_FTYP_BRANDS = {
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"heim": "image/heic",
+    b"heis": "image/heic",
+    b"mif1": "image/heif",
+    b"msf1": "image/heif",
+    b"avif": "image/avif",
+    b"avis": "image/avif",
+    b"qt  ": "video/quicktime",
+    b"M4A ": "audio/mp4",
+}
+
+# Formatos basados en ZIP: un ZIP detectado es compatible con ellos.
+_ZIP_BASED_PREFIXES = (
+    "application/vnd.openxmlformats-officedocument.",
+    "application/vnd.ms-word.",
+    "application/vnd.ms-excel.",
+    "application/vnd.ms-powerpoint.",
+    "application/vnd.oasis.opendocument.",
+    "application/epub+zip",
+    "application/java-archive",
+    "application/x-zip-compressed",
+)
+
+# Formatos de Office antiguos: contenedores OLE (Compound File).
+_OLE_BASED = {
+    "application/msword",
+    "application/vnd.ms-excel",
+    "application/vnd.ms-powerpoint",
+    "application/vnd.ms-outlook",
+    "application/x-msi",
+}
+
+# Tipo MIME detectado -> formato que entienden extractores y cleaner
+_FORMATS = {
+    "application/pdf": "pdf",
+    ZIP_MIME: "zip",
+    "image/jpeg": "jpeg",
+    "image/png": "png",
+    "image/tiff": "tiff",
+    "image/webp": "webp",
+}
+
+
+def sniff_mime(head: bytes) -> str:
+    """
+    Tipo MIME real según los primeros bytes (ver SNIFF_SIZE). Si no hay
+    firma conocida se distingue entre texto (UTF-8 sin NUL) y binario.
+    """
+    for offset, magic, mime in SIGNATURES:
+        if head.startswith(magic, offset):
+            if mime == ZIP_MIME:
+                return _sniff_zip(head)
+            return mime
+
+    if head[:4] == b"RIFF" and head[8:12] in _RIFF_TYPES:
+        return _RIFF_TYPES[head[8:12]]
+    if head[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(head[8:12], "video/mp4")
+    if _is_bmp(head):
+        return "image/bmp"
+    if _is_pe(head):
+        return "application/x-msdownload"
+    if _has_pdf_header(head):
+        return "application/pdf"
+    if head.lstrip().startswith(b"<?xml"):
+        return "application/xml"
+
+    return _sniff_text(head)
+
+
+def sniff_format(head: bytes) -> str | None:
+    """Formato corto (pdf, zip, jpeg, png, tiff, webp) o None si no se trata."""
+    mime = sniff_mime(head)
+    if mime.startswith(_ZIP_BASED_PREFIXES):
+        return "zip"
+    return _FORMATS.get(mime)
+
+
+def read_head(path: Path) -> bytes:
+    with path.open("rb") as f:
+        return f.read(SNIFF_SIZE)
+
+
+@lru_cache(maxsize=1024)
+def declared_mime(extension: str) -> str:
+    """Tipo MIME que declara la extensión (caché por extensión)."""
+    mime, _ = mimetypes.guess_type("archivo" + extension)
+    return mime or OCTET_STREAM
+
+
+def is_mismatch(declared: str, detected: str) -> bool:
+    """
+    True si el contenido no corresponde con la extensión. Un tipo desconocido
+    en cualquiera de los dos lados no cuenta como discrepancia, y un ZIP es
+    compatible con los formatos que lo usan como contenedor (OOXML, ODF...).
+    """
+    if declared == detected or OCTET_STREAM in (declared, detected):
+        return False
+    if detected == ZIP_MIME and declared.startswith(_ZIP_BASED_PREFIXES):
+        return False
+    if detected.startswith(_ZIP_BASED_PREFIXES) and declared == ZIP_MIME:
+        return False
+    if detected == "application/x-ole-storage" and declared in _OLE_BASED:
+        return False
+    if detected in ("text/plain", "application/xml") and _is_textual(declared):
+        return False
+    if detected == "image/heif" and declared == "image/heic":
+        return False
+    return True
+
+
+def _sniff_zip(head: bytes) -> str:
+    # ODF/EPUB: primer miembro "mimetype" sin comprimir con el tipo dentro
+    if head[30:38] == b"mimetype":
+        name_len = int.from_bytes(head[26:28], "little")
+        extra_len = int.from_bytes(head[28:30], "little")
+        size = int.from_bytes(head[18:22], "little")
+        start = 30 + name_len + extra_len
+        mime = head[start:start + size]
+        if mime and start + size <= len(head):
+            return mime.decode("ascii", "replace")
+    return ZIP_MIME
+
+
+def _has_pdf_header(head: bytes) -> bool:
+    # %PDF- más adelante en el primer KiB solo cuenta si lo que va delante
+    # es un BOM, espacios o basura binaria, nunca texto imprimible (un .txt
+    # o un CSV que mencione "%PDF-1.7" no es un PDF)
+    pos = head.find(b"%PDF-", 0, _PDF_HEADER_WINDOW)
+    if pos < 0:
+        return False
+    prefix = head[:pos]
+    if prefix.startswith(b"\xef\xbb\xbf"):
+        prefix = prefix[3:]
+    return not prefix.strip() or _is_binary(prefix)
+
+
+def _is_binary(data: bytes) -> bool:
+    if any(b < 0x20 and b not in _TEXT_CONTROLS or b == 0x7F for b in data):
+        return True
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+def _is_bmp(head: bytes) -> bool:
+    # "BM" + tamaño (4) + dos campos reservados a cero + offset de los
+    # píxeles, que va detrás de la cabecera DIB, de tamaño conocido
+    if head[:2] != b"BM" or len(head) < 18 or head[6:10] != b"\x00\x00\x00\x00":
+        return False
+    dib_size = int.from_bytes(head[14:18], "little")
+    pixels_offset = int.from_bytes(head[10:14], "little")
+    return dib_size in _BMP_DIB_SIZES and pixels_offset >= 14 + dib_size
+
+
+def _is_pe(head: bytes) -> bool:
+    # Cabecera MZ de DOS con e_lfanew (0x3C) apuntando a la firma "PE\0\0"
+    if head[:2] != b"MZ" or len(head) < 0x40:
+        return False
+    e_lfanew = int.from_bytes(head[0x3C:0x40], "little")
+    return 0x40 <= e_lfanew and head[e_lfanew:e_lfanew + 4] == b"PE\x00\x00"
+
+
+def _sniff_text(head: bytes) -> str:
+    if not head:
+        return OCTET_STREAM
+    if b"\x00" in head:
+        return OCTET_STREAM
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # Un carácter multibyte cortado al final del bloque sigue siendo texto
+        if exc.start < len(head) - 3:
+            return OCTET_STREAM
+    return "text/plain"
+
+
+def _is_textual(mime: str) -> bool:
+    return (
+        mime.startswith("text/")
+        or mime.endswith(("+xml", "/xml", "/json", "+json", "/javascript"))
+        or mime in ("application/x-sh", "application/x-yaml", "application/sql")
+    )
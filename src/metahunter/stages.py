@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from . import engine
+from . import sniffer
+from .aio import DEFAULT_MAX_INFLIGHT
+from .cache import AnalysisCache
+from .engine import EngineOptions, FileResult
+
+# Pipeline por etapas (--io-mode staged):
+#
+#   discover → sniff → clean (+ hash RAW y limpio) → analyze → sumideros
+#
+# Cada etapa tiene sus hilos y se conecta con la siguiente por una cola
+# acotada (`queue_depth`). Mientras un archivo se analiza, el siguiente ya
+# se está limpiando y el otro leyendo, y el primer resultado llega a los
+# sumideros (stats, log, integridad) en cuanto sale de la última etapa.
+#
+# Un archivo entra solo si hay un token libre (`max_inflight`) y lo
+# devuelve al salir, así que colas, etapas y búfer de reordenación juntos
+# nunca guardan más de `max_inflight` archivos. Eso acota lo que está en
+# vuelo, no la ejecución entera: run_pipeline sigue guardando por cada
+# archivo limpio su hash y tamaño (integridad/Merkle) y su entrada del
+# manifiesto incremental, que crecen con el lote.
+DEFAULT_QUEUE_DEPTH = 4
+
+# Cada cuánto miran los hilos si hay que parar (solo afecta al cierre).
+_POLL_S = 0.05
+
+
+def process_files_staged(
+    jobs: Iterable[Tuple[Any, ...]],
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    queue_depth: int = DEFAULT_QUEUE_DEPTH,
+    workers: int = 1,
+    options: EngineOptions | None = None,
+    cache: AnalysisCache | None = None,
+    manifest: Dict[str, Dict[str, Any]] | None = None,
+) -> Iterator[FileResult]:
+    """
+    Misma interfaz y mismo orden de resultados que engine.process_files,
+    con el proceso de cada archivo repartido en etapas encadenadas.
+
+    Cada etapa tiene `workers` hilos; con `workers` > 1 la limpieza y el
+    análisis (CPU) se ejecutan en un pool de procesos compartido. El hash
+    del RAW y del limpio siguen fusionados con la limpieza (sin pasadas
+    extra para hashear; ver engine.process_file).
+
+    La caché y el manifiesto incremental se consultan en este hilo, igual
+    que en modo síncrono; `duration_ms` es la suma del tiempo de cada etapa
+    (sin las esperas en cola).
+    """
+    if max_inflight < 1:
+        raise ValueError("max_inflight debe ser al menos 1.")
+    if queue_depth < 1:
+        raise ValueError("queue_depth debe ser al menos 1.")
+
+    pipeline = _StagePipeline(max_inflight, queue_depth, max(1, workers), options)
+    pipeline.start(iter(jobs))
+
+    # Búfer de reordenación: resultados que terminaron antes que uno anterior
+    pending: Dict[int, _Item] = {}
+    next_seq = emit_seq = 0
+    total: int | None = None
+
+    try:
+        while total is None or emit_seq < total:
+            kind, payload = pipeline.inbox.get()
+            if kind == "error":
+                raise payload
+            if kind == "done":
+                total = next_seq
+                continue
+            if kind == "job":
+                pipeline.submit(_Item(next_seq, engine._prepare_job(payload, cache, manifest)))
+                next_seq += 1
+                continue
+
+            pending[payload.seq] = payload
+            while emit_seq in pending:
+                item = pending.pop(emit_seq)
+                emit_seq += 1
+                pipeline.tokens.release()
+                yield engine._store_result(item.result, item.job, cache)
+    finally:
+        pipeline.close()
+
+
+class _Item:
+    """Un archivo en su paso por la tubería."""
+
+    __slots__ = ("seq", "job", "head", "sniff_ms", "result", "raw_sha256", "done")
+
+    def __init__(self, seq: int, job: engine._Job) -> None:
+        self.seq = seq
+        self.job = job
+        self.head: bytes | None = None
+        self.sniff_ms: float | None = None
+        self.result: FileResult | None = None
+        self.raw_sha256: str | None = None
+        # True si el archivo ya no pasa por más etapas (fallo del worker)
+        self.done = False
+
+
+class _StagePipeline:
+    """Hilos de cada etapa, colas acotadas entre ellas y tokens de entrada."""
+
+    def __init__(self, max_inflight: int, queue_depth: int, workers: int, options: EngineOptions | None) -> None:
+        self.workers = workers
+        self.options = options
+        self.stop = threading.Event()
+        self.tokens = threading.Semaphore(max_inflight)
+        # Bandeja del hilo principal (trabajos descubiertos y resultados);
+        # no necesita límite propio porque la acotan los tokens.
+        self.inbox: queue.Queue = queue.Queue()
+        self.sniff_q: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.clean_q: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.analyze_q: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._pool_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    # -- ciclo de vida -----------------------------------------------------
+
+    def start(self, jobs: Iterator[Tuple[Any, ...]]) -> None:
+        self._spawn("discover", self._discover, jobs)
+        for i in range(self.workers):
+            self._spawn(f"sniff-{i}", self._worker, self.sniff_q, self._sniff, self.clean_q.put)
+            self._spawn(f"clean-{i}", self._worker, self.clean_q, self._clean, self.analyze_q.put)
+            self._spawn(f"analyze-{i}", self._worker, self.analyze_q, self._analyze, self._emit)
+
+    def submit(self, item: _Item) -> None:
+        self._put(self.sniff_q.put, item)
+
+    def close(self) -> None:
+        self.stop.set()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        for thread in self._threads:
+            thread.join()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+    def _spawn(self, name: str, target: Callable[..., None], *args: Any) -> None:
+        thread = threading.Thread(target=target, args=args, name=f"metahunter-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    # -- hilos -------------------------------------------------------------
+
+    def _discover(self, jobs: Iterator[Tuple[Any, ...]]) -> None:
+        try:
+            for job in jobs:
+                while not self.tokens.acquire(timeout=_POLL_S):
+                    if self.stop.is_set():
+                        return
+                if self.stop.is_set():
+                    return
+                self.inbox.put(("job", job))
+            self.inbox.put(("done", None))
+        except BaseException as e:  # noqa: BLE001
+            self.inbox.put(("error", e))
+
+    def _worker(self, in_q: queue.Queue, step: Callable[[_Item], None], put: Callable[..., None]) -> None:
+        while not self.stop.is_set():
+            try:
+                item = in_q.get(timeout=_POLL_S)
+            except queue.Empty:
+                continue
+            if not item.done:
+                try:
+                    step(item)
+                except Exception as e:  # noqa: BLE001
+                    item.result = FileResult(
+                        path=str(item.job.path),
+                        output=str(item.job.output_path),
+                        error=str(e),
+                        error_stage="worker",
+                    )
+                    item.done = True
+            self._put(put, item)
+
+    def _put(self, put: Callable[..., None], item: _Item) -> None:
+        while not self.stop.is_set():
+            try:
+                put(item, timeout=_POLL_S)
+                return
+            except queue.Full:
+                continue
+
+    def _emit(self, item: _Item, timeout: float | None = None) -> None:
+        self.inbox.put(("result", item))
+
+    # -- etapas ------------------------------------------------------------
+
+    def _sniff(self, item: _Item) -> None:
+        started = time.perf_counter()
+        try:
+            item.head = sniffer.read_head(item.job.path)
+        except OSError:
+            item.head = None
+            return
+        item.sniff_ms = (time.perf_counter() - started) * 1000
+
+    def _clean(self, item: _Item) -> None:
+        job = item.job
+        args = (job.path, job.output_path, self.options, job.cached, job.previous, item.head)
+        try:
+            item.result, item.raw_sha256, item.head = self._call(engine._clean_step, *args)
+        except BrokenProcessPool:
+            self._isolate(item)
+
+    def _analyze(self, item: _Item) -> None:
+        job = item.job
+        args = (item.result, job.path, item.raw_sha256, job.cached, job.signature, item.head)
+        try:
+            result = self._call(engine._analyze_step, *args)
+        except BrokenProcessPool:
+            self._isolate(item)
+            return
+
+        stages = dict(result.stages_ms or {})
+        if item.sniff_ms is not None:
+            stages["sniff"] = round(stages.get("sniff", 0.0) + item.sniff_ms, 3)
+        result.stages_ms = stages
+        result.duration_ms = round(sum(stages.values()), 3)
+        item.result = result
+
+    def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        pool = self.pool
+        if pool is None:
+            return fn(*args)
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # Un worker murió: se cambia de pool (una sola vez por rotura)
+            with self._pool_lock:
+                if self.pool is pool and not self.stop.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            raise
+
+    def _isolate(self, item: _Item) -> None:
+        """Como en modo síncrono: el archivo se reprocesa entero en un proceso propio."""
+        item.result = engine._run_isolated(item.job, self.options)
+        item.done = True
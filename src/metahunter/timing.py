@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# ---------------------------------------------------------------------------
+# Opcional: memoria pico del proceso (no existe en Windows)
+# ---------------------------------------------------------------------------
+
+try:
+    import resource
+    _HAS_RESOURCE = True
+except ImportError:
+    resource = None  # type: ignore[assignment]
+    _HAS_RESOURCE = False
+
+
+def elapsed_ms(started: float) -> float:
+    """Milisegundos transcurridos desde `started` (time.perf_counter)."""
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+class StageTimer:
+    """
+    Acumula el tiempo (ms, reloj monótono) de cada etapa del proceso de un
+    archivo o de una ejecución: `with timer.stage("clean"): ...`.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = round(self.stages.get(name, 0.0) + ms, 3)
+
+    def merge(self, stages: Dict[str, float] | None) -> None:
+        for name, ms in (stages or {}).items():
+            self.add(name, ms)
+
+
+def peak_rss_kb() -> Dict[str, int] | None:
+    """
+    Memoria residente pico (KiB) de este proceso y de sus hijos ya
+    terminados (los workers del pool). None si la plataforma no lo permite.
+    """
+    if not _HAS_RESOURCE:
+        return None
+    # ru_maxrss viene en KiB en Linux y en bytes en macOS
+    scale = 1024 if sys.platform == "darwin" else 1
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
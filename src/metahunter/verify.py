@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from . import analyzer
+from . import integrity
+
+
+# ---------------------------------------------------------------------------
+# Verificación contra un reporte de integridad
+# ---------------------------------------------------------------------------
+
+def load_report(path: Path) -> Dict[str, Any]:
+    report = json.loads(path.read_text(encoding="utf-8"))
+    if not report.get("files") or not report.get("merkle_root"):
+        raise ValueError(f"{path} no es un reporte de integridad válido.")
+    return report
+
+
+def verify_files(report: Dict[str, Any], paths: Sequence[Path]) -> Iterator[Tuple[str, bool, str]]:
+    """
+    Verifica solo los archivos indicados: rehashea cada uno y comprueba su
+    prueba de inclusión contra el root guardado, sin leer el resto del
+    directorio. Si el reporte no trae pruebas (v2) se derivan de sus
+    hashes; un reporte v1 se valida recalculando el root desde sus hashes.
+
+    Devuelve (ruta, ok, motivo) por archivo.
+    """
+    files: List[Dict[str, Any]] = report["files"]
+    by_path = {entry["path"]: (i, entry) for i, entry in enumerate(files)}
+    base_dir = _base_dir(report)
+    version = int(report.get("format_version", 1))
+    root = str(report["merkle_root"]).lower()
+
+    levels: List[bytes] | None = None
+    root_ok: bool | None = None
+
+    for path in paths:
+        key = _report_key(path, base_dir, by_path)
+        if key is None:
+            yield str(path), False, "no está en el reporte"
+            continue
+        index, entry = by_path[key]
+
+        try:
+            actual = analyzer._hash_file(_on_disk(key, base_dir))
+        except OSError as e:
+            yield key, False, f"no se pudo leer: {e}"
+            continue
+        if actual != entry["hash"].lower():
+            yield key, False, "el hash no coincide"
+            continue
+
+        if version == 1:
+            if root_ok is None:
+                root_ok = integrity.verify_integrity_report(report)
+            included = root_ok
+        else:
+            proof = entry.get("proof")
+            if proof is None:
+                if levels is None:
+                    levels = integrity.merkle_levels([e["hash"] for e in files])
+                proof = integrity.inclusion_proof(levels, index)
+            included = integrity.verify_inclusion(
+                actual, int(entry.get("index", index)), len(files), proof, root,
+            )
+
+        if included:
+            yield key, True, "ok"
+        else:
+            yield key, False, "la prueba de inclusión no lleva al Merkle root"
+
+
+def verify_all(report: Dict[str, Any], workers: int = 1) -> Tuple[bool, List[Tuple[str, str]]]:
+    """
+    Verificación completa: rehashea todos los archivos del reporte (en
+    paralelo con `workers` > 1) y recalcula el root con esos hashes.
+
+    Devuelve (root coincide, [(ruta, motivo)] de los archivos que fallan).
+    """
+    files: List[Dict[str, Any]] = report["files"]
+    base_dir = _base_dir(report)
+    paths = [str(_on_disk(entry["path"], base_dir)) for entry in files]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            actual = list(pool.map(_hash_or_none, paths, chunksize=64))
+    else:
+        actual = [_hash_or_none(p) for p in paths]
+
+    failures: List[Tuple[str, str]] = []
+    for entry, digest in zip(files, actual):
+        if digest is None:
+            failures.append((entry["path"], "no se pudo leer"))
+        elif digest != entry["hash"].lower():
+            failures.append((entry["path"], "el hash no coincide"))
+
+    if any(d is None for d in actual):
+        return False, failures
+
+    version = int(report.get("format_version", 1))
+    root = integrity.compute_merkle_root(actual, version=version, workers=workers)
+    return root == str(report["merkle_root"]).lower(), failures
+
+
+def _base_dir(report: Dict[str, Any]) -> Path | None:
+    base_dir = report.get("base_dir")
+    return Path(base_dir) if base_dir else None
+
+
+def _on_disk(key: str, base_dir: Path | None) -> Path:
+    """Ruta real de una entrada del reporte (relativa a base_dir si lo hay)."""
+    return base_dir / key if base_dir is not None else Path(key)
+
+
+def _report_key(path: Path, base_dir: Path | None, by_path: Dict[str, Any]) -> str | None:
+    """Entrada del reporte para una ruta dada tal cual, absoluta o relativa a base_dir."""
+    candidates = [path.as_posix(), str(path), str(path.resolve())]
+    if base_dir is not None:
+        try:
+            candidates.append(path.resolve().relative_to(base_dir).as_posix())
+        except ValueError:
+            pass
+    return next((c for c in candidates if c in by_path), None)
+
+
+def _hash_or_none(path: str) -> str | None:
+    try:
+        return analyzer._hash_file(Path(path))
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# CLI: metahunter verify
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="metahunter verify",
+        description="Verifica archivos limpios contra un reporte de integridad (Merkle root).",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        required=True,
+        help="Reporte de integridad generado con --integrity-report.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help="Archivos a verificar con su prueba de inclusión (sin rehashear el resto).",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rehashear todos los archivos del reporte y recalcular el Merkle root.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos para rehashear en paralelo con --full (por defecto: 1).",
+    )
+    args = parser.parse_args(argv)
+    if not args.full and not args.paths:
+        parser.error("indica archivos a verificar o usa --full")
+    return args
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = load_report(args.report)
+
+    if args.full:
+        root_ok, failures = verify_all(report, workers=args.workers)
+        for path, reason in failures:
+            print(f"[verify] FALLA {path}: {reason}")
+        total = len(report["files"])
+        print(f"[verify] {total - len(failures)}/{total} archivos correctos; "
+              f"Merkle root {'coincide' if root_ok else 'NO coincide'}")
+        return 0 if root_ok and not failures else 1
+
+    ok_all = True
+    for path, ok, reason in verify_files(report, args.paths):
+        ok_all &= ok
+        print(f"[verify] {'OK' if ok else 'FALLA'} {path}" + ("" if ok else f": {reason}"))
+    return 0 if ok_all else 1
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Iterable, Iterator, List, Set, Tuple
+
+# Política de enlaces simbólicos:
+# - files: sigue enlaces a archivos, no a directorios (comportamiento clásico)
+# - follow: sigue enlaces a archivos y directorios (con protección de ciclos)
+# - skip: ignora cualquier enlace simbólico
+SYMLINK_POLICIES = ("files", "follow", "skip")
+
+
+@dataclass
+class InputFile:
+    """
+    Archivo encontrado por el walker, con la información de `stat` ya
+    obtenida del DirEntry para no volver a consultarla más adelante.
+    """
+    path: Path
+    rel_path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @property
+    def signature(self) -> Tuple[int, int, int]:
+        return (self.size, self.mtime_ns, self.inode)
+
+
+def iter_input_files(
+    root: Path,
+    recursive: bool = False,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    min_size: int | None = None,
+    max_size: int | None = None,
+    newer_than_ns: int | None = None,
+    older_than_ns: int | None = None,
+    symlinks: str = "files",
+    skip_dirs: Iterable[Path] = (),
+    sort: bool = False,
+) -> Iterator[InputFile]:
+    """
+    Recorre `root` con os.scandir y va devolviendo archivos a medida que los
+    encuentra (generador), sin construir antes la lista completa.
+
+    - Orden: el de os.scandir, sin cargar el listado completo de cada
+      carpeta en memoria. Con `sort` las entradas de cada carpeta se ordenan
+      por nombre (orden determinista, pero lista entera por carpeta).
+    - include/exclude: globs (fnmatch) sobre la ruta relativa POSIX o el nombre;
+      un directorio excluido se poda entero.
+    - min_size/max_size y newer_than_ns/older_than_ns filtran por stat.
+    - skip_dirs: carpetas que nunca se recorren (p. ej. --output-dir si está
+      dentro de --input-dir).
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"Política de symlinks desconocida: {symlinks!r}")
+
+    include = list(include)
+    exclude = list(exclude)
+    skip_paths = {os.path.normcase(str(p)) for p in skip_dirs}
+    skip_keys = {k for k in map(_dir_key, skip_dirs) if k is not None}
+    visited: Set[Tuple[int, int]] = set()
+    root_key = _dir_key(root)
+    if root_key is not None:
+        visited.add(root_key)
+
+    stack: List[Tuple[str, str]] = [(str(root), "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            continue
+
+        subdirs: List[Tuple[str, str]] = []
+        with it:
+            entries = sorted(it, key=lambda e: e.name) if sort else it
+            for entry in entries:
+                rel = f"{rel_dir}{entry.name}"
+
+                try:
+                    is_link = entry.is_symlink()
+                    if is_link and symlinks == "skip":
+                        continue
+
+                    if entry.is_dir(follow_symlinks=(symlinks == "follow")):
+                        if not recursive or _matches(rel, entry.name, exclude):
+                            continue
+                        if os.path.normcase(entry.path) in skip_paths:
+                            continue
+                        key = _dir_key(Path(entry.path))
+                        if key is not None:
+                            # Evita ciclos de symlinks y carpetas a omitir
+                            # alcanzadas por otra ruta
+                            if key in visited or key in skip_keys:
+                                continue
+                            visited.add(key)
+                        subdirs.append((entry.path, rel + "/"))
+                        continue
+
+                    if not entry.is_file():
+                        continue
+
+                    st = entry.stat()
+                except OSError:
+                    continue
+
+                if include and not _matches(rel, entry.name, include):
+                    continue
+                if exclude and _matches(rel, entry.name, exclude):
+                    continue
+                if min_size is not None and st.st_size < min_size:
+                    continue
+                if max_size is not None and st.st_size > max_size:
+                    continue
+                if newer_than_ns is not None and st.st_mtime_ns < newer_than_ns:
+                    continue
+                if older_than_ns is not None and st.st_mtime_ns > older_than_ns:
+                    continue
+
+                yield InputFile(
+                    path=Path(entry.path),
+                    rel_path=rel,
+                    size=st.st_size,
+                    mtime_ns=st.st_mtime_ns,
+                    inode=st.st_ino,
+                )
+
+        # Pila LIFO: se apilan al revés para visitar las carpetas en orden
+        stack.extend(reversed(subdirs))
+
+
+def _dir_key(path: Path) -> Tuple[int, int] | None:
+    """(dispositivo, inodo) de una carpeta; None si no existe o el FS no da inodos."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino) if st.st_ino else None
+
+
+def _matches(rel: str, name: str, patterns: List[str]) -> bool:
+    return any(fnmatchcase(rel, p) or fnmatchcase(name, p) for p in patterns)
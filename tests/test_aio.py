@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import engine
+from metahunter.aio import process_files_async
+
+
+def _jobs(tmp_path, out):
+    return [(p, tmp_path / out / p.name) for p in sorted((tmp_path / "in").iterdir())]
+
+
+def test_modo_async_da_los_mismos_resultados_y_en_orden(tmp_path):
+    (tmp_path / "in").mkdir()
+    for i in range(12):
+        (tmp_path / "in" / f"f{i:02d}.txt").write_bytes(b"x" * (1000 * i))
+    (tmp_path / "in" / "roto.pdf").write_bytes(b"%PDF-1.4 sin xref")
+
+    sync = list(engine.process_files(_jobs(tmp_path, "a")))
+    asyn = list(process_files_async(_jobs(tmp_path, "b"), max_inflight=3))
+
+    assert [r.path for r in asyn] == [r.path for r in sync]
+    assert [r.clean_sha256 for r in asyn] == [r.clean_sha256 for r in sync]
+    assert [r.error_stage for r in asyn] == [r.error_stage for r in sync]
+    assert any(r.error_stage == "clean" for r in asyn)
+
+
+def test_modo_async_se_puede_cerrar_a_medias(tmp_path):
+    (tmp_path / "in").mkdir()
+    for i in range(10):
+        (tmp_path / "in" / f"f{i}.bin").write_bytes(bytes([i]) * 100)
+
+    results = process_files_async(_jobs(tmp_path, "out"), max_inflight=2)
+    first = next(results)
+    results.close()
+
+    assert first.path.endswith("f0.bin") and first.error is None
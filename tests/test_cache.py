@@ -0,0 +1,77 @@
+import os
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import engine
+from metahunter.cache import AnalysisCache, file_signature
+
+STATS = {"file": "a.txt", "sha256": "a" * 64, "size": 5}
+
+
+def test_acierto_y_fallo_por_mtime_o_inodo(tmp_path):
+    raw = tmp_path / "a.txt"
+    raw.write_bytes(b"12345")
+    sig = file_signature(raw.stat())
+
+    with AnalysisCache(tmp_path / "cache.sqlite", version="1") as cache:
+        assert cache.get(raw, sig) is None
+        cache.put(raw, sig, STATS)
+        assert cache.get(raw, sig) == STATS
+
+        size, mtime_ns, inode = sig
+        assert cache.get(raw, (size, mtime_ns + 1, inode)) is None
+        assert cache.get(raw, (size, mtime_ns, inode + 1)) is None
+        assert cache.get(raw, (size + 1, mtime_ns, inode)) is None
+        assert (cache.hits, cache.misses) == (1, 4)
+
+    # Tocar el archivo cambia el mtime y deja la entrada obsoleta
+    os.utime(raw, ns=(sig[1] + 10**9, sig[1] + 10**9))
+    with AnalysisCache(tmp_path / "cache.sqlite", version="1") as cache:
+        assert cache.get(raw, sig) == STATS
+        assert cache.get(raw, file_signature(raw.stat())) is None
+
+
+def test_otra_version_o_rebuild_invalida(tmp_path):
+    raw = tmp_path / "a.txt"
+    raw.write_bytes(b"12345")
+    sig = file_signature(raw.stat())
+    db = tmp_path / "cache.sqlite"
+
+    with AnalysisCache(db, version="1") as cache:
+        cache.put(raw, sig, STATS)
+    with AnalysisCache(db, version="2") as cache:
+        assert cache.get(raw, sig) is None
+    with AnalysisCache(db, version="1") as cache:
+        assert cache.get(raw, sig) == STATS
+    with AnalysisCache(db, version="1", rebuild=True) as cache:
+        assert len(cache) == 0
+
+
+def test_expulsion_lru(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    with AnalysisCache(db, version="1", max_entries=2) as cache:
+        for i in range(3):
+            cache.put(tmp_path / f"{i}.txt", (i, i, i), STATS)
+    with AnalysisCache(db, version="1") as cache:
+        assert len(cache) == 2
+
+
+def test_engine_reutiliza_el_analisis(tmp_path):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_text("hola", encoding="utf-8")
+    jobs = [(tmp_path / "in" / "a.txt", tmp_path / "out" / "a.txt")]
+    db = tmp_path / "cache.sqlite"
+
+    with AnalysisCache(db, version="1") as cache:
+        first = list(engine.process_files(jobs, cache=cache))
+    with AnalysisCache(db, version="1") as cache:
+        second = list(engine.process_files(jobs, cache=cache))
+
+    assert not first[0].from_cache
+    assert second[0].from_cache
+    assert second[0].stats == first[0].stats
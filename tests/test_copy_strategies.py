@@ -0,0 +1,64 @@
+import hashlib
+import shutil
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import engine
+from metahunter.engine import EngineOptions
+
+
+def _run(tmp_path, strategy):
+    jobs = [(p, tmp_path / "out" / p.name) for p in sorted((tmp_path / "in").iterdir())]
+    return list(engine.process_files(jobs, options=EngineOptions(copy_strategy=strategy)))
+
+
+def test_hardlink_y_despues_auto_no_trunca_el_raw(tmp_path):
+    (tmp_path / "in").mkdir()
+    raw = tmp_path / "in" / "blob.bin"
+    data = bytes(range(256)) * 1000
+    raw.write_bytes(data)
+
+    first = _run(tmp_path, "hardlink")
+    assert first[0].strategy == "hardlink"
+    assert (tmp_path / "out" / "blob.bin").stat().st_ino == raw.stat().st_ino
+
+    second = _run(tmp_path, "auto")
+    assert second[0].error is None
+    assert raw.read_bytes() == data
+    assert (tmp_path / "out" / "blob.bin").read_bytes() == data
+    # El limpio ya no comparte inodo con el RAW
+    assert (tmp_path / "out" / "blob.bin").stat().st_ino != raw.stat().st_ino
+    assert not [p for p in (tmp_path / "out").iterdir() if p.name.endswith(".tmp")]
+
+
+def test_estrategias_dan_los_mismos_bytes_y_hash(tmp_path):
+    (tmp_path / "in").mkdir()
+    # Vacío, menor que un bloque y varios MiB (más de una llamada al kernel)
+    blobs = {
+        "vacio.bin": b"",
+        "corto.txt": b"hola",
+        "grande.bin": bytes(range(256)) * (3 * 4096 + 7),
+    }
+    for name, data in blobs.items():
+        (tmp_path / "in" / name).write_bytes(data)
+
+    expected = {name: hashlib.sha256(data).hexdigest() for name, data in blobs.items()}
+    for strategy in ("stream", "auto", "hardlink"):
+        out_dir = tmp_path / "out"
+        results = _run(tmp_path, strategy)
+        for r in results:
+            name = Path(r.path).name
+            assert r.error is None, (strategy, r.error)
+            assert r.clean_sha256 == r.stats["sha256"] == expected[name], strategy
+            assert r.clean_size == len(blobs[name])
+            assert (out_dir / name).read_bytes() == blobs[name]
+        if strategy == "hardlink":
+            assert {r.strategy for r in results} == {"hardlink"}
+        else:
+            assert "hardlink" not in {r.strategy for r in results}
+        shutil.rmtree(out_dir)
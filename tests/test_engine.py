@@ -0,0 +1,71 @@
+import os
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+import pytest
+
+from metahunter import cli, engine
+
+
+def _make_inputs(tmp_path, names):
+    (tmp_path / "in").mkdir()
+    for i, name in enumerate(names):
+        # Tamaños decrecientes: los primeros tardan más que los últimos
+        (tmp_path / "in" / name).write_bytes(b"x" * (200_000 - 10_000 * i))
+    return [(tmp_path / "in" / n, tmp_path / "out" / n) for n in names]
+
+
+def test_workers_mantienen_el_orden_de_entrada(tmp_path):
+    names = [f"f{i:02d}.txt" for i in range(12)]
+    jobs = _make_inputs(tmp_path, names)
+
+    sync = list(engine.process_files(jobs, workers=1))
+    parallel = list(engine.process_files(iter(jobs), workers=3))
+
+    assert [Path(r.path).name for r in parallel] == names
+    assert [r.clean_sha256 for r in parallel] == [r.clean_sha256 for r in sync]
+    assert all(r.error is None for r in parallel)
+
+
+def _crashing_clean_file(input_path, *args, **kwargs):
+    if input_path.name == "crash.bin":
+        os._exit(1)  # simula un segfault del worker
+    return _real_clean_file(input_path, *args, **kwargs)
+
+
+_real_clean_file = engine.cleaner.clean_file
+
+
+def test_worker_que_muere_solo_afecta_a_su_archivo(tmp_path, monkeypatch):
+    names = ["a.txt", "b.txt", "crash.bin", "d.txt", "e.txt", "f.txt"]
+    jobs = _make_inputs(tmp_path, names)
+    # Los workers se crean con fork y heredan el parche
+    monkeypatch.setattr(engine.cleaner, "clean_file", _crashing_clean_file)
+
+    results = list(engine.process_files(jobs, workers=2))
+
+    assert [Path(r.path).name for r in results] == names
+    failed = [Path(r.path).name for r in results if r.error is not None]
+    assert failed == ["crash.bin"]
+    assert results[2].error_stage == "worker"
+    assert all((tmp_path / "out" / n).exists() for n in names if n != "crash.bin")
+
+
+def test_workers_menor_que_uno_es_un_error(tmp_path, monkeypatch, capsys):
+    jobs = _make_inputs(tmp_path, ["a.txt"])
+    for workers in (0, -2):
+        with pytest.raises(ValueError):
+            list(engine.process_files(jobs, workers=workers))
+
+        monkeypatch.setattr(sys, "argv", [
+            "metahunter", "--input-dir", "in", "--output-dir", "out",
+            "--log-path", "log.jsonl", "--workers", str(workers),
+        ])
+        with pytest.raises(SystemExit):
+            cli.parse_args()
+        assert "--workers" in capsys.readouterr().err
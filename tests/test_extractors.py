@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.extractors import _pdf_date, extract_metadata
+
+RAW = ROOT / "data" / "raw"
+
+
+def test_fecha_pdf_a_iso():
+    assert _pdf_date("D:20231201120000+01'00'") == "2023-12-01T12:00:00+01:00"
+    assert _pdf_date("D:2023") == "2023-01-01T00:00:00"
+
+
+def test_extrae_autor_de_docx_y_pdf():
+    docx = extract_metadata(RAW / "reporte_corporativo.docx")
+    assert docx["author"] == "Kevin Daniel"
+    assert docx["metadata_format"] == "zip"
+
+    pdf = extract_metadata(RAW / "contrato_fix.pdf")
+    assert pdf["creator_tool"].startswith("ReportLab")
+    assert pdf["created_at"].startswith("2025-11-25T")
+
+
+def test_archivo_danado_no_rompe_el_analisis(tmp_path):
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"%PDF-1.4\nbasura sin xref")
+
+    result = extract_metadata(broken)
+    assert result["metadata_format"] == "pdf"
+    assert "metadata_error" in result
+
+
+def test_numero_de_paginas_desde_el_catalogo(monkeypatch):
+    from PyPDF2 import PdfReader
+
+    expected = len(PdfReader(str(RAW / "contrato_fix.pdf")).pages)
+    # Si se recorriera el árbol de páginas, esto fallaría
+    monkeypatch.setattr(PdfReader, "pages", property(lambda self: 1 / 0))
+
+    assert extract_metadata(RAW / "contrato_fix.pdf")["page_count"] == expected
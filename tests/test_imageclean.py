@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from PIL import Image, PngImagePlugin
+
+from metahunter.cleaner import clean_file
+from metahunter.extractors import extract_metadata
+
+
+def _imagen() -> Image.Image:
+    return Image.frombytes("RGB", (16, 8), bytes(range(256)) * 1 + bytes(16 * 8 * 3 - 256))
+
+
+def _exif() -> Image.Exif:
+    exif = Image.Exif()
+    exif[315] = "Juan Secreto"  # Artist
+    exif[305] = "Midjourney"    # Software
+    return exif
+
+
+def test_imagenes_sin_metadatos_y_sin_recodificar(tmp_path):
+    img = _imagen()
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Author", "Juan Secreto")
+
+    originals = {
+        "foto.jpg": dict(exif=_exif(), comment=b"Juan Secreto"),
+        "foto.png": dict(exif=_exif(), pnginfo=info),
+        "foto.webp": dict(exif=_exif(), lossless=True),
+        "foto.tiff": dict(exif=_exif()),
+    }
+    for name, kwargs in originals.items():
+        src = tmp_path / name
+        dst = tmp_path / f"limpio_{name}"
+        img.save(src, **kwargs)
+
+        result = clean_file(src, dst)
+
+        assert result.strategy.startswith("image-")
+        assert b"Juan Secreto" not in dst.read_bytes()
+        assert "author" in extract_metadata(src)
+        assert "author" not in extract_metadata(dst)
+        with Image.open(src) as before, Image.open(dst) as after:
+            assert before.tobytes() == after.tobytes()
@@ -0,0 +1,141 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import cleaner, cli, engine, incremental
+from metahunter.engine import EngineOptions
+
+
+def _entry(output_path, raw_sha256="a" * 64):
+    st = output_path.stat() if output_path.exists() else None
+    return {
+        "raw_sha256": raw_sha256,
+        "output": str(output_path),
+        "clean_sha256": "b" * 64,
+        "clean_size": st.st_size if st else 5,
+        "clean_mtime_ns": st.st_mtime_ns if st else 0,
+        "clean_inode": st.st_ino if st else 0,
+    }
+
+
+def _manifest_entry(r):
+    return {
+        "raw_sha256": r.stats["sha256"],
+        "output": r.output,
+        "clean_sha256": r.clean_sha256,
+        "clean_size": r.clean_size,
+        "clean_mtime_ns": r.clean_mtime_ns,
+        "clean_inode": r.clean_inode,
+    }
+
+
+def test_is_unchanged(tmp_path):
+    out = tmp_path / "limpio.txt"
+    out.write_bytes(b"12345")
+    entry = _entry(out)
+
+    assert incremental.is_unchanged(entry, "a" * 64, out)
+    assert not incremental.is_unchanged(None, "a" * 64, out)
+    # RAW modificado
+    assert not incremental.is_unchanged(entry, "c" * 64, out)
+    # Otra ruta de salida
+    assert not incremental.is_unchanged(entry, "a" * 64, tmp_path / "otro.txt")
+    # Limpio modificado con el mismo tamaño, sustituido, truncado o borrado
+    st = out.stat()
+    out.write_bytes(b"54321")
+    os.utime(out, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert not incremental.is_unchanged(entry, "a" * 64, out)
+    replacement = tmp_path / "nuevo.txt"
+    replacement.write_bytes(b"12345")
+    os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(replacement, out)
+    assert not incremental.is_unchanged(entry, "a" * 64, out)
+    out.write_bytes(b"123")
+    assert not incremental.is_unchanged(entry, "a" * 64, out)
+    out.unlink()
+    assert not incremental.is_unchanged(entry, "a" * 64, out)
+
+
+def test_manifiesto_se_invalida_al_cambiar_opciones_o_version(tmp_path, monkeypatch):
+    path = tmp_path / incremental.DEFAULT_MANIFEST_NAME
+    files = {"raw/a.txt": _entry(tmp_path / "a.txt")}
+    options = EngineOptions()
+    incremental.save_run_manifest(path, files, options.to_dict())
+
+    assert incremental.load_run_manifest(path, options.to_dict()) == files
+    assert incremental.load_run_manifest(path, EngineOptions(pdf_mode="full").to_dict()) == {}
+    assert incremental.load_run_manifest(path, EngineOptions(copy_strategy="stream").to_dict()) == {}
+
+    monkeypatch.setattr(cleaner, "CLEANER_VERSION", cleaner.CLEANER_VERSION + 1)
+    assert incremental.load_run_manifest(path, options.to_dict()) == {}
+
+
+def test_manifiesto_corrupto_o_ausente_limpia_todo(tmp_path):
+    path = tmp_path / incremental.DEFAULT_MANIFEST_NAME
+    assert incremental.load_run_manifest(path, EngineOptions().to_dict()) == {}
+    path.write_text("{no es json", encoding="utf-8")
+    assert incremental.load_run_manifest(path, EngineOptions().to_dict()) == {}
+
+
+def test_segunda_ejecucion_no_vuelve_a_limpiar(tmp_path):
+    (tmp_path / "in").mkdir()
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / "in" / name).write_text(name, encoding="utf-8")
+    jobs = [(p, tmp_path / "out" / p.name) for p in sorted((tmp_path / "in").iterdir())]
+
+    manifest = {r.path: _manifest_entry(r) for r in engine.process_files(jobs)}
+    (tmp_path / "in" / "b.txt").write_text("cambiado", encoding="utf-8")
+
+    second = list(engine.process_files(jobs, manifest=manifest))
+    assert [r.unchanged for r in second] == [True, False]
+    assert second[0].clean_sha256 == manifest[second[0].path]["clean_sha256"]
+
+
+def test_limpio_manipulado_con_el_mismo_tamano_se_vuelve_a_limpiar(tmp_path):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_text("original", encoding="utf-8")
+    jobs = [(tmp_path / "in" / "a.txt", tmp_path / "out" / "a.txt")]
+    manifest = {r.path: _manifest_entry(r) for r in engine.process_files(jobs)}
+
+    (tmp_path / "out" / "a.txt").write_text("alterado", encoding="utf-8")
+
+    second = list(engine.process_files(jobs, manifest=manifest))
+    assert not second[0].unchanged
+    assert (tmp_path / "out" / "a.txt").read_text(encoding="utf-8") == "original"
+    assert second[0].clean_sha256 == manifest[second[0].path]["clean_sha256"]
+
+
+def _run_pipeline(tmp_path, **kwargs):
+    cli.run_pipeline(
+        input_dir=tmp_path / "in",
+        output_dir=tmp_path / "out",
+        log_path=tmp_path / "work" / "log.jsonl",
+        use_ai=False,
+        stats_path=tmp_path / "work" / "stats.json",
+        use_cache=False,
+        **kwargs,
+    )
+    log = (tmp_path / "work" / "log.jsonl").read_text(encoding="utf-8")
+    return [json.loads(line)["event"] for line in log.splitlines()]
+
+
+def test_manifiesto_solo_con_incremental_y_fuera_de_la_salida(tmp_path, capsys):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_text("hola", encoding="utf-8")
+    manifest_path = tmp_path / "work" / incremental.DEFAULT_MANIFEST_NAME
+
+    _run_pipeline(tmp_path)
+    assert not manifest_path.exists()
+    assert [p.name for p in (tmp_path / "out").iterdir()] == ["a.txt"]
+
+    _run_pipeline(tmp_path, incremental_mode=True)
+    assert manifest_path.exists()
+    assert [p.name for p in (tmp_path / "out").iterdir()] == ["a.txt"]
+
+    assert "file_unchanged" in _run_pipeline(tmp_path, incremental_mode=True)
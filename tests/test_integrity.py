@@ -0,0 +1,86 @@
+import hashlib
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import integrity
+from metahunter.integrity import build_integrity_report, verify_integrity_report
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _rfc6962_root(digests):
+    # Definición recursiva de RFC 6962 (MTH) como referencia
+    if len(digests) == 1:
+        return hashlib.sha256(b"\x00" + digests[0]).digest()
+    k = 1
+    while k * 2 < len(digests):
+        k *= 2
+    left, right = _rfc6962_root(digests[:k]), _rfc6962_root(digests[k:])
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def test_merkle_v2_coincide_con_rfc6962():
+    for n in range(1, 20):
+        hashes = [_sha(str(i).encode()) for i in range(n)]
+        expected = _rfc6962_root([bytes.fromhex(h) for h in hashes]).hex()
+        assert integrity.compute_merkle_root(hashes, version=2) == expected
+
+
+def test_merkle_v2_en_paralelo_da_la_misma_raiz(monkeypatch):
+    monkeypatch.setattr(integrity, "PARALLEL_MIN_LEAVES", 4)
+    hashes = [_sha(str(i).encode()) for i in range(23)]
+    assert integrity.compute_merkle_root(hashes, workers=2) == integrity.compute_merkle_root(hashes)
+
+
+def test_reporte_v1_sin_version_sigue_verificando():
+    hashes = {"a.pdf": _sha(b"a"), "b.pdf": _sha(b"b"), "c.pdf": _sha(b"c")}
+
+    v1 = build_integrity_report(hashes, version=1).to_dict()
+    del v1["format_version"]
+    assert verify_integrity_report(v1)
+
+    v2 = build_integrity_report(hashes).to_dict()
+    assert v2["format_version"] == 2
+    assert v2["merkle_root"] != v1["merkle_root"]
+    assert verify_integrity_report(v2)
+
+    v2["files"][0]["hash"] = _sha(b"otro")
+    assert not verify_integrity_report(v2)
+
+
+def test_pruebas_de_inclusion_llevan_al_root():
+    for n in (1, 2, 5, 8, 13):
+        hashes = {f"f{i}": _sha(str(i).encode()) for i in range(n)}
+        report = build_integrity_report(hashes, proofs=True).to_dict()
+        root = report["merkle_root"]
+        for entry in report["files"]:
+            assert len(entry["proof"]) <= max(1, (n - 1).bit_length())
+            assert integrity.verify_inclusion(entry["hash"], entry["index"], n, entry["proof"], root)
+            assert not integrity.verify_inclusion(_sha(b"otro"), entry["index"], n, entry["proof"], root)
+
+
+def test_verify_detecta_archivo_modificado(tmp_path):
+    from metahunter import verify
+
+    files = {}
+    for i in range(5):
+        p = tmp_path / f"f{i}.txt"
+        p.write_bytes(b"contenido %d" % i)
+        files[str(p)] = _sha(p.read_bytes())
+    report = build_integrity_report(files).to_dict()
+
+    target = tmp_path / "f3.txt"
+    assert all(ok for _, ok, _ in verify.verify_files(report, [target]))
+    assert verify.verify_all(report) == (True, [])
+
+    target.write_bytes(b"manipulado")
+    assert [ok for _, ok, _ in verify.verify_files(report, [target])] == [False]
+    root_ok, failures = verify.verify_all(report)
+    assert not root_ok and failures == [(str(target), "el hash no coincide")]
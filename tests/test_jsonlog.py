@@ -0,0 +1,58 @@
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.jsonlog import JsonlLogger
+
+
+def _events(text):
+    return [json.loads(line)["details"]["i"] for line in text.splitlines() if line]
+
+
+def test_flush_por_tamano_intervalo_y_cierre(tmp_path):
+    log_path = tmp_path / "run.jsonl"
+
+    log = JsonlLogger(log_path, "r1", flush_interval=0, flush_size=3)
+    log.event("test", "INFO", "e", {"i": 0})
+    log.event("test", "INFO", "e", {"i": 1})
+    assert log_path.read_text(encoding="utf-8") == ""
+    log.event("test", "INFO", "e", {"i": 2})
+    assert _events(log_path.read_text(encoding="utf-8")) == [0, 1, 2]
+    log.event("test", "INFO", "e", {"i": 3})
+    log.close()
+    assert _events(log_path.read_text(encoding="utf-8")) == [0, 1, 2, 3]
+
+    # Con intervalo, el hilo de fondo vacía el buffer sin llegar a flush_size
+    with JsonlLogger(log_path, "r2", flush_interval=0.05, flush_size=1000) as log:
+        log.event("test", "INFO", "e", {"i": 4})
+        deadline = time.monotonic() + 2
+        while len(_events(log_path.read_text(encoding="utf-8"))) < 5:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+
+def test_rotacion_comprime_sin_perder_eventos(tmp_path):
+    log_path = tmp_path / "run.jsonl"
+    with JsonlLogger(log_path, "r1", flush_interval=0, flush_size=1,
+                     rotate_bytes=500, compress="gzip") as log:
+        for i in range(40):
+            log.event("test", "INFO", "e", {"i": i})
+
+    rotated = sorted(tmp_path.glob("run.jsonl.*.gz"))
+    assert len(rotated) > 1
+    # Ningún rotado queda sin comprimir
+    assert sorted(tmp_path.iterdir()) == sorted(rotated + [log_path])
+
+    seen = []
+    for path in rotated:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            seen += _events(f.read())
+    seen += _events(log_path.read_text(encoding="utf-8"))
+    assert seen == list(range(40))
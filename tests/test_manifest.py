@@ -0,0 +1,45 @@
+import hashlib
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.integrity import build_integrity_report
+from metahunter.manifest import diff_manifests, iter_manifest, write_manifest
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def test_reporte_y_manifiesto_canonicos_no_dependen_del_orden(tmp_path):
+    base = tmp_path / "clean"
+    names = ["b.pdf", "a/z.docx", "Á.txt", "a.pdf", "B.jpg"]
+    hashes = {str(base / n): _sha(n) for n in names}
+    sizes = {p: len(p) for p in hashes}
+
+    report = build_integrity_report(hashes, base_dir=base, sizes=sizes)
+    reversed_report = build_integrity_report(dict(reversed(hashes.items())), base_dir=base, sizes=sizes)
+
+    # Orden por bytes UTF-8: mayúsculas antes que minúsculas, no ASCII al final
+    assert [f["path"] for f in report.files] == ["B.jpg", "a.pdf", "a/z.docx", "b.pdf", "Á.txt"]
+    assert report.merkle_root == reversed_report.merkle_root
+    assert report.base_dir == str(base)
+
+    entries = [(f["path"], f["size"], f["hash"]) for f in reversed(report.files)]
+    root = write_manifest(tmp_path / "m.jsonl", entries, base_dir=base)
+    assert root == report.merkle_root
+    assert list(iter_manifest(tmp_path / "m.jsonl")) == sorted(entries, key=lambda e: e[0].encode())
+
+
+def test_diff_de_manifiestos():
+    old = [("a", 1, _sha("a")), ("b", 1, _sha("b")), ("c", 1, _sha("c"))]
+    new = [("a", 1, _sha("a")), ("c", 2, _sha("c2")), ("d", 1, _sha("d"))]
+
+    diff = [(status, path) for status, path, _, _ in diff_manifests(old, new)]
+
+    assert diff == [("removed", "b"), ("changed", "c"), ("added", "d")]
+    assert list(diff_manifests(old, old)) == []
@@ -0,0 +1,80 @@
+import hashlib
+import random
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.integrity import compute_merkle_root, verify_inclusion
+from metahunter.merkle_store import MerkleStore, update_store
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def test_almacen_coincide_con_arbol_completo_tras_cambios(tmp_path):
+    path = tmp_path / "merkle.bin"
+    rnd = random.Random(7)
+    expected = {}
+
+    for step in range(80):
+        updates = {f"d{rnd.randint(0, 3)}/f{rnd.randint(0, 30)}.pdf": _sha(f"{step}-{i}") for i in range(rnd.randint(0, 6))}
+        deletes = rnd.sample(sorted(expected), min(len(expected), rnd.randint(0, 3)))
+        deletes = [d for d in deletes if d not in updates]
+
+        store = MerkleStore(path)
+        store.apply(updates, deletes)
+        store.save()
+        for d in deletes:
+            del expected[d]
+        expected.update(updates)
+
+        reloaded = MerkleStore(path)
+        keys = sorted(expected)
+        root = compute_merkle_root([expected[k] for k in keys]) if keys else None
+        assert reloaded.paths == keys
+        assert store.root() == reloaded.root() == root
+        if keys:
+            index, count, proof = reloaded.proof(keys[-1])
+            assert verify_inclusion(expected[keys[-1]], index, count, proof, root)
+
+
+def test_actualizar_hash_escribe_en_sitio(tmp_path):
+    path = tmp_path / "merkle.bin"
+    store = MerkleStore(path)
+    store.apply({f"f{i:03d}": _sha(str(i)) for i in range(100)})
+    store.save()
+    size = path.stat().st_size
+
+    store = MerkleStore(path)
+    assert store.apply({"f042": _sha("nuevo")}) == {"added": 0, "updated": 1, "deleted": 0}
+    store.save()
+
+    assert path.stat().st_size == size
+    assert MerkleStore(path).get("f042") == _sha("nuevo")
+    assert MerkleStore(path).root() == store.root()
+
+
+def test_update_store_borra_lo_que_no_vio_el_recorrido(tmp_path):
+    path = tmp_path / "merkle.bin"
+    base = tmp_path / "out"
+    hashes = {str(base / rel): _sha(rel) for rel in ("a.pdf", "b.pdf", "sub/c.pdf")}
+    update_store(path, base, hashes)
+
+    # Los archivos no existen en disco: sin `seen` (ejecución con filtros) no se borra nada
+    _, counts = update_store(path, base, {str(base / "a.pdf"): _sha("a2")})
+    assert counts == {"added": 0, "updated": 1, "deleted": 0}
+
+    # Sin recursión solo se borran rutas del primer nivel no vistas
+    _, counts = update_store(path, base, {str(base / "a.pdf"): _sha("a2")}, seen={"a.pdf"}, recursive=False)
+    assert counts["deleted"] == 1
+    assert MerkleStore(path).paths == ["a.pdf", "sub/c.pdf"]
+
+    # Un archivo visto con error conserva su hoja aunque no traiga hash nuevo
+    store, counts = update_store(path, base, {}, seen={"sub/c.pdf"})
+    assert counts["deleted"] == 1
+    assert store.paths == ["sub/c.pdf"]
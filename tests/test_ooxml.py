@@ -0,0 +1,39 @@
+import hashlib
+import sys
+import zipfile
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.cleaner import clean_file
+from metahunter.ooxml import DOC_PROPS_MEMBERS, read_doc_props
+
+RAW = ROOT / "data" / "raw"
+
+
+def test_limpieza_docx_solo_reescribe_docprops(tmp_path):
+    src = RAW / "reporte_corporativo.docx"
+    dst = tmp_path / src.name
+
+    result = clean_file(src, dst)
+
+    assert result.strategy == "ooxml"
+    assert result.raw_sha256 == hashlib.sha256(src.read_bytes()).hexdigest()
+    assert result.clean_sha256 == hashlib.sha256(dst.read_bytes()).hexdigest()
+
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst) as zout:
+        assert zout.testzip() is None
+        assert zin.namelist() == zout.namelist()
+        for info in zin.infolist():
+            if info.filename in DOC_PROPS_MEMBERS:
+                continue
+            # Bytes comprimidos copiados sin recomprimir
+            assert zout.getinfo(info.filename).compress_size == info.compress_size
+            assert zout.read(info.filename) == zin.read(info)
+
+    props = read_doc_props(dst)
+    assert b"Kevin Daniel" not in props["docProps/core.xml"]
+    assert b"Kevin Daniel" in read_doc_props(src)["docProps/core.xml"]
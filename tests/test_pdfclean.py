@@ -0,0 +1,110 @@
+import hashlib
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.errors import PyPdfError
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, TextStringObject
+
+from metahunter import cleaner
+from metahunter.cleaner import clean_file
+from metahunter.hashio import SeekableHashingReader
+
+
+def _pdf_con_metadatos(path: Path) -> None:
+    writer = PdfWriter()
+    page = writer.add_blank_page(200, 200)
+    page[NameObject("/PieceInfo")] = DictionaryObject(
+        {NameObject("/App"): TextStringObject("Juan Secreto")}
+    )
+    writer.add_metadata({"/Author": "Juan Secreto"})
+
+    xmp = DecodedStreamObject()
+    xmp.set_data(b"<x:xmpmeta>Juan Secreto</x:xmpmeta>")
+    writer._root_object[NameObject("/Metadata")] = writer._add_object(xmp)
+
+    with path.open("wb") as f:
+        writer.write(f)
+
+
+def test_modos_pdf_eliminan_info_xmp_y_pieceinfo(tmp_path):
+    src = tmp_path / "meta.pdf"
+    _pdf_con_metadatos(src)
+
+    for mode in ("fast", "full"):
+        dst = tmp_path / f"limpio_{mode}.pdf"
+        result = clean_file(src, dst, pdf_mode=mode)
+
+        assert result.strategy == f"pdf-{mode}"
+        assert b"Juan Secreto" not in dst.read_bytes()
+
+        reader = PdfReader(str(dst), strict=True)
+        assert len(reader.pages) == 1
+        assert "/Metadata" not in reader.trailer["/Root"]
+        assert "/PieceInfo" not in reader.pages[0]
+
+
+def test_falso_pdf_sin_extension_pdf_se_copia_tal_cual(tmp_path):
+    data = b"%PDF-1.7 es la cabecera que buscamos\n"
+    for mode in ("fast", "full"):
+        notes = tmp_path / "notas.txt"
+        notes.write_bytes(data)
+        out = tmp_path / mode / "notas.txt"
+        out.parent.mkdir()
+
+        result = clean_file(notes, out, pdf_mode=mode)
+
+        assert out.read_bytes() == data
+        assert result.strategy != "pdf-fast" and result.strategy != "pdf-full"
+
+
+def test_pdf_roto_con_extension_pdf_sigue_fallando(tmp_path):
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"%PDF-1.4\nbasura sin xref")
+
+    with pytest.raises(PyPdfError):
+        clean_file(broken, tmp_path / "out.pdf")
+    assert not (tmp_path / "out.pdf").exists()
+
+
+def test_modo_fast_hashea_el_raw_sin_pasada_extra(tmp_path, monkeypatch):
+    src = tmp_path / "meta.pdf"
+    _pdf_con_metadatos(src)
+    data = src.read_bytes()
+    monkeypatch.setattr(cleaner, "_hash_path", lambda path: 1 / 0)
+
+    result = clean_file(src, tmp_path / "limpio.pdf", pdf_mode="fast")
+
+    assert result.strategy == "pdf-fast"
+    assert result.raw_sha256 == hashlib.sha256(data).hexdigest()
+    assert result.bytes_read >= len(data)
+
+    # Hashear no añade una pasada completa a la E/S de la limpieza
+    known = clean_file(src, tmp_path / "limpio2.pdf", pdf_mode="fast", known_sha256="x" * 64)
+    assert known.raw_sha256 == "x" * 64
+    assert known.bytes_read <= result.bytes_read < known.bytes_read + len(data) // 2
+
+
+def test_lector_con_seek_hashea_todo_el_archivo(tmp_path):
+    data = bytes(range(256)) * 50
+    (tmp_path / "blob.bin").write_bytes(data)
+    reader = SeekableHashingReader(tmp_path / "blob.bin")
+    reader.seek(len(data) - 100)
+    reader.read(100)
+    reader.seek(0)
+    reader.read(10)
+    reader.seek(5)
+    reader.readline()
+    reader.hash_until(3000)
+    reader.seek(2000)
+    reader.read(2000)
+    reader.drain()
+
+    assert reader.hexdigest() == hashlib.sha256(data).hexdigest()
+    reader.__exit__(None, None, None)
@@ -0,0 +1,83 @@
+import random
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.reporter import QuantileSketch, aggregate
+
+
+def test_sketch_error_relativo_y_merge():
+    rnd = random.Random(3)
+    values = [rnd.lognormvariate(2, 1.5) for _ in range(20000)]
+    a, b = QuantileSketch(), QuantileSketch()
+    for i, v in enumerate(values):
+        (a if i % 2 else b).add(v)
+    a.merge(b)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(a.quantile(q) - exact) / exact <= 0.011
+
+
+def test_aggregate_lee_details_en_streaming():
+    events = (
+        (Path("log.jsonl"), {"module": "cleaner", "level": "INFO", "event": "file_cleaned",
+                             "details": {"duration_ms": float(i)}})
+        for i in range(1, 101)
+    )
+    summary = aggregate(events)
+
+    dm = summary["duration_ms"]
+    assert summary["total_events"] == 100
+    assert (dm["count"], dm["min"], dm["max"], dm["sum"]) == (100, 1.0, 100.0, 5050.0)
+    assert abs(dm["p50"] - 50) <= 1
+    assert summary["events_duration_ms"]["file_cleaned"]["count"] == 100
+
+
+def test_aggregate_tiempos_por_etapa():
+    events = [
+        (Path("log.jsonl"), {"module": "cleaner", "event": "file_cleaned", "details": {
+            "duration_ms": 5.0, "stages_ms": {"clean": 3.0, "extract": 1.0},
+            "bytes_read": 100, "bytes_written": 80}}),
+        (Path("log.jsonl"), {"module": "cleaner", "event": "file_cleaned", "details": {
+            "duration_ms": 7.0, "stages_ms": {"clean": 5.0}, "bytes_read": 50, "bytes_written": 40}}),
+        (Path("log.jsonl"), {"module": "cli", "event": "run_finished", "details": {
+            "stages_ms": {"merkle": 2.0}, "peak_rss_kb": {"self": 2048, "children": 4096}}}),
+    ]
+    summary = aggregate(events)
+
+    assert summary["stages_ms"]["clean"]["sum"] == 8.0
+    assert summary["stages_ms"]["clean"]["max"] == 5.0
+    assert set(summary["stages_ms"]) == {"clean", "extract", "merkle"}
+    assert summary["bytes"] == {"read": 150, "written": 120}
+    assert summary["peak_rss_kb"] == {"self": 2048, "children": 4096}
+
+
+def test_store_ingesta_incremental_y_filtros(tmp_path):
+    from metahunter.reporter import LogStore, build_filters
+
+    log = tmp_path / "logs.jsonl"
+    lines = [
+        '{"timestamp": "2025-01-01T10:00:00Z", "run_id": "A", "module": "cli", "level": "INFO", "event": "run_started"}\n',
+        '{"timestamp": "2025-01-02T10:00:00Z", "run_id": "A", "module": "cleaner", "level": "ERROR", "event": "file_clean_error"}\n',
+        '{"timestamp": "2025-01-03T10:00:00Z", "run_id": "B", "module": "cleaner", "level": "ERROR", "event": "file_clean_error"}\n',
+    ]
+    # La última línea aún se está escribiendo
+    log.write_text(lines[0] + lines[1] + lines[2][:20], encoding="utf-8")
+
+    store = LogStore(tmp_path / "logs.sqlite")
+    assert store.ingest([tmp_path]) == 2
+    with log.open("a", encoding="utf-8") as f:
+        f.write(lines[2][20:])
+    assert store.ingest([tmp_path]) == 1
+    assert store.ingest([tmp_path]) == 0
+
+    errors = build_filters(level=["error"], since="2025-01-02")
+    assert [r["run_id"] for _, r in store.query(errors)] == ["A", "B"]
+    assert [r["event"] for _, r in store.query(build_filters(run_id=["B"]))] == ["file_clean_error"]
+    store.close()
@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+import pytest
+
+from metahunter import advanced, signatures
+from metahunter.signatures import SIGNATURES_ENV, SignatureMatcher, load_signatures
+
+
+def test_matcher_reporta_firmas_solapadas_y_prefijos():
+    matcher = SignatureMatcher([
+        ("adobe firefly", "Adobe Firefly"),
+        ("firefly", "Adobe Firefly"),
+        ("dall", "DALL-E"),
+        ("dall-e", "DALL-E"),
+    ])
+
+    assert sorted(matcher.find("creado con adobe firefly y dall-e")) == [
+        "adobe firefly", "dall", "dall-e", "firefly",
+    ]
+    assert matcher.find("sin coincidencias") == []
+
+
+def test_match_metadata_indica_el_campo():
+    matcher = SignatureMatcher([("midjourney", "Midjourney")])
+
+    matches = matcher.match_metadata({"name": "foto.png", "software": "Midjourney v6", "gps": None})
+
+    assert [(m.signature, m.field) for m in matches] == [("midjourney", "software")]
+
+
+def test_archivo_de_firmas_por_defecto():
+    matcher = load_signatures()
+
+    assert matcher.version
+    assert "midjourney" in matcher.patterns
+
+
+def test_firmas_configuradas_y_rotas_dan_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(advanced, "_matcher", None)
+
+    monkeypatch.setenv(SIGNATURES_ENV, str(tmp_path / "no_existe.json"))
+    with pytest.raises(ValueError, match=SIGNATURES_ENV):
+        advanced.get_signature_matcher()
+
+    broken = tmp_path / "firmas.json"
+    broken.write_text('{"signatures": [{"generator": "sin patrón"}]}', encoding="utf-8")
+    monkeypatch.setenv(SIGNATURES_ENV, str(broken))
+    with pytest.raises(ValueError, match="firmas.json"):
+        advanced.get_signature_matcher()
+    assert advanced._matcher is None
+
+
+def test_sin_variable_se_usan_las_firmas_de_respaldo(tmp_path, monkeypatch):
+    monkeypatch.setattr(advanced, "_matcher", None)
+    monkeypatch.delenv(SIGNATURES_ENV, raising=False)
+    monkeypatch.setattr(signatures, "DEFAULT_SIGNATURES_PATH", tmp_path / "no_existe.json")
+
+    assert advanced.get_signature_matcher().version == "builtin"
+
+
+def test_firmas_de_palabra_y_campo_no_dan_falsos_positivos():
+    matcher = load_signatures()
+
+    def hits(metadata):
+        return sorted(m.signature for m in matcher.match_metadata(metadata))
+
+    assert hits({"software": "Canva"}) == ["canva"]
+    assert hits({"creator_tool": "Gemini 1.5 (Google)"}) == ["gemini"]
+    # Palabras que solo contienen la firma
+    assert hits({"creator_tool": "Canvas X Draw", "software": "Geminiano Studio"}) == []
+    # Carpetas o textos libres que sí la contienen entera
+    assert hits({"path": "/home/ana/gemini/canva/foto.png", "comment": "hecho en canva"}) == []
+    # El resto de firmas sigue buscándose en todos los campos
+    assert hits({"path": "/fotos/midjourney/a.png"}) == ["midjourney"]
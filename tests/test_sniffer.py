@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.analyzer import analyze_file
+from metahunter.sniffer import is_mismatch, sniff_format, sniff_mime
+
+RAW = ROOT / "data" / "raw"
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def test_formato_por_bytes_magicos():
+    assert sniff_format(b"%PDF-1.7\n") == "pdf"
+    assert sniff_format(b"PK\x03\x04\x14\x00") == "zip"
+    assert sniff_format(b"\x89PNG\r\n\x1a\n\x00\x00") == "png"
+    assert sniff_format(b"RIFF\x00\x00\x00\x00WEBPVP8X") == "webp"
+    assert sniff_format(b"Nota de prueba") is None
+    assert sniff_mime(b"\x00\x00\x00\x18ftypheic\x00\x00") == "image/heic"
+
+
+def test_zip_compatible_con_ooxml():
+    assert not is_mismatch(DOCX, "application/zip")
+    assert is_mismatch("application/pdf", "application/zip")
+    assert is_mismatch("image/jpeg", "image/heic")
+
+
+def test_archivo_renombrado_se_detecta_por_contenido(tmp_path):
+    renamed = tmp_path / "informe.pdf"
+    renamed.write_bytes((RAW / "reporte_corporativo.docx").read_bytes())
+
+    stats = analyze_file(renamed)
+
+    assert stats["declared_mime_type"] == "application/pdf"
+    assert stats["detected_mime_type"] == "application/zip"
+    assert stats["mime_mismatch"] is True
+    # Los metadatos se extraen según el contenido real, no la extensión
+    assert stats["author"] == "Kevin Daniel"
+
+
+def test_firmas_cortas_exigen_cabecera_valida():
+    bmp = b"BM" + (70).to_bytes(4, "little") + b"\x00" * 4 + (54).to_bytes(4, "little") + (40).to_bytes(4, "little")
+    assert sniff_mime(bmp + b"\x00" * 32) == "image/bmp"
+    # Texto o binario que solo empieza por "BM"/"MZ"
+    assert sniff_mime("BMW Serie 3, ficha técnica".encode()) == "text/plain"
+    assert sniff_mime(b"BM" + b"\x00\xff" * 20) == "application/octet-stream"
+    assert sniff_mime(b"MZ y luego texto cualquiera" * 4) == "text/plain"
+
+    pe = bytearray(256)
+    pe[:2] = b"MZ"
+    pe[0x3C:0x40] = (0x80).to_bytes(4, "little")
+    pe[0x80:0x84] = b"PE\x00\x00"
+    assert sniff_mime(bytes(pe)) == "application/x-msdownload"
+    pe[0x80:0x84] = b"NE\x00\x00"
+    assert sniff_mime(bytes(pe)) == "application/octet-stream"
+
+
+def test_cabecera_pdf_dentro_del_primer_kib():
+    assert sniff_format(b"\xef\xbb\xbf%PDF-1.4\n") == "pdf"
+    assert sniff_format(b"\x00" * 600 + b"%PDF-1.7\n") == "pdf"
+    assert sniff_format(b"\x00" * 1030 + b"%PDF-1.7\n") is None
+
+
+def test_pdf_mencionado_en_texto_no_es_pdf(tmp_path):
+    assert sniff_mime(b"Formato esperado: %PDF-1.7 o superior\n") == "text/plain"
+    assert sniff_mime(b"id;tipo\n1;%PDF-1.4\n") == "text/plain"
+    assert sniff_mime(b"  \r\n%PDF-1.4\n") == "application/pdf"
+
+    notes = tmp_path / "notas.txt"
+    notes.write_text("La cabecera de un PDF es %PDF-1.7\n", encoding="utf-8")
+    stats = analyze_file(notes)
+    assert stats["detected_mime_type"] == "text/plain"
+    assert stats["mime_mismatch"] is False
@@ -0,0 +1,54 @@
+import sys
+import time
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter import engine
+from metahunter.stages import process_files_staged
+
+
+def _make_inputs(tmp_path, n):
+    (tmp_path / "in").mkdir()
+    for i in range(n):
+        (tmp_path / "in" / f"f{i:03d}.txt").write_bytes(b"x" * (100 * i))
+    return sorted((tmp_path / "in").iterdir())
+
+
+def test_etapas_dan_los_mismos_resultados_y_en_orden(tmp_path):
+    paths = _make_inputs(tmp_path, 15)
+    (tmp_path / "in" / "roto.pdf").write_bytes(b"%PDF-1.4 sin xref")
+    paths = sorted((tmp_path / "in").iterdir())
+
+    sync = list(engine.process_files((p, tmp_path / "a" / p.name) for p in paths))
+    staged = list(process_files_staged(
+        ((p, tmp_path / "b" / p.name) for p in paths),
+        max_inflight=4,
+        queue_depth=1,
+    ))
+
+    assert [r.path for r in staged] == [r.path for r in sync]
+    assert [r.clean_sha256 for r in staged] == [r.clean_sha256 for r in sync]
+    assert [r.error_stage for r in staged] == [r.error_stage for r in sync]
+    assert all(r.stats is not None for r in staged)
+
+
+def test_contrapresion_limita_los_archivos_en_vuelo(tmp_path):
+    paths = _make_inputs(tmp_path, 40)
+    pulled = []
+
+    def jobs():
+        for p in paths:
+            pulled.append(p)
+            yield p, tmp_path / "out" / p.name
+
+    results = process_files_staged(jobs(), max_inflight=3, queue_depth=1)
+    first = next(results)
+    # El consumidor va lento: la tubería se llena y deja de pedir archivos
+    time.sleep(0.3)
+    assert first.error is None
+    assert len(pulled) <= 3 + 2
+    results.close()
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.analyzer import StatsWriter, compact_stats_jsonl, save_stats
+
+ENTRIES = [
+    {
+        "path": "/datos/Año 2024/informe\nfinal.pdf",
+        "sha256": "a" * 64,
+        "size": 1234,
+        "metadata": {"Author": "Ñandú \"comillas\"", "keywords": [], "extra": {}},
+        "advanced": {"patterns": [{"name": "email", "matches": ["x@y.z", "€"]}], "score": 0.5},
+    },
+    {"path": "b.txt", "size": 0, "metadata": None, "flags": [True, False, None]},
+    {"sin_path": 1},
+]
+
+
+def _expected(tmp_path, entries):
+    path = tmp_path / "esperado.json"
+    save_stats({str(e.get("path", "")): e for e in entries}, path)
+    return path.read_bytes()
+
+
+def test_compact_es_identico_a_save_stats(tmp_path):
+    for entries in (ENTRIES, ENTRIES[:1], []):
+        with StatsWriter(tmp_path / "stats.jsonl", fmt="jsonl") as writer:
+            for entry in entries:
+                writer.write(entry)
+        compact_stats_jsonl(tmp_path / "stats.jsonl", tmp_path / "compacto.json")
+
+        assert (tmp_path / "compacto.json").read_bytes() == _expected(tmp_path, entries)
+
+
+def test_stats_writer_json_compacta_al_cerrar(tmp_path):
+    out = tmp_path / "stats.json"
+    with StatsWriter(out) as writer:
+        for entry in ENTRIES:
+            writer.write(entry)
+
+    assert writer.count == len(ENTRIES)
+    assert out.read_bytes() == _expected(tmp_path, ENTRIES)
+    assert not writer.jsonl_path.exists()
@@ -0,0 +1,91 @@
+import os
+import sys
+from pathlib import Path
+
+# Ruta raíz del repo y src/ para poder importar metahunter
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.append(str(SRC))
+
+from metahunter.walker import iter_input_files
+
+
+def _tree(tmp_path):
+    root = tmp_path / "in"
+    for rel in ("b.pdf", "a.txt", "sub/c.pdf", "sub/deep/d.pdf", "tmp/e.pdf"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    return root
+
+
+def _rels(root, **kwargs):
+    return [f.rel_path for f in iter_input_files(root, **kwargs)]
+
+
+def test_recursivo_y_sorted(tmp_path):
+    root = _tree(tmp_path)
+
+    assert _rels(root, sort=True) == ["a.txt", "b.pdf"]
+    assert _rels(root, recursive=True, sort=True) == [
+        "a.txt", "b.pdf", "sub/c.pdf", "sub/deep/d.pdf", "tmp/e.pdf",
+    ]
+    # Sin --sorted el orden es el de scandir, pero el conjunto es el mismo
+    assert sorted(_rels(root, recursive=True)) == _rels(root, recursive=True, sort=True)
+
+
+def test_include_exclude(tmp_path):
+    root = _tree(tmp_path)
+
+    assert _rels(root, recursive=True, include=["*.pdf"], exclude=["tmp"], sort=True) == [
+        "b.pdf", "sub/c.pdf", "sub/deep/d.pdf",
+    ]
+    # Un directorio excluido por ruta relativa se poda entero
+    assert _rels(root, recursive=True, exclude=["sub/deep"], sort=True) == [
+        "a.txt", "b.pdf", "sub/c.pdf", "tmp/e.pdf",
+    ]
+
+
+def test_omite_la_carpeta_de_salida(tmp_path):
+    root = _tree(tmp_path)
+    out = root / "cleaned"
+    out.mkdir()
+    (out / "b.pdf").write_bytes(b"x")
+
+    rels = _rels(root, recursive=True, skip_dirs=[out])
+    assert not [r for r in rels if r.startswith("cleaned/")]
+    assert len(rels) == 5
+
+
+def test_politicas_de_symlinks(tmp_path):
+    root = _tree(tmp_path)
+    outside = tmp_path / "fuera"
+    outside.mkdir()
+    (outside / "f.pdf").write_bytes(b"x")
+    os.symlink(root / "a.txt", root / "enlace.txt")
+    os.symlink(outside, root / "dir_enlazado")
+    # Ciclo: sub/bucle -> in
+    os.symlink(root, root / "sub" / "bucle")
+
+    files = _rels(root, recursive=True, sort=True)
+    assert "enlace.txt" in files
+    assert not [r for r in files if r.startswith("dir_enlazado/")]
+
+    follow = _rels(root, recursive=True, symlinks="follow", sort=True)
+    assert "dir_enlazado/f.pdf" in follow
+    assert not [r for r in follow if "bucle" in r]
+
+    skip = _rels(root, recursive=True, symlinks="skip", sort=True)
+    assert "enlace.txt" not in skip
+    assert skip == ["a.txt", "b.pdf", "sub/c.pdf", "sub/deep/d.pdf", "tmp/e.pdf"]
+
+
+def test_filtros_por_stat(tmp_path):
+    root = tmp_path / "in"
+    root.mkdir()
+    for name, size in (("p.bin", 10), ("m.bin", 100), ("g.bin", 1000)):
+        (root / name).write_bytes(b"x" * size)
+
+    assert _rels(root, min_size=50, max_size=500) == ["m.bin"]
+    f = next(iter_input_files(root, min_size=1000))
+    assert f.signature == (1000, f.mtime_ns, (root / "g.bin").stat().st_ino)